@@ -0,0 +1,61 @@
+"""
+Scaling of the 3D geometry build with the string length.
+
+Times build_string_geometry3d plus the single synchronize for strings of
+1 to 200 characters and fits the exponent of time ~ length^k, which should
+be close to 1 (linear) now that glyphs are extruded in one batch.
+
+Usage:
+    python benchmarks/bench_3d_scaling.py [--lengths 1 10 50 100 200]
+"""
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from fontmesher.fonts import get_font
+from fontmesher.font_tools_3d import build_string_geometry3d
+from fontmesher.glyphs import GlyphCache
+from fontmesher.utils import get_font_boundaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[1, 5, 10, 25, 50, 100, 200])  # noqa
+    parser.add_argument("--font", default="Clip")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    import gmsh
+
+    gmsh.initialize()
+    gmsh.option.setNumber("General.Terminal", 0)
+    font = get_font(args.font)
+    min_val, max_val = get_font_boundaries(font)
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+
+    timings = []
+    print(f"{'length':>6s} {'geometry [ms]':>14s} {'synchronize [ms]':>17s} {'total [ms]':>11s}")  # noqa
+    for length in args.lengths:
+        string = "".join(itertools.islice(itertools.cycle(alphabet), length))
+        best = None
+        for _ in range(args.repeat):
+            gmsh.clear()
+            start = time.perf_counter()
+            build_string_geometry3d(string, GlyphCache(font), min_val, max_val)
+            built = time.perf_counter()
+            gmsh.model.geo.synchronize()
+            done = time.perf_counter()
+            run = (built - start, done - built)
+            best = run if best is None or sum(run) < sum(best) else best
+        timings.append(sum(best))
+        print(f"{length:6d} {best[0] * 1e3:14.1f} {best[1] * 1e3:17.1f} {sum(best) * 1e3:11.1f}")  # noqa
+
+    if len(args.lengths) > 1:
+        exponent = np.polyfit(np.log(args.lengths), np.log(timings), 1)[0]
+        print(f"time ~ length^{exponent:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Meshing-algorithm and thread-count benchmark.
+
+Times the full 2D and 3D builders (without writing) for every
+combination of algorithm and number of threads, over a few typical word
+lengths, and reports the fastest combination per dimension.
+
+Usage:
+    python benchmarks/bench_algorithms.py [--lc 0.05] [--threads 1 4 16]
+"""
+import argparse
+import os
+import time
+
+from fontmesher.font_tools import make_string_mesh
+from fontmesher.font_tools_3d import make_string_mesh3d
+
+words = ["Hi", "Hello", "Fontmesher", "Meshing benchmark"]
+algorithms_2d = ["delaunay", "frontal-delaunay", "meshadapt", "packing-parallelograms"]  # noqa
+algorithms_3d = ["hxt", "delaunay", "frontal"]
+
+
+def time_build(builder, string, repeat, **kwargs):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        builder(string, write=False, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def sweep(dim, builder, lc, threads, repeat, algorithm_key, algorithms):
+    totals = {}
+    for algorithm in algorithms:
+        for num_threads in threads:
+            row = []
+            for word in words:
+                seconds = time_build(
+                    builder, word, repeat, lc=lc, num_threads=num_threads,
+                    **{algorithm_key: algorithm},
+                )
+                row.append(seconds)
+            totals[(algorithm, num_threads)] = sum(row)
+            cells = " ".join(f"{s * 1e3:9.1f}" for s in row)
+            print(f"{dim}D {algorithm:24s} {num_threads:3d} threads {cells}")
+    (algorithm, num_threads), _ = min(totals.items(), key=lambda item: item[1])
+    print(f"fastest {dim}D: {algorithm} with {num_threads} threads\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lc", type=float, default=0.05)
+    parser.add_argument("--lc3d", type=float, default=0.08)
+    parser.add_argument("--threads", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}))  # noqa
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    header = " ".join(f"{len(w):6d} ch" for w in words)
+    print(f"time [ms] per word length {header}")
+    sweep(2, make_string_mesh, args.lc, args.threads, args.repeat, "algorithm_2d", algorithms_2d)  # noqa
+    sweep(3, make_string_mesh3d, args.lc3d, args.threads, args.repeat, "algorithm_3d", algorithms_3d)  # noqa
+
+
+if __name__ == "__main__":
+    main()
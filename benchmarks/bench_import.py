@@ -0,0 +1,58 @@
+"""
+Import-time benchmark for fontmesher.
+
+Each scenario is timed in a fresh interpreter, and the cost of starting
+the interpreter itself is subtracted. The "eager" scenario reproduces what
+`import fontmesher` used to do (load gmsh and parse the default font) so
+the gain of lazy loading can be read directly from the table.
+
+Usage:
+    python benchmarks/bench_import.py [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+scenarios = {
+    "interpreter": "pass",
+    "import fontmesher": "import fontmesher",
+    "import fontmesher.font_tools": "import fontmesher.font_tools",
+    "first default_font access": "import fontmesher; fontmesher.default_font",
+    "eager (gmsh + Clip.ttf)": (
+        "import gmsh; from fontTools.ttLib import TTFont; "
+        "import fontmesher; TTFont(fontmesher.font_path)"
+    ),
+}
+
+
+def time_snippet(snippet, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", snippet], cwd=repo_dir, check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    results = {name: time_snippet(code, args.repeat) for name, code in scenarios.items()}  # noqa
+    baseline = results.pop("interpreter")
+    print(f"interpreter startup: {baseline * 1e3:8.1f} ms (subtracted below)")
+    for name, seconds in results.items():
+        print(f"{name:32s} {(seconds - baseline) * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Glyph source set-up and outline decoding: TTF through fontTools against a
+memory-mapped outline pack.
+
+For every font, times a cold start (parse / map the font, boundaries,
+first draw of a string) and the decoding of all lowercase glyphs with a
+RecordingPen.
+
+Usage:
+    python benchmarks/bench_outline_pack.py [--fonts Clip Rebelion] [--repeat 20]
+"""
+import argparse
+import os
+import string
+import tempfile
+import time
+
+from fontTools.pens.recordingPen import RecordingPen
+
+from fontmesher.fonts import clear_fonts, get_font
+from fontmesher.glyphs import glyph_source
+from fontmesher.outline_pack import compile_pack
+
+
+def cold_start(font_spec, text):
+    clear_fonts()
+    start = time.perf_counter()
+    glyphs, _, _ = glyph_source(get_font(font_spec))
+    for char in text:
+        glyphs.draw(char, RecordingPen())
+    return time.perf_counter() - start
+
+
+def decode(font_spec, repeat):
+    glyphs = get_font(font_spec)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        # a fresh glyph source per job, like the builders
+        source, _, _ = glyph_source(glyphs)
+        for char in string.ascii_lowercase:
+            source.draw(char, RecordingPen())
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fonts", nargs="+", default=["Clip", "Rebelion"])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'font':10s} {'source':6s} {'cold start [ms]':>16s} {'decode a-z [ms]':>16s}")  # noqa
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for font in args.fonts:
+            pack = compile_pack(get_font(font), os.path.join(tmp_dir, f"{font}.fmpack"))  # noqa
+            for label, spec in (("ttf", font), ("pack", pack)):
+                cold = cold_start(spec, "Hello World")
+                print(f"{font:10s} {label:6s} {cold * 1e3:16.2f} {decode(spec, args.repeat) * 1e3:16.2f}")  # noqa
+
+
+if __name__ == "__main__":
+    main()
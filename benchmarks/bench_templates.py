@@ -0,0 +1,38 @@
+"""
+Template meshing against meshing the whole string, for growing lengths.
+
+Meshes strings cycling through a fixed alphabet with make_string_mesh and
+make_template_mesh, and reports the total times and element counts.
+
+Usage:
+    python benchmarks/bench_templates.py [--lengths 10 50 200 500] [--alphabet abcdefghijklmnopqrstuvwxyz]
+"""
+import argparse
+import itertools
+
+from fontmesher.font_tools import make_string_mesh
+from fontmesher.templates import make_template_mesh
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 50, 200, 500])  # noqa
+    parser.add_argument("--alphabet", default="abcdefghijklmnopqrstuvwxyz")
+    parser.add_argument("--font", default="Clip")
+    parser.add_argument("--lc", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{'length':>6s} {'whole [ms]':>11s} {'templates [ms]':>15s} {'speed-up':>9s} {'triangles':>10s} {'template triangles':>19s}")  # noqa
+    for length in args.lengths:
+        string = "".join(itertools.islice(itertools.cycle(args.alphabet), length))
+        kwargs = dict(font=args.font, lc=args.lc, write=False, return_result=True)
+        whole = make_string_mesh(string, **kwargs)
+        templates = make_template_mesh(string, **kwargs)
+        print(
+            f"{length:6d} {whole.total_time * 1e3:11.1f} {templates.total_time * 1e3:15.1f} "  # noqa
+            f"{whole.total_time / templates.total_time:9.2f} {whole.counts['elements_2']:10d} {templates.counts['elements_2']:19d}"  # noqa
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Scaling of tiled text meshing with the number of worker processes.
+
+Meshes a generated paragraph with make_text_mesh for every worker count
+and reports the time of every phase and the speed-up over one worker.
+
+Usage:
+    python benchmarks/bench_tiled.py [--lines 20] [--chars 80] [--workers 1 2 4 8]
+"""
+import argparse
+import itertools
+import textwrap
+
+from fontmesher.tiled import make_text_mesh
+
+words = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor".split()  # noqa
+
+
+def make_text(lines, chars):
+    words_iter = itertools.cycle(words)
+    text = " ".join(next(words_iter) for _ in range(lines * chars // 5))
+    return "\n".join(textwrap.wrap(text, chars)[:lines])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--chars", type=int, default=80)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--font", default="Clip")
+    parser.add_argument("--lc", type=float, default=0.05)
+    args = parser.parse_args()
+
+    text = make_text(args.lines, args.chars)
+    print(f"{len(text)} characters on {text.count(chr(10)) + 1} lines")
+    print(f"{'workers':>7s} {'generate [ms]':>14s} {'merge [ms]':>11s} {'total [ms]':>11s} {'speed-up':>9s} {'triangles':>10s}")  # noqa
+    baseline = None
+    for workers in args.workers:
+        result = make_text_mesh(
+            text, font=args.font, lc=args.lc, workers=workers,
+            write=False, return_result=True,
+        )
+        baseline = baseline or result.total_time
+        print(
+            f"{workers:7d} {result.timings['generate'] * 1e3:14.1f} {result.timings['merge'] * 1e3:11.1f} "  # noqa
+            f"{result.total_time * 1e3:11.1f} {baseline / result.total_time:9.2f} {result.counts['elements_2']:10d}"  # noqa
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Write-time and file-size benchmark of the mesh output formats.
+
+The mesh is built once, then written in every format / binary /
+compression combination, timing each write and recording the file size.
+
+Usage:
+    python benchmarks/bench_write.py [--string Hello] [--lc 0.05] [--dim 3]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from fontmesher.mesh_data import MeshData
+from fontmesher.mesh_io import default_filename, write_mesh
+
+variants = [
+    ("msh", False, False),
+    ("msh", True, False),
+    ("msh", True, True),
+    ("msh2", True, False),
+    ("vtk", True, False),
+    ("vtu", False, False),
+    ("vtu", False, True),
+    ("xdmf", False, False),
+    ("xdmf", False, True),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--string", default="Hello")
+    parser.add_argument("--lc", type=float, default=0.05)
+    parser.add_argument("--dim", type=int, choices=(2, 3), default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.dim == 3:
+        from fontmesher.font_tools_3d import make_string_mesh3d as builder
+    else:
+        from fontmesher.font_tools import make_string_mesh as builder
+    builder(args.string, lc=args.lc, write=False)
+    data = MeshData.from_gmsh()
+    print(f"{args.string!r} ({args.dim}D, lc={args.lc}): {data}")
+
+    print(f"{'format':8s} {'binary':>6s} {'compress':>8s} {'time [ms]':>10s} {'size [MB]':>10s}")  # noqa
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for file_format, binary, compress in variants:
+            path = os.path.join(
+                tmp_dir, default_filename(args.string, "", file_format, compress)  # noqa
+            )
+            try:
+                timings = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    write_mesh(path, file_format, binary, compress, data)
+                    timings.append(time.perf_counter() - start)
+            except Exception as e:  # noqa: BLE001 - e.g. h5py missing
+                print(f"{file_format:8s} {binary!s:>6s} {compress!s:>8s}  skipped: {e}")  # noqa
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(tmp_dir, name))
+                for name in os.listdir(tmp_dir)
+                if name.startswith(os.path.splitext(path)[0].split(os.sep)[-1])
+            )
+            print(f"{file_format:8s} {binary!s:>6s} {compress!s:>8s} {min(timings) * 1e3:10.1f} {size / 1e6:10.2f}")  # noqa
+            for name in os.listdir(tmp_dir):
+                os.remove(os.path.join(tmp_dir, name))
+
+
+if __name__ == "__main__":
+    main()
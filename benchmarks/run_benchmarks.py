@@ -0,0 +1,198 @@
+"""
+Phase-by-phase benchmark suite of the 2D and 3D meshing pipelines.
+
+Every case times the phases of a build separately:
+
+    font_load     parse the TTF (font registry cleared first)
+    boundaries    get_font_boundaries, without the boundary cache
+    geometry      domain and glyph geometry through FontPen
+    synchronize   gmsh.model.geo.synchronize
+    generate      gmsh.model.mesh.generate
+    write         gmsh.write of a binary MSH file
+
+and sweeps string length, repeated ("aaaa") versus unique ("abcd")
+characters, lc, font and dimension. The minimum over the repeats of each
+phase is saved as JSON under benchmarks/results/, so runs can be compared
+over time:
+
+    python benchmarks/run_benchmarks.py                     # full sweep
+    python benchmarks/run_benchmarks.py --quick             # small sweep
+    python benchmarks/run_benchmarks.py --compare OLD.json NEW.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+from fontmesher.fonts import clear_fonts, get_font
+from fontmesher.font_tools import build_string_geometry
+from fontmesher.font_tools_3d import build_string_geometry3d
+from fontmesher.glyphs import GlyphCache
+from fontmesher.mesh_io import write_mesh
+from fontmesher.options import apply_mesh_options
+from fontmesher.utils import get_font_boundaries
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+results_dir = os.path.join(bench_dir, "results")
+phases = ["font_load", "boundaries", "geometry", "synchronize", "generate", "write"]  # noqa
+alphabet = "abcdefghijklmnopqrstuvwxyz"
+
+full_sweep = {
+    "dim": [2, 3],
+    "font": ["Clip", "Rebelion"],
+    "lc": [0.1, 0.05, 0.02],
+    "length": [1, 5, 20, 50],
+    "chars": ["repeated", "unique"],
+}
+quick_sweep = {
+    "dim": [2, 3],
+    "font": ["Clip"],
+    "lc": [0.1],
+    "length": [1, 10],
+    "chars": ["repeated", "unique"],
+}
+
+
+def make_string(length, chars):
+    if chars == "repeated":
+        return "a" * length
+    return "".join(itertools.islice(itertools.cycle(alphabet), length))
+
+
+def run_case(case, tmp_dir):
+    """
+    Time every phase of one build, returns {phase: seconds} and mesh counts.
+    """
+    import gmsh
+
+    timings = {}
+
+    def timed(phase, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings[phase] = time.perf_counter() - start
+        return result
+
+    string = make_string(case["length"], case["chars"])
+    clear_fonts()
+    font = timed("font_load", get_font, case["font"])
+    min_val, max_val = timed("boundaries", get_font_boundaries, font, cache=False)  # noqa
+
+    gmsh.clear()
+    builder = build_string_geometry if case["dim"] == 2 else build_string_geometry3d  # noqa
+    timed("geometry", builder, string, GlyphCache(font), min_val, max_val, lc=case["lc"])  # noqa
+    timed("synchronize", gmsh.model.geo.synchronize)
+    apply_mesh_options()
+    timed("generate", gmsh.model.mesh.generate, case["dim"])
+    timed("write", write_mesh, os.path.join(tmp_dir, "bench.msh"), "msh", True)  # noqa
+
+    counts = {
+        "nodes": len(gmsh.model.mesh.getNodes()[0]),
+        "elements": int(sum(len(tags) for tags in gmsh.model.mesh.getElements(case["dim"])[1])),  # noqa
+    }
+    return timings, counts
+
+
+def run(sweep, repeat):
+    import gmsh
+
+    if not gmsh.isInitialized():
+        gmsh.initialize()
+    gmsh.option.setNumber("General.Terminal", 0)
+
+    keys = list(sweep)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for values in itertools.product(*(sweep[key] for key in keys)):
+            case = dict(zip(keys, values))
+            best, counts = None, None
+            for _ in range(repeat):
+                timings, counts = run_case(case, tmp_dir)
+                best = timings if best is None else {
+                    phase: min(best[phase], timings[phase]) for phase in phases
+                }
+            results.append({"case": case, "phases": best, "counts": counts})
+            print_row(case, best, counts)
+    return results
+
+
+def print_row(case, timings, counts):
+    label = f"{case['dim']}D {case['font']:9s} lc={case['lc']:<5} n={case['length']:<3} {case['chars']:8s}"  # noqa
+    cells = " ".join(f"{timings[phase] * 1e3:9.1f}" for phase in phases)
+    print(f"{label} {cells} {counts['elements']:9d}")
+
+
+def metadata():
+    import gmsh
+
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=bench_dir,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": revision,
+        "gmsh": gmsh.__version__,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    old_cases = {json.dumps(r["case"], sort_keys=True): r for r in old["results"]}  # noqa
+    print(f"{old_path} ({old['meta']['revision']}) -> {new_path} ({new['meta']['revision']})")  # noqa
+    print("speed-up per phase (old / new time)")
+    for result in new["results"]:
+        previous = old_cases.get(json.dumps(result["case"], sort_keys=True))
+        if previous is None:
+            continue
+        case = result["case"]
+        label = f"{case['dim']}D {case['font']:9s} lc={case['lc']:<5} n={case['length']:<3} {case['chars']:8s}"  # noqa
+        cells = " ".join(
+            f"{previous['phases'][phase] / max(result['phases'][phase], 1e-9):9.2f}"  # noqa
+            for phase in phases
+        )
+        print(f"{label} {cells}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--quick", action="store_true", help="run the small sweep")  # noqa
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="result file, defaults to benchmarks/results/<time>.json")  # noqa
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    header = " ".join(f"{phase[:9]:>9s}" for phase in phases)
+    print(f"{'case':43s} {header}  elements   (times in ms)")
+    results = run(quick_sweep if args.quick else full_sweep, args.repeat)
+
+    output = args.output or os.path.join(
+        results_dir, time.strftime("%Y%m%d-%H%M%S") + ".json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"meta": metadata(), "results": results}, f, indent=1)
+    print(f"results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
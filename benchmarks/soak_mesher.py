@@ -0,0 +1,71 @@
+"""
+Soak test of a long-running mesher: memory must stay flat over thousands of meshes.
+
+Builds --jobs meshes of varying strings in one process, samples the resident
+memory every --every jobs and fits its growth over the jobs after the
+warm-up. Exits with status 1 if the memory grew by more than --max-growth MB
+over the run.
+
+    python benchmarks/soak_mesher.py                      # Mesher session
+    python benchmarks/soak_mesher.py --no-session         # plain make_string_mesh calls, for comparison
+
+Needs /proc (Linux) to read the resident memory.
+"""
+import argparse
+import itertools
+import sys
+import time
+
+import numpy as np
+
+from fontmesher.font_tools import make_string_mesh
+from fontmesher.profiling import current_memory
+from fontmesher.session import Mesher
+
+words = ["fontmesher", "Hello", "World", "mesh", "glyph", "a", "xyz", "Soak test"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--every", type=int, default=50)
+    parser.add_argument("--warmup", type=float, default=0.1, help="fraction of the jobs ignored in the fit")  # noqa
+    parser.add_argument("--max-growth", type=float, default=20.0, help="allowed growth in MB")  # noqa
+    parser.add_argument("--lc", type=float, default=0.1)
+    parser.add_argument("--font", default="Clip")
+    parser.add_argument("--no-session", action="store_true")
+    args = parser.parse_args()
+
+    if current_memory() is None:
+        sys.exit("the resident memory cannot be read on this platform")
+
+    kwargs = dict(lc=args.lc, write=False, return_data=True, num_threads=1)
+    samples = []
+    start = time.perf_counter()
+    strings = itertools.cycle(words)
+    with Mesher(font=args.font, **kwargs) as mesher:
+        for job in range(1, args.jobs + 1):
+            string = next(strings)
+            if args.no_session:
+                make_string_mesh(string, font=args.font, **kwargs)
+            else:
+                mesher.mesh(string)
+            if job % args.every == 0:
+                samples.append((job, current_memory() / 2 ** 20))
+                print(f"{job:6d} jobs {samples[-1][1]:9.1f} MB {(time.perf_counter() - start) / job * 1e3:8.1f} ms/job")  # noqa
+
+    jobs, memory = np.array(samples).T
+    steady = jobs >= args.warmup * args.jobs
+    slope = np.polyfit(jobs[steady], memory[steady], 1)[0] if steady.sum() > 1 else 0.0  # noqa
+    growth = slope * (args.jobs - args.warmup * args.jobs)
+    print(f"memory growth after warm-up: {slope * 1e3:.2f} kB/job, {growth:.1f} MB over the run")  # noqa
+    if growth > args.max_growth:
+        print(f"FAIL: more than {args.max_growth} MB")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import logging
 import os
 import sys
 
@@ -12,6 +13,7 @@ if __name__ == "__main__":
 
     string = sys.argv[1]
     assert string, "The input string cannot be empty"
+    logging.basicConfig(level=logging.INFO)
 
     make_string_mesh(
         string=string,
@@ -1,3 +1,4 @@
+import logging
 import os
 import sys
 
@@ -11,6 +12,7 @@ if __name__ == "__main__":
 
     string = sys.argv[1]
     assert string, "The input string cannot be empty"
+    logging.basicConfig(level=logging.INFO)
 
     make_string_mesh3d(
         string=string,
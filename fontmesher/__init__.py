@@ -1,7 +1,32 @@
 import os
-from fontTools.ttLib import TTFont
 
 font_path = os.path.join(
     os.path.dirname(os.path.dirname(__file__)), "style", "Clip.ttf"
 )
-default_font = TTFont(font_path)
+
+# heavy attributes are resolved on first access (PEP 562), so that
+# `import fontmesher` does not parse fonts or load gmsh
+_lazy_attrs = {
+    "make_string_mesh": "fontmesher.font_tools",
+    "make_string_mesh3d": "fontmesher.font_tools_3d",
+    "make_string_meshes": "fontmesher.batch",
+    "make_string_meshes3d": "fontmesher.batch",
+    "make_text_mesh": "fontmesher.tiled",
+    "make_template_mesh": "fontmesher.templates",
+    "make_mesh_hierarchy": "fontmesher.hierarchy",
+    "get_font": "fontmesher.fonts",
+    "MeshCache": "fontmesher.cache",
+    "Mesher": "fontmesher.session",
+    "estimate_mesh": "fontmesher.estimate",
+    "lc_for_budget": "fontmesher.estimate",
+}
+
+
+def __getattr__(name):
+    if name == "default_font":
+        from fontmesher.fonts import get_font
+        return get_font(font_path)
+    if name in _lazy_attrs:
+        import importlib
+        return getattr(importlib.import_module(_lazy_attrs[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,3 @@
+from fontmesher.cli import main
+
+main()
@@ -0,0 +1,240 @@
+import logging
+import os
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from fontmesher.fonts import font_path_of
+
+logger = logging.getLogger(__name__)
+
+BatchResult = namedtuple(
+    "BatchResult", ["index", "string", "path", "error", "attempts"]
+)
+BatchResult.__doc__ = """
+The outcome of one string of a batch.
+
+Attributes:
+    index (int): The position of the string in the input sequence.
+    string (str): The meshed string.
+    path (str): The path to the saved mesh file, or None if meshing failed.
+    error (str): The error message of the last failed attempt, or None.
+    attempts (int): The number of attempts that were made.
+"""
+
+_builders = {
+    "2d": ("fontmesher.font_tools", "make_string_mesh"),
+    "3d": ("fontmesher.font_tools_3d", "make_string_mesh3d"),
+}
+
+
+def _get_builder(kind):
+    import importlib
+    module, name = _builders[kind]
+    return getattr(importlib.import_module(module), name)
+
+
+def _init_worker(font):
+    """
+    Start the gmsh session of a worker process and warm up the font.
+    """
+    import gmsh
+
+    from fontmesher.fonts import get_font
+    from fontmesher.glyphs import glyph_source
+
+    if not gmsh.isInitialized():
+        gmsh.initialize()
+    glyph_source(get_font(font))
+
+
+def _mesh_chunk(kind, chunk, font, retries, kwargs):
+    """
+    Mesh a chunk of (index, string) pairs inside a worker process. gmsh
+    is restarted after every failed attempt, before the retry or the next
+    string.
+    """
+    import gmsh
+
+    from fontmesher.fonts import get_font
+    from fontmesher.options import restart_gmsh
+
+    builder = _get_builder(kind)
+    font = get_font(font)
+    results = []
+    for index, string in chunk:
+        error = None
+        for attempt in range(1, retries + 2):
+            try:
+                path = builder(string, font=font, **kwargs)
+                error = None
+                break
+            except Exception as e:  # noqa: BLE001 - reported back to the caller
+                path = None
+                error = f"{type(e).__name__}: {e}"
+                # later meshes of a session gmsh failed in come out empty
+                restart_gmsh()
+            finally:
+                # drop the model so the worker does not accumulate them
+                gmsh.clear()
+        results.append(BatchResult(index, string, path, error, attempt))
+    return results
+
+
+def _failed(chunk, error, attempts=1):
+    return [
+        BatchResult(index, string, None, error, attempts) for index, string in chunk
+    ]
+
+
+def _run_batch(kind, strings, font, workers, chunksize, retries, mp_context, kwargs):  # noqa
+    """
+    Check the arguments of a batch and return the iterator of its results.
+    The checks run right away, not on the first `next()`.
+    """
+    strings = list(strings)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(strings) or 1))
+    chunksize = max(1, int(chunksize))
+
+    font_spec = font_path_of(font)
+    if font_spec is None:
+        raise ValueError(
+            "Batch meshing needs a font loaded from a file, pass its path or name instead"  # noqa
+        )
+
+    # the pool already uses every core, one gmsh thread per worker avoids
+    # oversubscription unless the caller asks otherwise
+    kwargs.setdefault("num_threads", 1)
+
+    indexed = list(enumerate(strings))
+    chunks = [
+        indexed[i:i + chunksize] for i in range(0, len(indexed), chunksize)
+    ]
+    return _iter_batch(kind, chunks, font_spec, workers, retries, mp_context, kwargs)  # noqa
+
+
+def _iter_batch(kind, chunks, font_spec, workers, retries, mp_context, kwargs):
+    """
+    Mesh the chunks in a process pool and yield their results.
+
+    At most `workers` chunks are submitted at a time, so when a worker dies
+    (e.g. gmsh segfaults or runs out of memory) and breaks the pool, the
+    chunks in flight are the only suspects. The pool is recreated, the
+    strings of the suspects are run one at a time to find the one that
+    crashes (retried up to `retries` times), and the batch goes on.
+    """
+    def new_pool(max_workers):
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(font_spec,),
+        )
+
+    pending = deque(chunks)
+    pool = new_pool(workers)
+    try:
+        while pending:
+            in_flight = {}
+            suspects = []
+            while (pending or in_flight) and not suspects:
+                while pending and len(in_flight) < workers:
+                    chunk = pending.popleft()
+                    future = pool.submit(_mesh_chunk, kind, chunk, font_spec, retries, kwargs)  # noqa
+                    in_flight[future] = chunk
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = in_flight.pop(future)
+                    try:
+                        yield from future.result()
+                    except BrokenProcessPool:
+                        suspects.append(chunk)
+                    except Exception as e:  # noqa: BLE001 - reported back to the caller
+                        yield from _failed(chunk, f"{type(e).__name__}: {e}")
+            if not suspects:
+                continue
+
+            # the whole pool is broken, every chunk in flight is a suspect
+            suspects.extend(in_flight.values())
+            logger.warning("a worker crashed, isolating %d chunks", len(suspects))
+            pool.shutdown(cancel_futures=True)
+            pool = new_pool(1)
+            for item in (item for chunk in suspects for item in chunk):
+                results = None
+                for attempt in range(1, retries + 2):
+                    future = pool.submit(_mesh_chunk, kind, [item], font_spec, retries, kwargs)  # noqa
+                    try:
+                        results = future.result()
+                    except BrokenProcessPool as e:
+                        pool.shutdown(cancel_futures=True)
+                        pool = new_pool(1)
+                        error = f"worker crashed: {type(e).__name__}: {e}"
+                        continue
+                    except Exception as e:  # noqa: BLE001 - reported back to the caller
+                        results = _failed([item], f"{type(e).__name__}: {e}", attempt)  # noqa
+                    break
+                if results is None:
+                    logger.warning("string %d crashed its worker %d times", item[0], retries + 1)  # noqa
+                    results = _failed([item], error, retries + 1)
+                yield from results
+            pool.shutdown()
+            pool = new_pool(workers)
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def make_string_meshes(
+    strings,
+    font=None,
+    workers=None,
+    chunksize=1,
+    retries=0,
+    mp_context=None,
+    **kwargs,
+):
+    """
+    Generates 2D meshes for many strings in parallel and streams back the results.
+
+    The strings are split into chunks that are distributed over a pool of worker processes.
+    Every worker owns its own gmsh session and keeps the font parsed between jobs.
+    Results are yielded as soon as their chunk is finished, so they do not come in input order.
+
+    Parameters:
+    strings (iterable of str): The strings to be meshed.
+    font: The font to be used, a bundled font name, a font path or a TTFont loaded from a file.
+        Defaults to `default_font`.
+    workers (int): The number of worker processes. Defaults to the number of CPUs.
+    chunksize (int): The number of strings sent to a worker at once. Defaults to 1.
+    retries (int): The number of times a failed string is retried. Defaults to 0.
+    mp_context: The multiprocessing context of the pool. Defaults to the platform default.
+    **kwargs: Further arguments passed on to `make_string_mesh`, e.g. `save_dir` or `lc`.
+
+    Returns:
+    iterator: The BatchResult (index, string, saved path or error, and number of attempts) of each string, as
+    they finish. The arguments are checked when the function is called, the meshing starts on iteration.
+    A worker that crashes (e.g. a segfault or out of memory in gmsh) is replaced, and only the string that
+    crashed it fails, after `retries` more attempts.
+    """
+    return _run_batch("2d", strings, font, workers, chunksize, retries, mp_context, kwargs)  # noqa
+
+
+def make_string_meshes3d(
+    strings,
+    font=None,
+    workers=None,
+    chunksize=1,
+    retries=0,
+    mp_context=None,
+    **kwargs,
+):
+    """
+    Generates 3D meshes for many strings in parallel and streams back the results.
+
+    See `make_string_meshes`, the keyword arguments are passed on to `make_string_mesh3d`.
+
+    Returns:
+    iterator: The BatchResult of each string, as they finish.
+    """
+    return _run_batch("3d", strings, font, workers, chunksize, retries, mp_context, kwargs)  # noqa
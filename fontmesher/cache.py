@@ -0,0 +1,333 @@
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import shutil
+import time
+
+from fontmesher.fonts import get_font
+from fontmesher.mesh_data import MeshData
+from fontmesher.mesh_io import default_filename, file_formats, guess_file_format, write_xdmf  # noqa
+from fontmesher.profiling import MeshResult, peak_memory, reset_peak_memory
+from fontmesher.utils import font_hash, get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# bump when a change of fontmesher alters the meshes of unchanged parameters
+cache_version = 2
+
+# builder arguments that only select what is returned or where it is written,
+# they are not part of the cache key
+output_args = {
+    "save_dir", "write", "return_data", "filename", "file_format", "binary",
+    "compress", "file", "profile", "return_result", "num_threads", "cache",
+}
+
+# gmsh session options that shape the mesh: the builders leave them alone
+# unless told otherwise, so they come from gmsh's defaults, a `Mesher` or the
+# caller, and their values at build time are part of the cache key
+meshing_options = [
+    "Mesh.Algorithm", "Mesh.Algorithm3D", "Mesh.RecombinationAlgorithm",
+    "Mesh.RecombineAll", "Mesh.SubdivisionAlgorithm", "Mesh.MeshSizeFactor",
+    "Mesh.MeshSizeMin", "Mesh.MeshSizeMax", "Mesh.MeshSizeFromPoints",
+    "Mesh.MeshSizeFromCurvature", "Mesh.MeshSizeExtendFromBoundary",
+    "Mesh.Smoothing", "Mesh.Optimize", "Mesh.OptimizeNetgen", "Mesh.ElementOrder",
+    "Mesh.RandomFactor", "Mesh.RandomSeed", "Geometry.Tolerance",
+]
+
+default_max_bytes = 1 << 30
+# temporary files older than this are left over by crashed processes
+stale_seconds = 3600
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass  # removed by another process
+
+
+class MeshCache:
+    """
+    A content-addressed on-disk cache of meshes.
+
+    Entries are keyed by a hash of the font content, every meshing parameter,
+    the gmsh session options of `meshing_options`, the gmsh version and
+    `cache_version`. A mesh is stored as the written file
+    of each requested format and / or as its arrays (.npz). Files are written
+    atomically (temporary file + rename), so several processes can share a
+    directory. Hits refresh the modification time of an entry, and the least
+    recently used entries are evicted once the cache grows beyond `max_bytes`.
+
+    Attributes:
+        directory (str): The cache directory, defaults to the "meshes" directory of `get_cache_dir`.
+        max_bytes (int): The size limit of the cache in bytes, defaults to 1 GiB.
+    Methods:
+        key(kind, font, params):
+            Return the cache key of a build.
+        get(key, artefact):
+            Return the path of a stored artefact, or None.
+        put(key, artefact, path):
+            Move a file into the cache and return its cached path, call `evict` afterwards.
+        evict():
+            Remove the least recently used entries beyond `max_bytes`.
+        clear():
+            Remove all entries.
+    """
+    def __init__(self, directory=None, max_bytes=default_max_bytes):
+        self.directory = directory or get_cache_dir("meshes")
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def key(self, kind, font, params):
+        import gmsh
+
+        if not gmsh.isInitialized():
+            gmsh.initialize()  # the build would, the options are its defaults
+        description = json.dumps({
+            "kind": kind,
+            "font": font_hash(font),
+            "params": params,
+            "options": {name: gmsh.option.getNumber(name) for name in meshing_options},
+            "gmsh": gmsh.__version__,
+            "version": cache_version,
+        }, sort_keys=True, default=repr)
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def _path(self, key, artefact):
+        return os.path.join(self.directory, f"{key}.{artefact}")
+
+    def get(self, key, artefact):
+        path = self._path(key, artefact)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, artefact, path):
+        target = self._path(key, artefact)
+        os.replace(path, target)
+        return target
+
+    def _entries(self, temporary=False):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name == ".lock" or (".tmp" in entry.name) != temporary:
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue  # evicted by another process
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits in
+        `max_bytes`. Only one process evicts at a time, the others skip.
+        """
+        with _try_lock(os.path.join(self.directory, ".lock")) as locked:
+            if not locked:
+                return
+            # leftovers of processes that died while writing
+            for mtime, _, path in self._entries(temporary=True):
+                if mtime < time.time() - stale_seconds:
+                    _remove(path)
+            entries = self._entries()
+            size = sum(entry[1] for entry in entries)
+            for _, entry_size, path in sorted(entries):
+                if size <= self.max_bytes:
+                    break
+                _remove(path)
+                size -= entry_size
+
+    def clear(self):
+        for _, _, path in self._entries():
+            _remove(path)
+
+    def size(self):
+        return sum(entry[1] for entry in self._entries())
+
+
+class _try_lock:
+    """
+    A non-blocking exclusive lock on a file, yields whether it was acquired.
+    Without fcntl (Windows) the lock is always acquired.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.fh = None
+
+    def __enter__(self):
+        try:
+            import fcntl
+        except ImportError:
+            return True
+        self.fh = open(self.path, "a")
+        try:
+            fcntl.flock(self.fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self.fh.close()
+            self.fh = None
+            return False
+        return True
+
+    def __exit__(self, *exc):
+        if self.fh is not None:
+            self.fh.close()  # releases the lock
+
+
+def _get_cache(cache):
+    if isinstance(cache, MeshCache):
+        return cache
+    if isinstance(cache, (str, os.PathLike)):
+        return MeshCache(os.fspath(cache))
+    return MeshCache()
+
+
+def _artefact_name(file_format, binary, compress):
+    """
+    The cache artefact of a file format, e.g. "msh-binary.msh.gz".
+    """
+    ext = file_formats[file_format][0]
+    if compress and file_formats[file_format][1] == "gmsh":
+        ext += ".gz"
+    flags = "".join(
+        f"-{name}" for name, flag in (("binary", binary), ("compress", compress)) if flag  # noqa
+    )
+    return f"{file_format}{flags}{ext}"
+
+
+def _mesh_counts(data):
+    counts = {}
+    for block in data.blocks:
+        name = f"elements_{block.dim}"
+        counts[name] = counts.get(name, 0) + len(block.tags)
+    counts["nodes"] = len(data.nodes)
+    return counts
+
+
+def _cached_build(builder, kind, suffix, args):
+    start = time.perf_counter()
+    memory_scope = "build" if args["return_result"] and reset_peak_memory() else "process"
+    cache = _get_cache(args["cache"])
+    params = {k: v for k, v in args.items() if k not in output_args}
+    font = get_font(params.pop("font"))
+    key = cache.key(kind, font, params)
+
+    string = args["string"]
+    file = args["file"]
+    write = args["write"] or file is not None
+    file_format = args["file_format"]
+    if file_format is None:
+        file_format = guess_file_format(args["filename"]) if args["filename"] and file is None else "msh"  # noqa
+    # XDMF is two files, it is written from the cached arrays
+    need_data = args["return_data"] or (write and file_format == "xdmf")
+    need_file = write and file_format != "xdmf"
+    if not need_data and not need_file:
+        return builder(**dict(args, cache=None))  # nothing to store
+    artefact = _artefact_name(file_format, args["binary"], args["compress"])
+
+    data_path = cache.get(key, "npz") if need_data else None
+    file_path = cache.get(key, artefact) if need_file else None
+    hit = (data_path is not None or not need_data) and (file_path is not None or not need_file)  # noqa
+    result = None
+    if hit:
+        logger.debug("mesh cache hit for %r (%s)", string, key[:12])
+        try:
+            data = MeshData.load(data_path) if need_data else None
+            src = open(file_path, "rb") if need_file else None
+        except FileNotFoundError:
+            hit = False  # evicted in between, build it again
+    if not hit:
+        logger.debug("mesh cache miss for %r (%s)", string, key[:12])
+        # gmsh picks the format from the extension
+        tmp_name = f"{key}.{os.getpid()}.{time.monotonic_ns()}.tmp{file_formats[file_format][0]}"  # noqa
+        build_args = dict(args)
+        build_args.update(
+            font=font, cache=None, save_dir=cache.directory, filename=tmp_name,
+            write=need_file, file=None, file_format=file_format,
+            return_data=need_data,
+        )
+        try:
+            output = builder(**build_args)
+        except BaseException:
+            _remove(os.path.join(cache.directory, tmp_name))
+            raise
+        if args["return_result"]:
+            result = output
+            output = result.data if need_data else result.path
+        data = output if need_data else None
+        if need_data:
+            tmp_data = os.path.join(cache.directory, f"{tmp_name}.npz")
+            data.save(tmp_data)
+            cache.put(key, "npz", tmp_data)
+        if need_file:
+            file_path = cache.put(
+                key, artefact, os.path.join(cache.directory, tmp_name)
+            )
+            src = open(file_path, "rb")
+
+    # deliver the mesh where the caller asked for it
+    save_path = None
+    if need_file:
+        with src:
+            if file is not None:
+                shutil.copyfileobj(src, file)
+            else:
+                save_path = os.path.join(args["save_dir"], args["filename"] or default_filename(
+                    string, suffix, file_format, args["compress"]
+                ))
+                with open(save_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+    elif write:
+        if file is not None:
+            raise ValueError("XDMF output needs a path, it is written as two files")  # noqa
+        save_path = write_xdmf(
+            os.path.join(args["save_dir"], args["filename"] or default_filename(string, suffix, file_format)),  # noqa
+            data, args["compress"],
+        )
+    if save_path is not None:
+        logger.info("Mesh saved to %s", save_path)
+    if not hit:
+        cache.evict()
+
+    if data is not None:
+        data.path = save_path
+        if not args["return_data"]:
+            data = None
+    if args["return_result"]:
+        if result is None:
+            result = MeshResult(
+                save_path, data, {"cache": time.perf_counter() - start},
+                _mesh_counts(data) if data is not None else {}, peak_memory(), memory_scope,
+            )
+        result.path, result.data = save_path, data
+        return result
+    return data if args["return_data"] else save_path
+
+
+def cacheable(kind, suffix=""):
+    """
+    Make a builder look up its meshes in a MeshCache when it is called with
+    `cache` set: True for the default cache, a directory, or a MeshCache.
+    """
+    def decorator(builder):
+        signature = inspect.signature(builder)
+
+        @functools.wraps(builder)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            if not bound.arguments.get("cache"):
+                return builder(*args, **kwargs)
+            if bound.arguments.get("partitions"):
+                # one mesh, several files: not cached
+                bound.arguments["cache"] = None
+                return builder(*bound.args, **bound.kwargs)
+            bound.apply_defaults()
+            return _cached_build(builder, kind, suffix, dict(bound.arguments))
+        return wrapper
+    return decorator
@@ -0,0 +1,54 @@
+"""
+The fontmesher command line:
+
+    fontmesher serve [--port 8765 | --socket PATH] [--workers N] [--max-queue M] [--timeout S] [--font NAME ...]
+    fontmesher pack FONT [--output PATH]
+"""
+import argparse
+import logging
+
+from fontmesher.fonts import get_font
+from fontmesher.outline_pack import compile_pack
+from fontmesher.server import default_port, serve
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="fontmesher", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--log-level", default="INFO", help="logging level, defaults to INFO")  # noqa
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="run a local mesh server with warm worker processes")  # noqa
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=default_port)
+    serve_parser.add_argument("--socket", dest="socket_path", help="listen on a Unix socket instead of TCP")  # noqa
+    serve_parser.add_argument("--workers", type=int, help="worker processes, defaults to the number of CPUs")  # noqa
+    serve_parser.add_argument("--max-queue", type=int, help="requests that may wait for a worker, defaults to 4 per worker")  # noqa
+    serve_parser.add_argument("--timeout", type=float, help="seconds per request, defaults to no limit")  # noqa
+    serve_parser.add_argument("--font", dest="fonts", action="append", help="font to preload (repeatable), the first is the default")  # noqa
+
+    pack_parser = commands.add_parser("pack", help="compile a font into a memory-mapped outline pack")  # noqa
+    pack_parser.add_argument("font", help="a font file or bundled font name")
+    pack_parser.add_argument("--output", help="the pack directory, defaults to the fontmesher cache")  # noqa
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper())
+
+    if args.command == "serve":
+        serve(
+            host=args.host,
+            port=args.port,
+            socket_path=args.socket_path,
+            workers=args.workers,
+            max_queue=args.max_queue,
+            timeout=args.timeout,
+            fonts=args.fonts,
+        )
+    elif args.command == "pack":
+        print(compile_pack(get_font(args.font), args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+import json
+import math
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+from fontTools.pens.areaPen import AreaPen
+from fontTools.pens.perimeterPen import PerimeterPen
+
+from fontmesher.fonts import get_font
+from fontmesher.glyphs import glyph_source
+from fontmesher.utils import font_hash
+
+MeshEstimate = namedtuple(
+    "MeshEstimate", ["nodes", "elements", "seconds", "memory", "lc", "volume", "boundary"]
+)
+MeshEstimate.__doc__ = """
+The predicted size and cost of a mesh, see `estimate_mesh`.
+
+Attributes:
+    nodes (int): The number of nodes.
+    elements (int): The number of elements of the mesh dimension (triangles, tetrahedra, or prisms / hexahedra).
+    seconds (float): The build time in seconds.
+    memory (int): The peak memory of the build in bytes.
+    lc (float): The (far-field) element size the estimate is for.
+    volume (float): The meshed area (2D) or volume (3D), without the glyphs.
+    boundary (float): The boundary length (2D) or area (3D), glyph outlines included.
+"""
+
+Calibration = namedtuple(
+    "Calibration", [
+        "element_factor_2d", "element_factor_3d",
+        "base_seconds", "seconds_per_glyph", "seconds_per_element_2d", "seconds_per_element_3d",
+        "base_memory", "memory_per_element_2d", "memory_per_element_3d",
+    ]
+)
+Calibration.__doc__ = """
+The constants of the cost model: `estimate_mesh` multiplies the geometric
+element counts by the element factors, and predicts
+
+    seconds = base_seconds + seconds_per_glyph * glyphs + seconds_per_element * elements
+    memory = base_memory + memory_per_element * elements
+
+`default_calibration` is not fitted to measurements, fit the constants to a
+machine with `calibrate` from `benchmarks/run_benchmarks.py` results.
+"""
+
+# uncalibrated guesses of single-thread gmsh 4.x costs
+default_calibration = Calibration(
+    element_factor_2d=1.0,
+    element_factor_3d=1.0,
+    base_seconds=0.02,
+    seconds_per_glyph=2e-3,
+    seconds_per_element_2d=6e-6,
+    seconds_per_element_3d=1.5e-5,
+    base_memory=100 * 2 ** 20,
+    memory_per_element_2d=400,
+    memory_per_element_3d=1200,
+)
+
+# node density of a mesh of equilateral triangles / regular tetrahedra of edge lc
+_area_per_node = math.sqrt(3) / 2
+_volume_per_tet = 1 / (6 * math.sqrt(2))
+_tets_per_node = 5.5
+
+# (font hash, char) -> (area, perimeter), least recently used first
+_outline_measures = OrderedDict()
+outline_measures_size = 4096
+
+
+def outline_measures(char, glyphs, font_key):
+    """
+    Return the (area, perimeter) of the outline of a character in the
+    units of its glyph source, computed from the outline alone. The
+    measures of the last `outline_measures_size` characters are kept,
+    keyed by `font_key`, the `font_hash` of the font of `glyphs`.
+    """
+    key = (font_key, char)
+    measures = _outline_measures.get(key)
+    if measures is not None:
+        _outline_measures.move_to_end(key)
+        return measures
+    area_pen = AreaPen()
+    glyphs.draw(char, area_pen)
+    perimeter_pen = PerimeterPen()
+    glyphs.draw(char, perimeter_pen)
+    measures = _outline_measures[key] = (abs(area_pen.value), perimeter_pen.value)
+    while len(_outline_measures) > outline_measures_size:
+        _outline_measures.popitem(last=False)
+    return measures
+
+
+def _graded_density(area, perimeter, lc, lc_min, growth_distance):
+    """
+    The number of lc-sized cells (area / size^2) of an area graded from
+    `lc_min` on a boundary of length `perimeter` to `lc` over `growth_distance`.
+    """
+    if lc_min is None or lc_min >= lc:
+        return area / lc ** 2
+    band = min(area, perimeter * growth_distance)
+    # the integral of 1 / size(d)^2 over the band, size growing linearly with d
+    near = band / (lc_min * lc)
+    return near + (area - band) / lc ** 2
+
+
+def _triangulation(area, outer_length, glyph_perimeter, lc, lc_min, growth_distance, holes):
+    """
+    Nodes and triangles of a 2D domain, using Euler's formula with the
+    boundary nodes of the outer boundary and the glyph outlines.
+    """
+    boundary_nodes = outer_length / lc + glyph_perimeter / (lc_min or lc)
+    interior_nodes = _graded_density(area, glyph_perimeter, lc, lc_min, growth_distance) / _area_per_node  # noqa
+    nodes = interior_nodes + boundary_nodes
+    triangles = max(0.0, 2 * nodes - boundary_nodes - 2 + 2 * holes)
+    return nodes, triangles
+
+
+def estimate_mesh(
+    string,
+    font=None,
+    dim=2,
+    lc=0.1,
+    glyph_size=0.5,
+    pad_y_start=0.25,
+    pad_y_end=0.25,
+    pad_x_start=0.8,
+    pad_x_end=0.8,
+    glyph_offset=0.5,
+    dz_extrude=0.5,
+    pad_z=0.2,
+    lc_min=None,
+    lc_max=None,
+    growth_distance=None,
+    mode="tet",
+    num_layers=None,
+    recombine=False,
+    calibration=None,
+):
+    """
+    Estimates the node and element counts, build time and peak memory of a mesh without meshing.
+
+    The domain area / volume and the glyph perimeters are measured on the outlines. The element counts follow
+    from the node density of a mesh of size `lc` (graded from `lc_min` near the glyphs if given), and time and
+    memory from the element counts with the constants of `calibration`.
+
+    Parameters:
+    string (str): The string to be meshed.
+    font (Font): The font, a TTFont, OutlinePack, bundled font name or path. Defaults to `default_font`.
+    dim (int): 2 for `make_string_mesh`, 3 for `make_string_mesh3d`. Defaults to 2.
+    mode (str): The 3D mode, "tet" or "layered". Defaults to "tet".
+    calibration (Calibration): The cost model constants. Defaults to `default_calibration`.
+    The other parameters are the ones of `make_string_mesh` and `make_string_mesh3d`.
+
+    Returns:
+    MeshEstimate: The predicted nodes, elements, seconds and memory.
+    """
+    calibration = calibration or default_calibration
+    font = get_font(font)
+    font_key = font_hash(font)
+    glyphs, min_val, max_val = glyph_source(font)
+    scale = glyph_size / (max_val - min_val)
+    if lc_min is not None:
+        lc = lc_max if lc_max is not None else lc
+        if growth_distance is None:
+            growth_distance = glyph_size / 2
+
+    glyph_area = glyph_perimeter = 0.0
+    holes = 0
+    for char in string:
+        area, perimeter = outline_measures(char, glyphs, font_key)
+        glyph_area += area * scale ** 2
+        glyph_perimeter += perimeter * scale
+        holes += perimeter > 0
+    width = glyph_offset * len(string) + pad_x_start + pad_x_end
+    height = pad_y_start + glyph_size + pad_y_end
+    area = width * height - glyph_area
+    outer_length = 2 * (width + height)
+
+    if dim == 2:
+        nodes, elements = _triangulation(area, outer_length, glyph_perimeter, lc, lc_min, growth_distance, holes)  # noqa
+        if recombine:
+            elements /= 2  # two triangles per quadrangle
+        elements *= calibration.element_factor_2d
+        volume, boundary = area, outer_length + glyph_perimeter
+        seconds_per_element = calibration.seconds_per_element_2d
+        memory_per_element = calibration.memory_per_element_2d
+    elif dim == 3 and mode == "layered":
+        depth = 2 * pad_z + dz_extrude
+        section_nodes, section = _triangulation(area, outer_length, glyph_perimeter, lc, lc_min, growth_distance, holes)  # noqa
+        _, full_section = _triangulation(width * height, outer_length, glyph_perimeter, lc, lc_min, growth_distance, 0)  # noqa
+        if num_layers is None:
+            layers = [max(1, round(h / lc)) for h in (pad_z, dz_extrude, pad_z)]
+        else:
+            layers = [num_layers] * 3
+        elements = (layers[0] + layers[2]) * full_section + layers[1] * section
+        if recombine:
+            elements /= 2  # two triangles per quadrangle
+        elements *= calibration.element_factor_3d
+        nodes = section_nodes * (sum(layers) + 1)
+        volume = area * dz_extrude + width * height * 2 * pad_z
+        boundary = 2 * width * height + outer_length * depth + glyph_perimeter * dz_extrude
+        # extruding costs about as much per element as meshing the section
+        seconds_per_element = calibration.seconds_per_element_2d
+        memory_per_element = calibration.memory_per_element_3d
+    elif dim == 3:
+        depth = 2 * pad_z + dz_extrude
+        volume = width * height * depth - glyph_area * dz_extrude
+        glyph_surface = glyph_perimeter * dz_extrude + 2 * glyph_area
+        boundary = 2 * (width * height + width * depth + height * depth) + glyph_surface
+        if lc_min is not None and lc_min < lc:
+            band = min(volume, glyph_surface * growth_distance)
+            cells = band / (lc_min * lc ** 2) + (volume - band) / lc ** 3
+        else:
+            cells = volume / lc ** 3
+        elements = cells / _volume_per_tet * calibration.element_factor_3d
+        nodes = elements / _tets_per_node
+        seconds_per_element = calibration.seconds_per_element_3d
+        memory_per_element = calibration.memory_per_element_3d
+    else:
+        raise ValueError(f"dim must be 2 or 3, got {dim}")
+
+    seconds = (
+        calibration.base_seconds
+        + calibration.seconds_per_glyph * len(string)
+        + seconds_per_element * elements
+    )
+    memory = calibration.base_memory + memory_per_element * elements
+    return MeshEstimate(
+        int(round(nodes)), int(round(elements)), seconds, int(memory), lc, volume, boundary,
+    )
+
+
+def lc_for_budget(string, max_elements, font=None, dim=2, lc_range=(1e-4, 10.0), **kwargs):
+    """
+    Find the smallest element size whose estimated element count stays within `max_elements`.
+
+    Parameters:
+    string (str): The string to be meshed.
+    max_elements (int): The element budget.
+    font (Font): The font. Defaults to `default_font`.
+    dim (int): 2 or 3. Defaults to 2.
+    lc_range (tuple): The (smallest, largest) element size searched. Defaults to (1e-4, 10).
+    **kwargs: Further arguments of `estimate_mesh`, e.g. glyph_size or mode. With `lc_min`, the ratio
+        lc_min / lc is kept.
+
+    Returns:
+    MeshEstimate: The estimate of the chosen size, its `lc` field is the size.
+    """
+    ratio = kwargs.pop("lc_min", None)
+    base_lc = kwargs.pop("lc", None) or kwargs.get("lc_max") or 0.1
+    kwargs.pop("lc_max", None)
+    if ratio is not None:
+        ratio /= base_lc
+
+    def estimate(lc):
+        lc_min = lc * ratio if ratio is not None else None
+        return estimate_mesh(string, font, dim, lc=lc, lc_min=lc_min, **kwargs)
+
+    low, high = np.log(lc_range[0]), np.log(lc_range[1])
+    if estimate(lc_range[1]).elements > max_elements:
+        raise ValueError(f"Even lc={lc_range[1]} exceeds {max_elements} elements")  # noqa
+    # the element count decreases with lc, bisect in log space
+    for _ in range(60):
+        middle = (low + high) / 2
+        if estimate(math.exp(middle)).elements > max_elements:
+            low = middle
+        else:
+            high = middle
+    return estimate(math.exp(high))
+
+
+def calibrate(result_files, base=None):
+    """
+    Fit the cost model to results of `benchmarks/run_benchmarks.py`.
+
+    The element factors are the median ratio of measured to predicted
+    element counts, and the time constants a least-squares fit of the
+    total phase time against the number of glyphs and elements. Memory
+    constants are kept from `base`, the suite does not measure memory.
+
+    Parameters:
+    result_files (list): Paths of benchmark result JSON files.
+    base (Calibration): The calibration providing the constants that are not fitted.
+        Defaults to `default_calibration`.
+
+    Returns:
+    Calibration: The fitted constants.
+    """
+    base = base or default_calibration
+    rows = {2: [], 3: []}
+    for path in result_files:
+        with open(path) as f:
+            results = json.load(f)["results"]
+        for result in results:
+            case = result["case"]
+            string = case_string(case)
+            raw = estimate_mesh(
+                string, case["font"], case["dim"], lc=case["lc"],
+                calibration=base._replace(element_factor_2d=1.0, element_factor_3d=1.0),
+            )
+            rows[case["dim"]].append((
+                len(string), raw.elements, result["counts"]["elements"],
+                sum(result["phases"].values()),
+            ))
+
+    fitted = base._asdict()
+    for dim, data in rows.items():
+        if not data:
+            continue
+        data = np.array(data, dtype=float)
+        fitted[f"element_factor_{dim}d"] = float(np.median(data[:, 2] / np.maximum(data[:, 1], 1)))  # noqa
+        if len(data) >= 3:
+            design = np.column_stack([np.ones(len(data)), data[:, 0], data[:, 2]])
+            (base_seconds, per_glyph, per_element), *_ = np.linalg.lstsq(design, data[:, 3], rcond=None)  # noqa
+            fitted[f"seconds_per_element_{dim}d"] = max(float(per_element), 0.0)
+            if dim == 2:
+                fitted["base_seconds"] = max(float(base_seconds), 0.0)
+                fitted["seconds_per_glyph"] = max(float(per_glyph), 0.0)
+    return Calibration(**fitted)
+
+
+def case_string(case):
+    """
+    The string of a `benchmarks/run_benchmarks.py` case.
+    """
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    if case["chars"] == "repeated":
+        return "a" * case["length"]
+    return (alphabet * (case["length"] // len(alphabet) + 1))[:case["length"]]
+
+
+def save_calibration(calibration, path):
+    with open(path, "w") as f:
+        json.dump(calibration._asdict(), f, indent=1)
+
+
+def load_calibration(path):
+    with open(path) as f:
+        return Calibration(**json.load(f))
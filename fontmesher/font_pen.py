@@ -1,6 +1,40 @@
+from math import comb
+
 import numpy as np
 from fontTools.pens.basePen import BasePen
 
+curve_modes = ("bezier", "segments", "polyline", "spline")
+
+
+def flatten_bezier(control_points, tolerance):
+    """
+    Sample a Bézier curve so that the polyline through the samples stays
+    within `tolerance` of the curve.
+
+    The chord error of n uniform parameter steps is bounded by
+    d (d - 1) max|P[i] - 2 P[i+1] + P[i+2]| / (8 n^2) for a curve of degree d,
+    which gives the number of steps.
+
+    Args:
+        control_points (array): The (d + 1, 2) control points.
+        tolerance (float): The maximum distance between curve and polyline.
+    Returns:
+        ndarray: The interior sample points, shape (n - 1, 2), without the
+        end points of the curve.
+    """
+    ctrl = np.asarray(control_points, dtype=float)
+    degree = len(ctrl) - 1
+    if degree < 2:
+        return np.empty((0, 2))
+    second_diff = ctrl[2:] - 2 * ctrl[1:-1] + ctrl[:-2]
+    bound = degree * (degree - 1) * np.linalg.norm(second_diff, axis=1).max()
+    n = max(1, int(np.ceil(np.sqrt(bound / (8 * tolerance)))))
+    t = np.arange(1, n)[:, None] / n
+    i = np.arange(degree + 1)
+    binomials = np.array([comb(degree, k) for k in i], dtype=float)
+    basis = binomials * t ** i * (1 - t) ** (degree - i)
+    return basis @ ctrl
+
 
 class FontPen(BasePen):
     """
@@ -17,40 +51,77 @@ class FontPen(BasePen):
         max_val (float): The maximum value for normalizing points.
         glyph_size (float): The size of the glyph for normalization.
         lc (float): The characteristic length for mesh generation.
+        z (float): The z coordinate of the glyph plane.
+        offset (tuple): The (x, y) position of the glyph in the domain.
+        tol (float): The distance below which two points are merged.
         start_point (tuple): The starting point of the current path.
         points (list): A list of points in the current path.
         curves (list): A list of curves in the current path.
         curve_loops (list): A list of curve loops created.
         p_start: The starting point object in the geometry.
+        point_index (dict): The point tags of the glyph, keyed by
+            quantized coordinates.
+        curve_mode (str): How curves are added to the geometry:
+            "bezier" - a TrueType quadratic run as one high-degree Bézier (legacy),
+            "segments" - one exact quadratic or cubic Bézier per segment,
+            "polyline" / "spline" - each segment flattened within `tolerance`
+            into a polyline, or a spline through the samples.
+        tolerance (float): The flattening tolerance, defaults to lc / 20.
     Methods:
+        _transform(points):
+            Normalize points to [0, self.glyph_size] and move them to the
+            glyph offset, in one vectorized operation.
         _normalize_point(pt):
-            Normalize the point to the range [0, self.glyph_size].
-        _is_same_point(p1, p2):
-            Check if two points are approximately the same.
+            Transform a single point.
+        _get_point(pt):
+            Return the point tag at the given (transformed) coordinates,
+            adding the point to the geometry if it does not exist yet.
         _moveTo(pt):
             Move to the specified point, starting a new sub-path.
         _lineTo(pt):
             Draw a line to the specified point.
         qCurveTo(*points):
             Draw a quadratic Bézier curve to the specified points.
+        _qCurveToOne(pt1, pt2):
+            Draw one quadratic Bézier segment.
+        _curveToOne(pt1, pt2, pt3):
+            Draw one cubic Bézier segment (CFF / OTF outlines).
         _closePath():
             Close the current path, creating a curve loop.
         _endPath():
             End the current path.
     """
-    def __init__(self, geo, min_val=-1, max_val=1, glyph_size=1, lc=0.02, z=0):
+    def __init__(
+        self, geo, min_val=-1, max_val=1, glyph_size=1, lc=0.02, z=0,
+        offset=(0, 0), tol=1e-9, curve_mode="bezier", tolerance=None,
+    ):
+        super().__init__(glyphSet=None)
+        if curve_mode not in curve_modes:
+            raise ValueError(
+                f"Unknown curve mode {curve_mode!r}, expected one of {curve_modes}"  # noqa
+            )
         self.start_point = None
+        self.current_point = None
         self.path_start_idx = 0
         self.points = []
         self.curves = []
         self.curve_loops = []
         self.p_start = None
+        self.point_index = {}
 
         self.min_val = min_val
         self.max_val = max_val
         self.glyph_size = glyph_size
         self.lc = lc
         self.z = z
+        self.offset = offset
+        self.tol = tol
+        self.curve_mode = curve_mode
+        self.tolerance = tolerance if tolerance is not None else lc / 20
+
+        # pt -> pt * scale + shift, the normalization and the glyph offset
+        self.scale = glyph_size / (max_val - min_val)
+        self.shift = np.asarray(offset, dtype=float) - min_val * self.scale
 
         self.geo = geo
 
@@ -60,52 +131,99 @@ class FontPen(BasePen):
         self.curves = []
         self.curve_loops = []
         self.p_start = None
+        self.point_index = {}
 
-    def _normalize_point(self, pt):
+    def _transform(self, points):
         """
-        normalize the point to the range [0, self.glyph_size]
+        normalize the points to the range [0, self.glyph_size]
+        and move them to self.offset
         prerequisites: self.min_val, self.max_val is setup correctly
         """
-        scale_factor = 1 / self.glyph_size
-        return (
-            (pt[0] - self.min_val) / ((self.max_val - self.min_val) * scale_factor),  # noqa
-            (pt[1] - self.min_val) / ((self.max_val - self.min_val) * scale_factor),  # noqa
-        )
+        return np.asarray(points, dtype=float).reshape(-1, 2) * self.scale + self.shift  # noqa
 
-    def _is_same_point(self, p1, p2):
-        return np.allclose(p1, p2)
+    def _normalize_point(self, pt):
+        return tuple(self._transform(pt)[0])
+
+    def _get_point(self, pt):
+        key = (round(pt[0] / self.tol), round(pt[1] / self.tol))
+        p = self.point_index.get(key)
+        if p is None:
+            p = self.geo.addPoint(pt[0], pt[1], self.z, self.lc)
+            self.point_index[key] = p
+        return p
 
     def _moveTo(self, pt):
         pt = self._normalize_point(pt)
-        p = self.geo.addPoint(pt[0], pt[1], self.z, self.lc)
+        p = self._get_point(pt)
         self.p_start = p
         self.points.append(p)
         self.start_point = pt
+        self.current_point = pt
 
     def _lineTo(self, pt):
         pt = self._normalize_point(pt)
         prev_p = self.points[-1]
-        if self._is_same_point(pt, self.start_point):
-            p = self.p_start
-        else:
-            p = self.geo.addPoint(pt[0], pt[1], self.z, self.lc)
+        p = self._get_point(pt)
+        if p == prev_p:
+            return  # zero-length segment
         self.points.append(p)
+        self.current_point = pt
         curve = self.geo.addLine(prev_p, p)
         self.curves.append(curve)
 
     def qCurveTo(self, *points):
+        if self.curve_mode != "bezier":
+            # split the run into quadratic segments at the implied on-curve
+            # points, see _qCurveToOne
+            return super().qCurveTo(*points)
         curve_points = [self.points[-1]]
-        for i in range(len(points)):
-            pt = self._normalize_point(points[i])
-            if self._is_same_point(pt, self.start_point):
-                p = self.p_start
-            else:
-                p = self.geo.addPoint(pt[0], pt[1], self.z, self.lc)
-            curve_points.append(p)
+        for pt in self._transform(points):
+            curve_points.append(self._get_point(pt))
+        if len(set(curve_points)) == 1:
+            return  # degenerate curve
         self.points.append(curve_points[-1])
+        self.current_point = tuple(self._transform(points[-1])[0])
         curve = self.geo.addBezier(curve_points)
         self.curves.append(curve)
 
+    def _qCurveToOne(self, pt1, pt2):
+        self._add_curve_segment((pt1, pt2))
+
+    def _curveToOne(self, pt1, pt2, pt3):
+        self._add_curve_segment((pt1, pt2, pt3))
+
+    def _add_curve_segment(self, points):
+        """
+        Add one Bézier segment from the current point, exactly or flattened
+        depending on self.curve_mode.
+        """
+        ctrl = self._transform(points)
+        prev_p = self.points[-1]
+        p = self._get_point(ctrl[-1])
+        if self.curve_mode in ("bezier", "segments"):
+            curve_points = [prev_p] + [self._get_point(pt) for pt in ctrl[:-1]] + [p]  # noqa
+            if len(set(curve_points)) == 1:
+                return  # degenerate curve
+            curve = self.geo.addBezier(curve_points)
+        else:
+            samples = flatten_bezier(
+                np.vstack([self.current_point, ctrl]), self.tolerance
+            )
+            if p == prev_p and not len(samples):
+                return  # degenerate curve
+            curve_points = [prev_p] + [
+                self.geo.addPoint(x, y, self.z, self.lc) for x, y in samples
+            ] + [p]
+            if len(curve_points) == 2:
+                curve = self.geo.addLine(prev_p, p)
+            elif self.curve_mode == "polyline":
+                curve = self.geo.addPolyline(curve_points)
+            else:
+                curve = self.geo.addSpline(curve_points)
+        self.points.append(p)
+        self.current_point = tuple(ctrl[-1])
+        self.curves.append(curve)
+
     def _closePath(self):
         # check is path integrity - if not, close the path
         if self.points[self.path_start_idx] != self.points[-1]:
@@ -1,16 +1,30 @@
-import os
-import gmsh
+import logging
 
+from fontmesher.cache import cacheable
 from fontmesher.font_pen import FontPen
-from fontmesher import default_font
-from fontmesher.utils import get_font_boundaries
+from fontmesher.fonts import get_font
+from fontmesher.glyphs import glyph_source
+from fontmesher.mesh_io import output_mesh
+from fontmesher.options import (
+    apply_mesh_options,
+    apply_recombination,
+    partition_mesh,
+    start_model,
+)
+from fontmesher.profiling import PhaseTimer, make_result
+from fontmesher.sizing import apply_distance_sizing
 
-from fontTools.pens.recordingPen import RecordingPen
+logger = logging.getLogger(__name__)
 
+# the physical tag of the `curves_of_<char>` group of the glyph at index 0;
+# gmsh tags are 32-bit, this is the tag int(1e10) always ended up as
+glyph_curves_tag = 1410065408
 
+
+@cacheable("2d", "")
 def make_string_mesh(
     string,
-    font=default_font,
+    font=None,
     save_dir=".",
     lc=0.1,
     glyph_size=0.5,
@@ -20,13 +34,36 @@ def make_string_mesh(
     pad_x_end=0.8,
     glyph_offset=0.5,
     extrude=False,
+    write=True,
+    return_data=False,
+    filename=None,
+    file_format=None,
+    binary=False,
+    compress=False,
+    file=None,
+    lc_min=None,
+    lc_max=None,
+    growth_distance=None,
+    num_threads=None,
+    algorithm_2d=None,
+    algorithm_3d=None,
+    profile=None,
+    return_result=False,
+    curve_mode="bezier",
+    curve_tolerance=None,
+    cache=None,
+    partitions=None,
+    recombine=False,
+    recombination_algorithm=None,
+    transfinite_far_field=False,
 ):
     """
     Generates a mesh for a given string using a specified font and saves it to a file.
 
     Parameters:
     string (str): The string to be meshed.
-    font (Font): The font to be used for generating the mesh. Defaults to `default_font`.
+    font (Font): The font to be used for generating the mesh, either a TTFont or a bundled font name / font path.
+        Defaults to `default_font`.
     save_dir (str): The directory where the mesh file will be saved. Defaults to the current directory.
     lc (float): The characteristic length for the mesh elements. Defaults to 0.02.
     glyph_size (float): The size of each glyph in the mesh. Defaults to 0.5.
@@ -35,13 +72,146 @@ def make_string_mesh(
     pad_x_start (float): The padding at the start of the x-axis. Defaults to 0.8.
     pad_x_end (float): The padding at the end of the x-axis. Defaults to 0.8.
     glyph_offset (float): The offset between consecutive glyphs in the mesh. Defaults to 0.5.
+    write (bool): Whether to write the mesh file to `save_dir`. Defaults to True.
+    return_data (bool): Whether to return the mesh as NumPy arrays instead of the file path. Defaults to False.
+    filename (str): The name of the mesh file in `save_dir`. Defaults to the string with path separators replaced.
+    file_format (str): "msh", "msh2", "vtk", "med", "vtu" or "xdmf". Defaults to a guess from `filename`, else "msh".
+    binary (bool): Write MSH / VTK files in binary. Defaults to False.
+    compress (bool): Compress the mesh file (gzip, or zlib blocks for VTU). Defaults to False.
+    file (file object): A binary file object or buffer to write the mesh to instead of `save_dir`. Defaults to None.
+    lc_min (float): If given, grade the element size with the distance to the glyphs, from `lc_min` on the glyph
+        outlines to `lc_max` in the far field. Defaults to None (uniform `lc`).
+    lc_max (float): The far-field element size of the graded sizing. Defaults to `lc`.
+    growth_distance (float): The distance over which the size grows from `lc_min` to `lc_max`.
+        Defaults to `glyph_size` / 2.
+    num_threads (int): The number of threads gmsh may use, 0 for all CPUs. Defaults to None, gmsh's current setting
+        (one thread unless set before).
+    algorithm_2d (str or int): The 2D meshing algorithm, see `fontmesher.options.algorithms_2d`.
+        Defaults to None, gmsh's current setting (Frontal-Delaunay unless set before).
+    algorithm_3d (str or int): The 3D meshing algorithm, see `fontmesher.options.algorithms_3d`.
+        Defaults to None, gmsh's current setting (Delaunay unless set before). "hxt" meshes in parallel.
+    profile (callable): Called as profile(phase, seconds) after every phase of the build. Defaults to None.
+    return_result (bool): Whether to return a MeshResult with the path / data, the time of every phase,
+        entity and element counts and peak memory. Defaults to False.
+    curve_mode (str): How glyph curves enter the geometry: "bezier" (one Bézier per TrueType quadratic run),
+        "segments" (one exact quadratic / cubic Bézier per segment), "polyline" or "spline" (segments flattened
+        within `curve_tolerance`). Cubic CFF / OTF outlines are supported in every mode. Defaults to "bezier".
+    curve_tolerance (float): The flattening tolerance of the "polyline" and "spline" modes. Defaults to `lc` / 20.
+    cache (bool, str or MeshCache): Look the mesh up in a content-addressed on-disk cache first, and store it on
+        a miss: True for the default cache, a cache directory, or a `fontmesher.cache.MeshCache`. Defaults to None.
+    partitions (int): Partition the mesh with gmsh's partitioner and write one MSH file per partition, "<name>_1.msh"
+        to "<name>_<N>.msh", each with its ghost cells, the partition interfaces and the physical groups. The path
+        returned is then the list of the files. Defaults to None, a single file.
+    recombine (bool): Recombine the triangles into quadrangles, for a quad-dominant mesh with about half as many
+        elements. `algorithm_2d` then defaults to "frontal-delaunay-quads". Defaults to False.
+    recombination_algorithm (str or int): The recombination algorithm, see
+        `fontmesher.options.recombination_algorithms`, "blossom-full-quad" for quadrangles only (subdivided,
+        see `fontmesher.options.apply_recombination`).
+        Defaults to None, gmsh's current setting (Blossom unless set before).
+    transfinite_far_field (bool): Mesh the rectangular regions before and after the glyphs with a structured
+        (transfinite) grid, of quadrangles with `recombine`. The physical groups are unchanged. Defaults to False.
+
+    Returns:
+    str: The path to the saved mesh file (None if `write` is False, a list with `partitions`), or
+    MeshData: the nodes, element connectivity and physical groups of the mesh if `return_data` is True, or
+    MeshResult: the output and metrics of the build if `return_result` is True.
+    """
+    import gmsh
+
+    timer = PhaseTimer(profile, return_result)
+    with timer.phase("font_load"):
+        font = get_font(font)
+    if lc_min is not None:
+        # graded sizing: every point gets the far-field size and a distance
+        # field refines the mesh around the glyphs
+        lc = lc_max if lc_max is not None else lc
+        if growth_distance is None:
+            growth_distance = glyph_size / 2
+    with timer.phase("boundaries"):
+        # outlines are decoded once per unique character and replayed after
+        glyphs, min_val, max_val = glyph_source(font)
+
+    with timer.phase("geometry"):
+        start_model("font_mesh")
+
+        groups = build_string_geometry(
+            string, glyphs, min_val, max_val,
+            lc=lc,
+            glyph_size=glyph_size,
+            pad_y_start=pad_y_start,
+            pad_y_end=pad_y_end,
+            pad_x_start=pad_x_start,
+            pad_x_end=pad_x_end,
+            glyph_offset=glyph_offset,
+            curve_mode=curve_mode,
+            curve_tolerance=curve_tolerance,
+            transfinite_far_field=transfinite_far_field,
+        )
+
+    with timer.phase("synchronize"):
+        gmsh.model.geo.synchronize()
+    with timer.phase("generate"):
+        if lc_min is not None:
+            apply_distance_sizing(1, groups["object"], lc_min, lc, growth_distance)
+        previous = {}
+        if recombine:
+            previous = apply_recombination(groups["domain"], recombination_algorithm, algorithm_2d)  # noqa
+        try:
+            apply_mesh_options(num_threads, algorithm_2d, algorithm_3d)
+            gmsh.model.mesh.generate(2) if not extrude else gmsh.model.mesh.generate(3)
+        finally:
+            for name, value in previous.items():
+                gmsh.option.setNumber(name, value)
+    if partitions is not None:
+        with timer.phase("partition"):
+            partition_mesh(partitions)
+    with timer.phase("write"):
+        output = output_mesh(
+            string, "", save_dir, write, return_data,
+            filename, file_format, binary, compress, file, partitions,
+        )
+    logger.debug(
+        "meshed %r in %.1f ms", string, sum(timer.timings.values()) * 1e3
+    )
+    if return_result:
+        return make_result(output, timer)
+    return output
+
+
+def build_string_geometry(
+    string,
+    glyphs,
+    min_val,
+    max_val,
+    lc=0.1,
+    glyph_size=0.5,
+    pad_y_start=0.25,
+    pad_y_end=0.25,
+    pad_x_start=0.8,
+    pad_x_end=0.8,
+    glyph_offset=0.5,
+    curve_mode="bezier",
+    curve_tolerance=None,
+    transfinite_far_field=False,
+):
+    """
+    Adds the 2D geometry of a string (the domain with one hole per glyph) and its physical groups
+    to the current gmsh model, using the built-in geometry kernel. The model is not synchronized.
+    With `transfinite_far_field`, the domain is split into a glyph region and two rectangular
+    far-field blocks before and after the glyphs, which get a structured (transfinite) mesh.
+
+    Parameters:
+    string (str): The string to be meshed.
+    glyphs (GlyphCache): The glyph outlines of the font.
+    min_val (float): The minimum value for normalizing glyph points, see `get_font_boundaries`.
+    max_val (float): The maximum value for normalizing glyph points.
+    The other parameters are the ones of `make_string_mesh`.
 
     Returns:
-    str: The path to the saved mesh file.
+    dict: The entity tags of the physical groups, keyed by "wall", "inflow", "outflow", "object" (curves)
+    and "domain" (surfaces).
     """
-    cmap = font.getBestCmap()
-    glyphSet = font.getGlyphSet()
-    min_val, max_val = get_font_boundaries(font)
+    import gmsh
 
     num_glyphs = len(string)
 
@@ -50,8 +220,17 @@ def make_string_mesh(
     domain_y_start = 0
     domain_y_end = pad_y_start + glyph_size + pad_y_end
 
-    gmsh.initialize()
-    gmsh.model.add("font_mesh")
+    if transfinite_far_field:
+        glyphs_end = pad_x_start + max(num_glyphs - 1, 0) * glyph_offset + glyph_size
+        if pad_x_start <= 0 or glyphs_end >= domain_x_end:
+            raise ValueError("transfinite_far_field needs room before and after the glyphs, increase pad_x_start / pad_x_end")  # noqa
+        # the blocks end halfway between the domain ends and the glyphs
+        xs = [domain_x_start, pad_x_start / 2, (glyphs_end + domain_x_end) / 2, domain_x_end]  # noqa
+        return _build_blocked_geometry(
+            string, glyphs, min_val, max_val, xs, domain_y_start, domain_y_end,
+            lc, glyph_size, pad_x_start, pad_y_start, glyph_offset,
+            curve_mode, curve_tolerance,
+        )
 
     # Initialise Domain
     p1 = gmsh.model.geo.addPoint(domain_x_start, domain_y_start, 0, lc)
@@ -66,26 +245,13 @@ def make_string_mesh(
 
     domain_curves = [l1, l2, l3, l4]
 
-    object_surface_loop = []
-    object_curves = []
-    for i in range(len(string)):
-        pen = FontPen(
-            geo=gmsh.model.geo,
-            min_val=min_val,
-            max_val=max_val,
-            glyph_size=glyph_size,
-            lc=lc
-        )
-        # r_pen = RecordingPen()
-        glyph = string[i]
-        g = glyphSet[cmap[ord(glyph)]]
-        g.draw(pen)
-        curves = pen.curves
-        object_curves.extend(curves)
-        gmsh.model.geo.translate([(1, curv) for curv in curves], i*glyph_offset + pad_x_start, pad_y_start, 0)  # noqa
-        surface_loop = gmsh.model.geo.add_curve_loop(curves)
-        gmsh.model.geo.addPhysicalGroup(1, curves, i + int(1e10), name=f"curves_of_{glyph}")
-        object_surface_loop.append(surface_loop)
+    placements = [
+        (i, string[i], (i*glyph_offset + pad_x_start, pad_y_start))
+        for i in range(num_glyphs)
+    ]
+    object_curves, object_surface_loop = add_glyphs(
+        placements, glyphs, min_val, max_val, lc, glyph_size, curve_mode, curve_tolerance
+    )
 
     domain_surface_loop = gmsh.model.geo.add_curve_loop(domain_curves)
 
@@ -97,11 +263,134 @@ def make_string_mesh(
     gmsh.model.geo.addPhysicalGroup(1, object_curves, 4, name="object")                     # noqa object
     gmsh.model.geo.addPhysicalGroup(2, [whole_surface], 9, name="whole_domain")             # noqa whole domain surface
 
-    gmsh.model.geo.synchronize()
-    gmsh.model.mesh.generate(2) if not extrude else gmsh.model.mesh.generate(3)
-    save_path = os.path.join(
-        save_dir, f"{string}.msh"
+    return {
+        "wall": [l1, l3],
+        "inflow": [l4],
+        "outflow": [l2],
+        "object": object_curves,
+        "domain": [whole_surface],
+    }
+
+
+def _build_blocked_geometry(
+    string,
+    glyphs,
+    min_val,
+    max_val,
+    xs,
+    y_start,
+    y_end,
+    lc,
+    glyph_size,
+    pad_x_start,
+    pad_y_start,
+    glyph_offset,
+    curve_mode,
+    curve_tolerance,
+):
+    """
+    The geometry of `build_string_geometry` with the domain split at `xs` into
+    a transfinite block, the glyph region and another transfinite block. The
+    physical groups are the same, made of several curves / surfaces.
+    """
+    import gmsh
+
+    geo = gmsh.model.geo
+    bottom = [geo.addPoint(x, y_start, 0, lc) for x in xs]
+    top = [geo.addPoint(x, y_end, 0, lc) for x in xs]
+    bottom_lines = [geo.addLine(a, b) for a, b in zip(bottom[:-1], bottom[1:])]
+    top_lines = [geo.addLine(b, a) for a, b in zip(top[:-1], top[1:])]
+    inflow = geo.addLine(top[0], bottom[0])
+    cuts = [geo.addLine(b, t) for b, t in zip(bottom[1:-1], top[1:-1])]
+    outflow = geo.addLine(bottom[-1], top[-1])
+    # the vertical edges from bottom to top
+    verticals = [-inflow] + cuts + [outflow]
+
+    placements = [
+        (i, string[i], (i*glyph_offset + pad_x_start, pad_y_start))
+        for i in range(len(string))
+    ]
+    object_curves, object_surface_loop = add_glyphs(
+        placements, glyphs, min_val, max_val, lc, glyph_size, curve_mode, curve_tolerance
     )
-    gmsh.write(save_path)
-    print(f"Mesh saved to {save_path}")
-    return save_path
+
+    nodes_y = max(2, round((y_end - y_start) / lc) + 1)
+    for curve in verticals:
+        geo.mesh.setTransfiniteCurve(abs(curve), nodes_y)
+    surfaces = []
+    for k in range(len(xs) - 1):
+        loop = geo.add_curve_loop([bottom_lines[k], verticals[k + 1], top_lines[k], -verticals[k]])  # noqa
+        if k == 1:
+            surfaces.append(geo.add_plane_surface([loop] + object_surface_loop))
+            continue
+        nodes_x = max(2, round((xs[k + 1] - xs[k]) / lc) + 1)
+        geo.mesh.setTransfiniteCurve(bottom_lines[k], nodes_x)
+        geo.mesh.setTransfiniteCurve(top_lines[k], nodes_x)
+        surface = geo.add_plane_surface([loop])
+        geo.mesh.setTransfiniteSurface(surface)
+        surfaces.append(surface)
+
+    walls = bottom_lines + top_lines
+    geo.addPhysicalGroup(1, walls, 1, name="wall")
+    geo.addPhysicalGroup(1, [inflow], 2, name="inflow")
+    geo.addPhysicalGroup(1, [outflow], 3, name="outflow")
+    geo.addPhysicalGroup(1, object_curves, 4, name="object")
+    geo.addPhysicalGroup(2, surfaces, 9, name="whole_domain")
+
+    return {
+        "wall": walls,
+        "inflow": [inflow],
+        "outflow": [outflow],
+        "object": object_curves,
+        "domain": surfaces,
+        "far_field": [surfaces[0], surfaces[2]],
+    }
+
+
+def add_glyphs(
+    placements,
+    glyphs,
+    min_val,
+    max_val,
+    lc=0.1,
+    glyph_size=0.5,
+    curve_mode="bezier",
+    curve_tolerance=None,
+):
+    """
+    Adds the outlines of placed glyphs to the current gmsh model, with a
+    `curves_of_<char>` physical group per glyph. Blank glyphs are skipped.
+
+    Parameters:
+    placements (iterable): The (index, char, (x, y)) of every glyph, the index is used for the
+        physical tag of the glyph and (x, y) is its offset in the domain.
+    glyphs (GlyphCache): The glyph outlines of the font.
+    The other parameters are the ones of `build_string_geometry`.
+
+    Returns:
+    tuple: The curve tags of all outlines and the curve loop tags of the glyphs.
+    """
+    import gmsh
+
+    object_curves = []
+    object_surface_loop = []
+    for i, glyph, offset in placements:
+        pen = FontPen(
+            geo=gmsh.model.geo,
+            min_val=min_val,
+            max_val=max_val,
+            glyph_size=glyph_size,
+            lc=lc,
+            offset=offset,
+            curve_mode=curve_mode,
+            tolerance=curve_tolerance,
+        )
+        glyphs.draw(glyph, pen)
+        curves = pen.curves
+        if not curves:
+            continue  # blank glyph, e.g. a space
+        object_curves.extend(curves)
+        surface_loop = gmsh.model.geo.add_curve_loop(curves)
+        gmsh.model.geo.addPhysicalGroup(1, curves, glyph_curves_tag + i, name=f"curves_of_{glyph}")
+        object_surface_loop.append(surface_loop)
+    return object_curves, object_surface_loop
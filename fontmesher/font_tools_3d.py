@@ -1,16 +1,21 @@
-import os
-import gmsh
+import logging
 
+from fontmesher.cache import cacheable
 from fontmesher.font_pen import FontPen
-from fontmesher import default_font
-from fontmesher.utils import get_font_boundaries
+from fontmesher.fonts import get_font
+from fontmesher.glyphs import glyph_source
+from fontmesher.mesh_io import output_mesh
+from fontmesher.options import apply_mesh_options, partition_mesh, start_model
+from fontmesher.profiling import PhaseTimer, make_result
+from fontmesher.sizing import apply_distance_sizing
 
-from fontTools.pens.recordingPen import RecordingPen
+logger = logging.getLogger(__name__)
 
 
+@cacheable("3d", "_3d")
 def make_string_mesh3d(
     string,
-    font=default_font,
+    font=None,
     save_dir=".",
     lc=0.1,
     glyph_size=0.5,
@@ -21,13 +26,37 @@ def make_string_mesh3d(
     glyph_offset=0.5,
     dz_extrude=0.5,
     pad_z=0.2,
+    write=True,
+    return_data=False,
+    filename=None,
+    file_format=None,
+    binary=False,
+    compress=False,
+    file=None,
+    lc_min=None,
+    lc_max=None,
+    growth_distance=None,
+    num_threads=None,
+    algorithm_2d=None,
+    algorithm_3d=None,
+    profile=None,
+    return_result=False,
+    curve_mode="bezier",
+    curve_tolerance=None,
+    mode="tet",
+    num_layers=None,
+    recombine=False,
+    through_holes=False,
+    cache=None,
+    partitions=None,
 ):
     """
     Generates a mesh for a given string using a specified font and saves it to a file.
 
     Parameters:
     string (str): The string to be meshed.
-    font (Font): The font to be used for generating the mesh. Defaults to `default_font`.
+    font (Font): The font to be used for generating the mesh, either a TTFont or a bundled font name / font path.
+        Defaults to `default_font`.
     save_dir (str): The directory where the mesh file will be saved. Defaults to the current directory.
     lc (float): The characteristic length for the mesh elements. Defaults to 0.02.
     glyph_size (float): The size of each glyph in the mesh. Defaults to 0.5.
@@ -36,13 +65,153 @@ def make_string_mesh3d(
     pad_x_start (float): The padding at the start of the x-axis. Defaults to 0.8.
     pad_x_end (float): The padding at the end of the x-axis. Defaults to 0.8.
     glyph_offset (float): The offset between consecutive glyphs in the mesh. Defaults to 0.5.
+    write (bool): Whether to write the mesh file to `save_dir`. Defaults to True.
+    return_data (bool): Whether to return the mesh as NumPy arrays instead of the file path. Defaults to False.
+    filename (str): The name of the mesh file in `save_dir`. Defaults to the string with path separators replaced.
+    file_format (str): "msh", "msh2", "vtk", "med", "vtu" or "xdmf". Defaults to a guess from `filename`, else "msh".
+    binary (bool): Write MSH / VTK files in binary. Defaults to False.
+    compress (bool): Compress the mesh file (gzip, or zlib blocks for VTU). Defaults to False.
+    file (file object): A binary file object or buffer to write the mesh to instead of `save_dir`. Defaults to None.
+    lc_min (float): If given, grade the element size with the distance to the glyphs, from `lc_min` on the glyph
+        outlines to `lc_max` in the far field. Defaults to None (uniform `lc`).
+    lc_max (float): The far-field element size of the graded sizing. Defaults to `lc`.
+    growth_distance (float): The distance over which the size grows from `lc_min` to `lc_max`.
+        Defaults to `glyph_size` / 2.
+    num_threads (int): The number of threads gmsh may use, 0 for all CPUs. Defaults to None, gmsh's current setting
+        (one thread unless set before).
+    algorithm_2d (str or int): The 2D meshing algorithm, see `fontmesher.options.algorithms_2d`.
+        Defaults to None, gmsh's current setting (Frontal-Delaunay unless set before).
+    algorithm_3d (str or int): The 3D meshing algorithm, see `fontmesher.options.algorithms_3d`.
+        Defaults to None, gmsh's current setting (Delaunay unless set before). "hxt" meshes in parallel.
+    profile (callable): Called as profile(phase, seconds) after every phase of the build. Defaults to None.
+    return_result (bool): Whether to return a MeshResult with the path / data, the time of every phase,
+        entity and element counts and peak memory. Defaults to False.
+    curve_mode (str): How glyph curves enter the geometry: "bezier" (one Bézier per TrueType quadratic run),
+        "segments" (one exact quadratic / cubic Bézier per segment), "polyline" or "spline" (segments flattened
+        within `curve_tolerance`). Cubic CFF / OTF outlines are supported in every mode. Defaults to "bezier".
+    curve_tolerance (float): The flattening tolerance of the "polyline" and "spline" modes. Defaults to `lc` / 20.
+    cache (bool, str or MeshCache): Look the mesh up in a content-addressed on-disk cache first, and store it on
+        a miss: True for the default cache, a cache directory, or a `fontmesher.cache.MeshCache`. Defaults to None.
+    partitions (int): Partition the mesh with gmsh's partitioner and write one MSH file per partition, "<name>_1.msh"
+        to "<name>_<N>.msh", each with its ghost cells, the partition interfaces and the physical groups. The path
+        returned is then the list of the files. Defaults to None, a single file.
+    mode (str): "tet" for a tetrahedral mesh, or "layered" to extrude the meshed 2D cross-section along z in
+        structured layers (prisms, or hexahedra with `recombine`). Defaults to "tet".
+    num_layers (int or list): The layers of the "layered" mode per z segment ([pad_z, dz_extrude, pad_z], or the
+        full height with `through_holes`), an int for every segment or a list with one value per segment.
+        Defaults to the segment heights divided by `lc`.
+    recombine (bool): Recombine the cross-section and the layers into hexahedra in the "layered" mode.
+        Defaults to False.
+    through_holes (bool): Let the glyph voids of the "layered" mode go through the full height. Defaults to False.
 
     Returns:
-    str: The path to the saved mesh file.
+    str: The path to the saved mesh file (None if `write` is False, a list with `partitions`), or
+    MeshData: the nodes, element connectivity and physical groups of the mesh if `return_data` is True, or
+    MeshResult: the output and metrics of the build if `return_result` is True.
     """
-    cmap = font.getBestCmap()
-    glyphSet = font.getGlyphSet()
-    min_val, max_val = get_font_boundaries(font)
+    import gmsh
+
+    timer = PhaseTimer(profile, return_result)
+    with timer.phase("font_load"):
+        font = get_font(font)
+    if lc_min is not None:
+        # graded sizing: every point gets the far-field size and a distance
+        # field refines the mesh around the glyphs
+        lc = lc_max if lc_max is not None else lc
+        if growth_distance is None:
+            growth_distance = glyph_size / 2
+    with timer.phase("boundaries"):
+        # outlines are decoded once per unique character and replayed after
+        glyphs, min_val, max_val = glyph_source(font)
+
+    with timer.phase("geometry"):
+        start_model("font_mesh")
+
+        geometry_kwargs = dict(
+            lc=lc,
+            glyph_size=glyph_size,
+            pad_y_start=pad_y_start,
+            pad_y_end=pad_y_end,
+            pad_x_start=pad_x_start,
+            pad_x_end=pad_x_end,
+            glyph_offset=glyph_offset,
+            dz_extrude=dz_extrude,
+            pad_z=pad_z,
+            curve_mode=curve_mode,
+            curve_tolerance=curve_tolerance,
+        )
+        if mode == "tet":
+            groups = build_string_geometry3d(string, glyphs, min_val, max_val, **geometry_kwargs)  # noqa
+        elif mode == "layered":
+            groups = build_string_geometry_layered(
+                string, glyphs, min_val, max_val,
+                num_layers=num_layers,
+                recombine=recombine,
+                through_holes=through_holes,
+                **geometry_kwargs,
+            )
+        else:
+            raise ValueError(f"Unknown mode {mode!r}, expected 'tet' or 'layered'")
+
+    with timer.phase("synchronize"):
+        gmsh.model.geo.synchronize()
+    with timer.phase("generate"):
+        if lc_min is not None and mode == "layered":
+            # the cross-section is meshed in 2D, measure from the outlines
+            apply_distance_sizing(1, groups["object_curves"], lc_min, lc, growth_distance)  # noqa
+        elif lc_min is not None:
+            apply_distance_sizing(2, groups["object"], lc_min, lc, growth_distance)
+        apply_mesh_options(num_threads, algorithm_2d, algorithm_3d)
+        gmsh.model.mesh.generate(3)
+    if partitions is not None:
+        with timer.phase("partition"):
+            partition_mesh(partitions)
+    with timer.phase("write"):
+        output = output_mesh(
+            string, "_3d", save_dir, write, return_data,
+            filename, file_format, binary, compress, file, partitions,
+        )
+    logger.debug(
+        "meshed %r in %.1f ms", string, sum(timer.timings.values()) * 1e3
+    )
+    if return_result:
+        return make_result(output, timer)
+    return output
+
+
+def build_string_geometry3d(
+    string,
+    glyphs,
+    min_val,
+    max_val,
+    lc=0.1,
+    glyph_size=0.5,
+    pad_y_start=0.25,
+    pad_y_end=0.25,
+    pad_x_start=0.8,
+    pad_x_end=0.8,
+    glyph_offset=0.5,
+    dz_extrude=0.5,
+    pad_z=0.2,
+    curve_mode="bezier",
+    curve_tolerance=None,
+):
+    """
+    Adds the 3D geometry of a string (the channel volume with one extruded void per glyph) and its
+    physical groups to the current gmsh model, using the built-in geometry kernel.
+
+    Parameters:
+    string (str): The string to be meshed.
+    glyphs (GlyphCache): The glyph outlines of the font.
+    min_val (float): The minimum value for normalizing glyph points, see `get_font_boundaries`.
+    max_val (float): The maximum value for normalizing glyph points.
+    The other parameters are the ones of `make_string_mesh3d`.
+
+    Returns:
+    dict: The entity tags of the physical groups, keyed by "wall", "inflow", "outflow", "object" (surfaces)
+    and "domain" (volumes).
+    """
+    import gmsh
 
     num_glyphs = len(string)
 
@@ -62,9 +231,6 @@ def make_string_mesh3d(
 
     outter_surface_list = []
 
-    gmsh.initialize()
-    gmsh.model.add("font_mesh")
-
     # Initialise Domain
     p1 = gmsh.model.geo.addPoint(domain_x_start, domain_y_start, 0, lc)
     p2 = gmsh.model.geo.addPoint(domain_x_end, domain_y_start, 0, lc)
@@ -81,32 +247,20 @@ def make_string_mesh3d(
     domain_surface = gmsh.model.geo.add_plane_surface([domain_surface_loop])
     domain_surface_extruded = gmsh.model.geo.extrude([[2, domain_surface]], 0, 0, domain_z_end)
 
-    gmsh.model.geo.synchronize()
+    logger.debug("domain_surface_extruded %s", domain_surface_extruded)
+    logger.debug("original surface %s", domain_surface)
 
-    print("domain_surface_extruded", domain_surface_extruded)
-    print("original surface", domain_surface)
-
-    for elem in domain_surface_extruded:
-        tag, id = elem
-        if tag == 3:
-            gmsh.model.geo.remove([(tag, id)])
-        else:
-            box = gmsh.model.get_bounding_box(2, id)
-            xmin, ymin, zmin, xmax, ymax, zmax = box
-            if xmin == xmax:  # inlet or outlet
-                if xmin == domain_x_start:
-                    inflow_list.append(id)
-                elif xmin == domain_x_end:
-                    outflow_list.append(id)
-            else:
-                wall_list.append(id)
+    # the lateral surfaces come in the order of the domain curves, so the
+    # boundaries are known without synchronizing to query bounding boxes
+    [(domain_top, domain_volume, domain_laterals)] = split_extruded(domain_surface_extruded)  # noqa
+    lateral_l1, lateral_l2, lateral_l3, lateral_l4 = domain_laterals
+    wall_list.extend([lateral_l1, lateral_l3, domain_top])
+    outflow_list.append(lateral_l2)
+    inflow_list.append(lateral_l4)
     wall_list.append(domain_surface)
-        
-    print(domain_surface_extruded)
 
-    object_surface_list = []
-    object_curves = []
-    object_surface_loop_list = []
+    # build every glyph plane surface first ...
+    glyph_surfaces = []
     for i in range(len(string)):
         pen = FontPen(
             geo=gmsh.model.geo,
@@ -115,35 +269,40 @@ def make_string_mesh3d(
             glyph_size=glyph_size,
             lc=lc,
             z=pad_z,
+            offset=(i*glyph_offset + pad_x_start, pad_y_start),
+            curve_mode=curve_mode,
+            tolerance=curve_tolerance,
         )
 
         glyph = string[i]
-        g = glyphSet[cmap[ord(glyph)]]
-        g.draw(pen)
+        glyphs.draw(glyph, pen)
 
         curves = pen.curves
-        object_curves.extend(curves)
-        gmsh.model.geo.translate([(1, curv) for curv in curves], i*glyph_offset + pad_x_start, pad_y_start, 0)  # noqa
+        if not curves:
+            continue  # blank glyph, e.g. a space
         surface_loop = gmsh.model.geo.add_curve_loop(curves)
-        surface = gmsh.model.geo.add_plane_surface([surface_loop])
-        surface_extruded = gmsh.model.geo.extrude([[2, surface]], 0, 0, dz_extrude)
-        gmsh.model.geo.synchronize()
-        surface_list = []
-        for elem in surface_extruded:
-            tag, id = elem
-            if tag == 3:
-                gmsh.model.geo.remove([(tag, id)])
-            else:
-                surface_list.append(id)
-        surface_list.append(surface)
+        glyph_surfaces.append(gmsh.model.geo.add_plane_surface([surface_loop]))
+
+    # ... then extrude them all at once, without any intermediate synchronize
+    glyphs_extruded = gmsh.model.geo.extrude(
+        [(2, surface) for surface in glyph_surfaces], 0, 0, dz_extrude
+    )
+
+    object_surface_list = []
+    object_surface_loop_list = []
+    volumes = [(3, domain_volume)]
+    for surface, (top, volume, laterals) in zip(glyph_surfaces, split_extruded(glyphs_extruded)):  # noqa
+        volumes.append((3, volume))
+        surface_list = [top] + laterals + [surface]
         object_surface_list.extend(surface_list)
         surface_loop_3d = gmsh.model.geo.add_surface_loop(surface_list)
-        
         object_surface_loop_list.append(surface_loop_3d)
+    # only the boundaries of the extruded volumes are kept
+    gmsh.model.geo.remove(volumes)
 
-    outter_surface_list =  inflow_list + outflow_list + wall_list
+    outter_surface_list = inflow_list + outflow_list + wall_list
     outter_surface_loop = gmsh.model.geo.addSurfaceLoop(outter_surface_list)
-    print("outter_surface_loop", outter_surface_loop)
+    logger.debug("outter_surface_loop %s", outter_surface_loop)
 
     domain_with_void = gmsh.model.geo.addVolume([outter_surface_loop] + object_surface_loop_list)
 
@@ -153,13 +312,198 @@ def make_string_mesh3d(
     gmsh.model.geo.addPhysicalGroup(2, object_surface_list, 4, name="obj")
     gmsh.model.geo.addPhysicalGroup(3, [domain_with_void], 9, name="domain_with_void")
 
+    return {
+        "wall": wall_list,
+        "inflow": inflow_list,
+        "outflow": outflow_list,
+        "object": object_surface_list,
+        "domain": [domain_with_void],
+    }
 
-    gmsh.model.geo.synchronize()
 
-    gmsh.model.mesh.generate(3)
-    save_path = os.path.join(
-        save_dir, f"{string}_3d.msh"
-    )
-    gmsh.write(save_path)
-    print(f"Mesh saved to {save_path}")
-    return save_path
+def build_string_geometry_layered(
+    string,
+    glyphs,
+    min_val,
+    max_val,
+    lc=0.1,
+    glyph_size=0.5,
+    pad_y_start=0.25,
+    pad_y_end=0.25,
+    pad_x_start=0.8,
+    pad_x_end=0.8,
+    glyph_offset=0.5,
+    dz_extrude=0.5,
+    pad_z=0.2,
+    num_layers=None,
+    recombine=False,
+    through_holes=False,
+    curve_mode="bezier",
+    curve_tolerance=None,
+):
+    """
+    Adds the geometry of the "layered" 3D mode to the current gmsh model: the 2D cross-section
+    (the domain with one hole per glyph, plus the glyph faces unless `through_holes`) is extruded
+    along z with structured layers, so the volume mesh is the extruded 2D mesh (prisms, or
+    hexahedra with `recombine`) instead of a tetrahedralization.
+
+    The z range is split in three segments: [0, pad_z], [pad_z, pad_z + dz_extrude] and
+    [pad_z + dz_extrude, 2 * pad_z + dz_extrude]. The glyph columns of the middle segment are
+    the voids; with `through_holes` the glyph holes go through all of them.
+
+    Parameters:
+    string (str): The string to be meshed.
+    glyphs (GlyphCache): The glyph outlines of the font.
+    min_val (float): The minimum value for normalizing glyph points, see `get_font_boundaries`.
+    max_val (float): The maximum value for normalizing glyph points.
+    The other parameters are the ones of `make_string_mesh3d`.
+
+    Returns:
+    dict: The entity tags of the physical groups, keyed by "wall", "inflow", "outflow", "object" (surfaces)
+    and "domain" (volumes), plus "object_curves", the glyph outlines of the cross-section.
+    """
+    import gmsh
+
+    num_glyphs = len(string)
+
+    domain_x_start = 0
+    domain_x_end = glyph_offset*(num_glyphs) + (pad_x_start + pad_x_end)
+    domain_y_start = 0
+    domain_y_end = pad_y_start + glyph_size + pad_y_end
+
+    through_holes = through_holes or pad_z == 0
+    if through_holes:
+        heights = [2 * pad_z + dz_extrude]
+    else:
+        heights = [pad_z, dz_extrude, pad_z]
+    if num_layers is None:
+        num_layers = [max(1, round(h / lc)) for h in heights]
+    elif isinstance(num_layers, int):
+        num_layers = [num_layers] * len(heights)
+    else:
+        num_layers = list(num_layers)
+        if through_holes and len(num_layers) == 3:
+            num_layers = [sum(num_layers)]
+        if len(num_layers) != len(heights):
+            raise ValueError(
+                f"num_layers must give the layers of the {len(heights)} z segments, got {num_layers}"  # noqa
+            )
+
+    # Cross-section at z = 0
+    p1 = gmsh.model.geo.addPoint(domain_x_start, domain_y_start, 0, lc)
+    p2 = gmsh.model.geo.addPoint(domain_x_end, domain_y_start, 0, lc)
+    p3 = gmsh.model.geo.addPoint(domain_x_end, domain_y_end, 0, lc)
+    p4 = gmsh.model.geo.addPoint(domain_x_start, domain_y_end, 0, lc)
+
+    l1 = gmsh.model.geo.addLine(p1, p2)
+    l2 = gmsh.model.geo.addLine(p2, p3)
+    l3 = gmsh.model.geo.addLine(p3, p4)
+    l4 = gmsh.model.geo.addLine(p4, p1)
+    domain_surface_loop = gmsh.model.geo.add_curve_loop([l1, l2, l3, l4])
+
+    object_curves = []
+    glyph_loops = []
+    for i in range(len(string)):
+        pen = FontPen(
+            geo=gmsh.model.geo,
+            min_val=min_val,
+            max_val=max_val,
+            glyph_size=glyph_size,
+            lc=lc,
+            offset=(i*glyph_offset + pad_x_start, pad_y_start),
+            curve_mode=curve_mode,
+            tolerance=curve_tolerance,
+        )
+        glyphs.draw(string[i], pen)
+        if not pen.curves:
+            continue  # blank glyph, e.g. a space
+        object_curves.extend(pen.curves)
+        glyph_loops.append(gmsh.model.geo.add_curve_loop(pen.curves))
+
+    domain_surface = gmsh.model.geo.add_plane_surface([domain_surface_loop] + glyph_loops)  # noqa
+    glyph_surfaces = []
+    if not through_holes:
+        glyph_surfaces = [gmsh.model.geo.add_plane_surface([loop]) for loop in glyph_loops]  # noqa
+
+    base_surfaces = [domain_surface] + glyph_surfaces
+    if recombine:
+        for surface in base_surfaces:
+            gmsh.model.geo.mesh.setRecombine(2, surface)
+
+    wall_list = list(base_surfaces)
+    inflow_list = []
+    outflow_list = []
+    object_surface_list = []
+    domain_volumes = []
+    void_volumes = []
+
+    # extrude the cross-section segment by segment, each segment starting
+    # from the top surfaces of the previous one
+    surfaces = base_surfaces
+    for segment, (height, layers) in enumerate(zip(heights, num_layers)):
+        extruded = split_extruded(gmsh.model.geo.extrude(
+            [(2, surface) for surface in surfaces], 0, 0, height,
+            numElements=[layers], recombine=True,
+        ))
+        (domain_top, domain_volume, domain_laterals) = extruded[0]
+        lateral_l1, lateral_l2, lateral_l3, lateral_l4 = domain_laterals[:4]
+        wall_list.extend([lateral_l1, lateral_l3])
+        outflow_list.append(lateral_l2)
+        inflow_list.append(lateral_l4)
+        domain_volumes.append(domain_volume)
+        if through_holes:
+            # the remaining laterals are the sides of the glyph holes
+            object_surface_list.extend(domain_laterals[4:])
+        elif segment == 1:
+            # the glyph columns of the middle segment are the voids
+            for top, volume, laterals in extruded[1:]:
+                void_volumes.append(volume)
+                object_surface_list.extend(laterals)
+        else:
+            domain_volumes.extend(volume for _, volume, _ in extruded[1:])
+        if segment == 0 and not through_holes:
+            # bottom faces of the voids
+            object_surface_list.extend(top for top, _, _ in extruded[1:])
+        if segment == 1:
+            # top faces of the voids
+            object_surface_list.extend(top for top, _, _ in extruded[1:])
+        surfaces = [top for top, _, _ in extruded]
+    wall_list.extend(surfaces)
+
+    if void_volumes:
+        gmsh.model.geo.remove([(3, volume) for volume in void_volumes])
+
+    gmsh.model.geo.addPhysicalGroup(2, wall_list, 1, name="wall")
+    gmsh.model.geo.addPhysicalGroup(2, inflow_list, 2, name="inflow")
+    gmsh.model.geo.addPhysicalGroup(2, outflow_list, 3, name="outflow")
+    gmsh.model.geo.addPhysicalGroup(2, object_surface_list, 4, name="obj")
+    gmsh.model.geo.addPhysicalGroup(3, domain_volumes, 9, name="domain_with_void")
+
+    return {
+        "wall": wall_list,
+        "inflow": inflow_list,
+        "outflow": outflow_list,
+        "object": object_surface_list,
+        "domain": domain_volumes,
+        "object_curves": object_curves,
+    }
+
+
+def split_extruded(dim_tags):
+    """
+    Split the output of a gmsh extrude of surfaces into one (top, volume,
+    laterals) tuple per input surface, in input order.
+
+    For every surface gmsh returns its top surface, the extruded volume and
+    then one lateral surface per boundary curve, in the order of the curves.
+    """
+    dim_tags = list(dim_tags)
+    volume_idx = [i for i, (dim, _) in enumerate(dim_tags) if dim == 3]
+    chunks = []
+    for j, i in enumerate(volume_idx):
+        # the laterals run up to the top surface of the next chunk
+        end = volume_idx[j + 1] - 1 if j + 1 < len(volume_idx) else len(dim_tags)
+        top = dim_tags[i - 1][1]
+        laterals = [tag for _, tag in dim_tags[i + 1:end]]
+        chunks.append((top, dim_tags[i][1], laterals))
+    return chunks
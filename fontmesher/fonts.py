@@ -0,0 +1,105 @@
+import os
+import threading
+
+style_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "style"
+)
+default_font_name = "Clip"
+
+# registry of parsed fonts, keyed by absolute path
+_fonts = {}
+_lock = threading.Lock()
+
+
+def available_fonts():
+    """
+    List the names of the fonts bundled in the `style` folder.
+
+    Returns:
+        list: Font names usable with `get_font`, e.g. ["Clip", "Rebelion"].
+    """
+    return sorted(
+        os.path.splitext(name)[0] for name in os.listdir(style_dir)
+        if name.lower().endswith((".ttf", ".otf"))
+    )
+
+
+def resolve_font_path(font=None):
+    """
+    Resolve a font name or path to an absolute file path.
+
+    Args:
+        font (str): A path to a font file or outline pack, or the name of a
+            bundled font (with or without extension). Defaults to the bundled
+            Clip font.
+    Returns:
+        str: The absolute path of the font file.
+    """
+    if font is None:
+        font = default_font_name
+    font = os.fspath(font)
+    if os.path.isfile(font) or os.path.isfile(os.path.join(font, "meta.json")):
+        return os.path.abspath(font)
+    for candidate in (font, f"{font}.ttf", f"{font}.otf"):
+        path = os.path.join(style_dir, candidate)
+        if os.path.isfile(path):
+            return path
+    raise FileNotFoundError(
+        f"Unknown font {font!r}, expected a font file or one of {available_fonts()}"  # noqa
+    )
+
+
+def get_font(font=None):
+    """
+    Return a parsed font from the per-process font registry.
+
+    Each font file is parsed once per process and the same TTFont object is
+    shared by all later callers. Outline packs (see
+    `fontmesher.outline_pack`) are memory-mapped instead of parsed.
+
+    Args:
+        font: A TTFont or OutlinePack object (returned as is), a path to a
+            font file or outline pack, the name of a bundled font, or None
+            for the default font.
+    Returns:
+        TTFont: The parsed font, or an OutlinePack.
+    """
+    if font is not None and not isinstance(font, (str, os.PathLike)):
+        return font
+    path = resolve_font_path(font)
+    with _lock:
+        if path not in _fonts and os.path.isdir(path):
+            from fontmesher.outline_pack import OutlinePack
+            _fonts[path] = OutlinePack(path)
+        elif path not in _fonts:
+            from fontTools.ttLib import TTFont
+            _fonts[path] = TTFont(path)
+        return _fonts[path]
+
+
+def font_path_of(font):
+    """
+    Return the file path a font was loaded from, if known.
+
+    Args:
+        font: A TTFont or OutlinePack object, a path or a bundled font name.
+    Returns:
+        str: The absolute path of the font file or outline pack, or None for
+        fonts that were not loaded from disk.
+    """
+    if font is None or isinstance(font, (str, os.PathLike)):
+        return resolve_font_path(font)
+    from fontmesher.outline_pack import OutlinePack
+    if isinstance(font, OutlinePack):
+        return font.path
+    reader_file = getattr(getattr(font, "reader", None), "file", None)
+    name = getattr(reader_file, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return os.path.abspath(name)
+    return None
+
+
+def clear_fonts():
+    """Drop every font held by the registry."""
+    with _lock:
+        _fonts.clear()
@@ -0,0 +1,77 @@
+from fontTools.pens.boundsPen import BoundsPen
+from fontTools.pens.recordingPen import DecomposingRecordingPen, replayRecording
+
+from fontmesher.outline_pack import OutlinePack
+from fontmesher.utils import get_font_boundaries
+
+
+class GlyphCache:
+    """
+    A per-call cache of glyph outlines.
+
+    Each unique character is decoded from the font once, with a recording
+    pen, and later occurrences replay the recorded outline into a new pen.
+    Composite glyphs are decomposed while recording, so the replayed outline
+    only contains drawing commands.
+
+    Attributes:
+        font: The font the glyphs are read from.
+        cmap (dict): The best unicode cmap of the font.
+        glyph_set: The glyph set of the font.
+        recordings (dict): The recorded outline of every character seen so far.
+        extents (dict): The outline bounds of every character seen so far.
+    Methods:
+        record(char):
+            Return the recorded outline of a character.
+        draw(char, pen):
+            Draw a character on a pen.
+        advance(char):
+            Return the advance width of a character in font units.
+        bounds(char):
+            Return the outline bounds of a character in font units.
+    """
+    def __init__(self, font):
+        self.font = font
+        self.cmap = font.getBestCmap()
+        self.glyph_set = font.getGlyphSet()
+        self.recordings = {}
+        self.extents = {}
+
+    def record(self, char):
+        recording = self.recordings.get(char)
+        if recording is None:
+            pen = DecomposingRecordingPen(self.glyph_set)
+            self.glyph_set[self.cmap[ord(char)]].draw(pen)
+            recording = self.recordings[char] = pen.value
+        return recording
+
+    def draw(self, char, pen):
+        replayRecording(self.record(char), pen)
+
+    def advance(self, char):
+        return self.font["hmtx"][self.cmap[ord(char)]][0]
+
+    def bounds(self, char):
+        """
+        Return the (x_min, y_min, x_max, y_max) of the outline of a character,
+        or None for a blank glyph.
+        """
+        if char not in self.extents:
+            pen = BoundsPen(self.glyph_set)
+            self.draw(char, pen)
+            self.extents[char] = pen.bounds
+        return self.extents[char]
+
+    def __len__(self):
+        return len(self.recordings)
+
+
+def glyph_source(font):
+    """
+    Return the glyph outlines of a font and the boundaries normalizing them,
+    as (glyphs, min_val, max_val). An OutlinePack is its own glyph source,
+    a TTFont gets a new GlyphCache.
+    """
+    if isinstance(font, OutlinePack):
+        return (font,) + font.boundaries
+    return (GlyphCache(font),) + get_font_boundaries(font)
@@ -0,0 +1,165 @@
+import logging
+
+from fontmesher.font_tools import build_string_geometry
+from fontmesher.font_tools_3d import build_string_geometry3d
+from fontmesher.fonts import get_font
+from fontmesher.glyphs import glyph_source
+from fontmesher.mesh_io import default_filename, output_mesh
+from fontmesher.options import apply_mesh_options, start_model
+from fontmesher.profiling import PhaseTimer, make_result
+from fontmesher.sizing import apply_distance_sizing
+
+logger = logging.getLogger(__name__)
+
+hierarchy_methods = ("remesh", "refine")
+
+
+def hierarchy_sizes(lc=0.1, levels=3, ratio=0.5, lcs=None):
+    """
+    Return the far-field element size of every level, from coarse to fine:
+    `lcs` if given, else `lc` * `ratio` ** level.
+    """
+    if lcs is not None:
+        return [float(size) for size in lcs]
+    return [lc * ratio ** level for level in range(levels)]
+
+
+def make_mesh_hierarchy(
+    string,
+    font=None,
+    save_dir=".",
+    lc=0.1,
+    levels=3,
+    ratio=0.5,
+    lcs=None,
+    method="remesh",
+    dim=2,
+    glyph_size=0.5,
+    pad_y_start=0.25,
+    pad_y_end=0.25,
+    pad_x_start=0.8,
+    pad_x_end=0.8,
+    glyph_offset=0.5,
+    dz_extrude=0.5,
+    pad_z=0.2,
+    write=True,
+    return_data=False,
+    filename=None,
+    file_format=None,
+    binary=False,
+    compress=False,
+    lc_min=None,
+    growth_distance=None,
+    num_threads=None,
+    algorithm_2d=None,
+    algorithm_3d=None,
+    profile=None,
+    return_result=False,
+    curve_mode="bezier",
+    curve_tolerance=None,
+):
+    """
+    Generates a series of meshes of one string at several resolutions from a single geometry build.
+
+    The font, its boundaries, the glyph geometry and the synchronize are done once. Then every level is either
+    meshed again with smaller elements ("remesh", through gmsh's Mesh.MeshSizeFactor, any sizes), or obtained by
+    uniformly refining the previous level ("refine", gmsh.model.mesh.refine, each level halves the element size
+    and the meshes are nested). All levels share the geometry, so their physical groups are identical.
+
+    Parameters:
+    string (str): The string to be meshed.
+    font (Font): The font to be used, either a TTFont or a bundled font name / font path. Defaults to `default_font`.
+    save_dir (str): The directory where the mesh files will be saved. Defaults to the current directory.
+    lc (float): The element size of the coarsest level. Defaults to 0.1.
+    levels (int): The number of levels. Defaults to 3.
+    ratio (float): The size ratio between consecutive levels of the "remesh" method. Defaults to 0.5.
+    lcs (list): The element size of every level of the "remesh" method, overrides `lc`, `levels` and `ratio`.
+        Defaults to None.
+    method (str): "remesh" or "refine". Defaults to "remesh".
+    dim (int): 2 for the mesh of `make_string_mesh`, 3 for the tetrahedral mesh of `make_string_mesh3d`.
+        Defaults to 2.
+    filename (str): The name of the mesh files in `save_dir`, formatted with the level, e.g. "mesh_{level}.msh".
+        Defaults to the string with a "_level<k>" suffix.
+    lc_min (float): If given, grade the element size with the distance to the glyphs from `lc_min` to the size
+        of the level, see `make_string_mesh`. It is scaled along with the level size. Defaults to None.
+    The other parameters are the ones of `make_string_mesh` and `make_string_mesh3d`.
+
+    Returns:
+    list: The output of every level, from coarse to fine: the path of the saved mesh file (None if `write` is
+    False), a MeshData if `return_data` is True, or a MeshResult if `return_result` is True. The shared setup
+    phases are timed in the result of the first level.
+    """
+    import gmsh
+
+    if method not in hierarchy_methods:
+        raise ValueError(f"Unknown method {method!r}, expected one of {hierarchy_methods}")  # noqa
+    if dim not in (2, 3):
+        raise ValueError(f"dim must be 2 or 3, got {dim}")
+    if method == "refine":
+        sizes = [lc / 2 ** level for level in range(levels)]
+    else:
+        sizes = hierarchy_sizes(lc, levels, ratio, lcs)
+    lc = sizes[0]
+    if growth_distance is None:
+        growth_distance = glyph_size / 2
+
+    timer = PhaseTimer(profile, return_result)
+    with timer.phase("font_load"):
+        font = get_font(font)
+    with timer.phase("boundaries"):
+        glyphs, min_val, max_val = glyph_source(font)
+
+    with timer.phase("geometry"):
+        start_model("font_mesh_hierarchy")
+        geometry_kwargs = dict(
+            lc=lc,
+            glyph_size=glyph_size,
+            pad_y_start=pad_y_start,
+            pad_y_end=pad_y_end,
+            pad_x_start=pad_x_start,
+            pad_x_end=pad_x_end,
+            glyph_offset=glyph_offset,
+            curve_mode=curve_mode,
+            curve_tolerance=curve_tolerance,
+        )
+        if dim == 2:
+            groups = build_string_geometry(string, glyphs, min_val, max_val, **geometry_kwargs)  # noqa
+        else:
+            groups = build_string_geometry3d(
+                string, glyphs, min_val, max_val,
+                dz_extrude=dz_extrude, pad_z=pad_z, **geometry_kwargs,
+            )
+    with timer.phase("synchronize"):
+        gmsh.model.geo.synchronize()
+    if lc_min is not None:
+        apply_distance_sizing(dim - 1, groups["object"], lc_min, lc, growth_distance)  # noqa
+    apply_mesh_options(num_threads, algorithm_2d, algorithm_3d)
+
+    suffix = "" if dim == 2 else "_3d"
+    outputs = []
+    previous_factor = gmsh.option.getNumber("Mesh.MeshSizeFactor")
+    try:
+        for level, size in enumerate(sizes):
+            with timer.phase("generate"):
+                if method == "refine" and level > 0:
+                    gmsh.model.mesh.refine()
+                else:
+                    # point sizes and the distance field all scale with the factor
+                    gmsh.option.setNumber("Mesh.MeshSizeFactor", size / lc)
+                    gmsh.model.mesh.clear()
+                    gmsh.model.mesh.generate(dim)
+            with timer.phase("write"):
+                level_filename = (
+                    filename.format(level=level) if filename is not None
+                    else default_filename(string, f"{suffix}_level{level}", file_format or "msh", compress)  # noqa
+                )
+                output = output_mesh(
+                    string, suffix, save_dir, write, return_data,
+                    level_filename, file_format, binary, compress,
+                )
+            logger.debug("level %d (lc=%g) of %r meshed", level, size, string)
+            outputs.append(make_result(output, timer) if return_result else output)  # noqa
+            timer = PhaseTimer(profile, return_result)
+    finally:
+        gmsh.option.setNumber("Mesh.MeshSizeFactor", previous_factor)
+    return outputs
@@ -0,0 +1,76 @@
+from collections import namedtuple
+
+Placement = namedtuple(
+    "Placement", ["index", "char", "line", "x", "y", "x_min", "x_max"]
+)
+Placement.__doc__ = """
+The position of one glyph of a laid out text.
+
+Attributes:
+    index (int): The position of the character in the text, used for its physical tag.
+    char (str): The character.
+    line (int): The line of the character, 0 is the top line.
+    x (float): The x offset of the glyph, as passed to FontPen.
+    y (float): The y offset of the glyph, the bottom of its line.
+    x_min (float): The left end of the glyph outline in the domain, None for a blank glyph.
+    x_max (float): The right end of the glyph outline in the domain, None for a blank glyph.
+"""
+
+
+def layout_text(
+    text,
+    glyphs,
+    min_val,
+    max_val,
+    glyph_size=0.5,
+    glyph_offset=None,
+    line_spacing=1.5,
+    origin=(0, 0),
+):
+    """
+    Lay out a (multi-line) text, line by line from the top.
+
+    Glyphs advance by the advance width of the font, scaled like the
+    outlines, or by a fixed `glyph_offset` like `make_string_mesh`. Every
+    line is a band of height `glyph_size`, the bands are `line_spacing`
+    glyph sizes apart.
+
+    Parameters:
+    text (str): The text, lines are separated by "\\n".
+    glyphs (GlyphCache): The glyph outlines of the font.
+    min_val (float): The minimum value for normalizing glyph points, see `get_font_boundaries`.
+    max_val (float): The maximum value for normalizing glyph points.
+    glyph_size (float): The size of each glyph. Defaults to 0.5.
+    glyph_offset (float): A fixed offset between consecutive glyphs. Defaults to None (advance widths).
+    line_spacing (float): The distance between the bottoms of consecutive lines, in glyph sizes.
+        Defaults to 1.5.
+    origin (tuple): The bottom left corner of the text. Defaults to (0, 0).
+
+    Returns:
+    tuple: The list of Placement of every character (newlines excluded), and the (width, height) of the text.
+    """
+    scale = glyph_size / (max_val - min_val)
+    lines = text.split("\n")
+    line_height = glyph_size * line_spacing
+
+    placements = []
+    width = 0.0
+    index = 0
+    for line, chars in enumerate(lines):
+        x = origin[0]
+        y = origin[1] + (len(lines) - 1 - line) * line_height
+        for char in chars:
+            bounds = glyphs.bounds(char)
+            if bounds is None:
+                x_min = x_max = None
+            else:
+                x_min = x + (bounds[0] - min_val) * scale
+                x_max = x + (bounds[2] - min_val) * scale
+                width = max(width, x_max - origin[0])
+            placements.append(Placement(index, char, line, x, y, x_min, x_max))
+            x += glyph_offset if glyph_offset is not None else glyphs.advance(char) * scale  # noqa
+            index += 1
+        width = max(width, x - origin[0])
+        index += 1  # the newline
+    height = glyph_size + (len(lines) - 1) * line_height
+    return placements, (width, height)
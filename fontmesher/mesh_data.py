@@ -0,0 +1,314 @@
+import json
+from collections import namedtuple
+
+import numpy as np
+
+# gmsh element type -> name, for the linear element types fontmesher produces
+element_type_names = {
+    15: "vertex",
+    1: "line",
+    2: "triangle",
+    3: "quad",
+    4: "tetra",
+    5: "hexahedron",
+    6: "wedge",
+    7: "pyramid",
+}
+
+ElementBlock = namedtuple(
+    "ElementBlock", ["dim", "entity", "type", "tags", "connectivity"]
+)
+ElementBlock.__doc__ = """
+The elements of one type on one geometric entity.
+
+Attributes:
+    dim (int): The dimension of the entity.
+    entity (int): The tag of the entity.
+    type (int): The gmsh element type, see `element_type_names`.
+    tags (ndarray): The gmsh element tags, shape (M,).
+    connectivity (ndarray): Zero-based indices into `MeshData.nodes`, shape (M, nodes per element).
+"""
+
+PhysicalGroup = namedtuple("PhysicalGroup", ["dim", "tag", "name", "entities"])
+PhysicalGroup.__doc__ = """
+A physical group of the mesh, e.g. wall / inflow / outflow / object / domain.
+
+Attributes:
+    dim (int): The dimension of the group.
+    tag (int): The physical tag.
+    name (str): The physical name.
+    entities (ndarray): The tags of the entities in the group.
+"""
+
+
+class MeshData:
+    """
+    A mesh held in memory as contiguous NumPy arrays.
+
+    Attributes:
+        nodes (ndarray): The node coordinates, shape (N, 3).
+        node_tags (ndarray): The gmsh tag of each node, shape (N,).
+        blocks (list): The ElementBlock of every (entity, element type) pair.
+        physical_groups (list): The PhysicalGroup of the mesh.
+        path (str): The path of the mesh file, if it was written to disk.
+    Methods:
+        from_gmsh():
+            Extract the mesh of the current gmsh model.
+        elements:
+            The connectivity of all elements, per element type name.
+        get_groups(name):
+            Return the physical groups with the given name.
+        group_elements(group):
+            Return the connectivity of the elements of a physical group.
+        physical_only():
+            Return the mesh restricted to the entities of physical groups.
+        merge(meshes, tol):
+            Merge meshes into one, joining coincident nodes.
+        to_gmsh():
+            Load the mesh into the current gmsh model as discrete entities.
+        save(file):
+            Save the arrays of the mesh to a .npz file.
+        load(file):
+            Load a mesh saved with `save`.
+    """
+    def __init__(self, nodes, node_tags, blocks, physical_groups, path=None):
+        self.nodes = nodes
+        self.node_tags = node_tags
+        self.blocks = blocks
+        self.physical_groups = physical_groups
+        self.path = path
+
+    @classmethod
+    def from_gmsh(cls):
+        """
+        Extract the mesh of the current gmsh model.
+        """
+        import gmsh
+
+        node_tags, coords, _ = gmsh.model.mesh.getNodes()
+        node_tags = np.asarray(node_tags, dtype=np.int64)
+        nodes = np.ascontiguousarray(np.asarray(coords, dtype=np.float64).reshape(-1, 3))  # noqa
+
+        # gmsh node tag -> row in `nodes`
+        index = np.full(node_tags.max(initial=0) + 1, -1, dtype=np.int64)
+        index[node_tags] = np.arange(len(node_tags))
+
+        blocks = []
+        for dim, entity in gmsh.model.getEntities():
+            types, elem_tags, elem_nodes = gmsh.model.mesh.getElements(dim, entity)  # noqa
+            for elem_type, tags, conn in zip(types, elem_tags, elem_nodes):
+                num_nodes = gmsh.model.mesh.getElementProperties(elem_type)[3]
+                conn = index[np.asarray(conn, dtype=np.int64)].reshape(-1, num_nodes)  # noqa
+                blocks.append(ElementBlock(
+                    dim, entity, int(elem_type),
+                    np.asarray(tags, dtype=np.int64),
+                    np.ascontiguousarray(conn),
+                ))
+
+        physical_groups = [
+            PhysicalGroup(
+                dim, tag, gmsh.model.getPhysicalName(dim, tag),
+                np.asarray(gmsh.model.getEntitiesForPhysicalGroup(dim, tag), dtype=np.int64),  # noqa
+            )
+            for dim, tag in gmsh.model.getPhysicalGroups()
+        ]
+        return cls(nodes, node_tags, blocks, physical_groups)
+
+    def _concat(self, blocks):
+        elements = {}
+        for block in blocks:
+            name = element_type_names.get(block.type, str(block.type))
+            elements.setdefault(name, []).append(block.connectivity)
+        return {
+            name: np.concatenate(conns) if len(conns) > 1 else conns[0]
+            for name, conns in elements.items()
+        }
+
+    @property
+    def elements(self):
+        """
+        The connectivity of all elements, as a dict of element type name to
+        an (M, nodes per element) array.
+        """
+        return self._concat(self.blocks)
+
+    def get_groups(self, name):
+        """
+        Return the physical groups with the given name (e.g. "object").
+        Several groups can share a name, e.g. the `curves_of_<char>` groups
+        of a character that occurs more than once.
+        """
+        return [group for group in self.physical_groups if group.name == name]
+
+    def group_elements(self, group):
+        """
+        Return the connectivity of the elements of a physical group, as a
+        dict of element type name to connectivity.
+
+        Args:
+            group: A physical group name, a physical tag, or a PhysicalGroup.
+        """
+        if isinstance(group, str):
+            groups = self.get_groups(group)
+        elif isinstance(group, PhysicalGroup):
+            groups = [group]
+        else:
+            groups = [g for g in self.physical_groups if g.tag == group]
+        entities = {
+            (g.dim, int(entity)) for g in groups for entity in g.entities
+        }
+        return self._concat(
+            block for block in self.blocks
+            if (block.dim, block.entity) in entities
+        )
+
+    def physical_only(self):
+        """
+        Return the mesh restricted to the elements of entities that belong to
+        a physical group, which is what gmsh writes to MSH files by default.
+        The nodes are kept.
+        """
+        entities = {
+            (g.dim, int(entity)) for g in self.physical_groups for entity in g.entities
+        }
+        blocks = [
+            block for block in self.blocks if (block.dim, block.entity) in entities
+        ]
+        return MeshData(self.nodes, self.node_tags, blocks, self.physical_groups, self.path)  # noqa
+
+    @classmethod
+    def merge(cls, meshes, tol=1e-9):
+        """
+        Merge meshes into one.
+
+        Nodes closer than `tol` (on a grid of spacing `tol`) are joined, so
+        meshes that share the discretization of a common boundary become
+        one conforming mesh. Entity and element tags are shifted per mesh so
+        that they stay unique, physical groups with the same dimension and
+        tag are united.
+
+        Args:
+            meshes (list): The MeshData to merge.
+            tol (float): The distance below which two nodes are joined.
+        Returns:
+            MeshData: The merged mesh, with node tags 1..N.
+        """
+        meshes = list(meshes)
+        all_nodes = np.concatenate([mesh.nodes for mesh in meshes])
+        node_offsets = np.cumsum([0] + [len(mesh.nodes) for mesh in meshes])
+
+        # join nodes by quantized coordinates, in order of first occurrence
+        keys = np.round(all_nodes / tol).astype(np.int64)
+        _, first, inverse = np.unique(
+            keys, axis=0, return_index=True, return_inverse=True
+        )
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        new_index = rank[inverse.ravel()]
+        nodes = np.ascontiguousarray(all_nodes[first[order]])
+
+        blocks = []
+        groups = {}
+        entity_offsets = {}
+        element_offset = 0
+        for mesh, node_offset in zip(meshes, node_offsets):
+            offsets = dict(entity_offsets)
+            for block in mesh.blocks:
+                offset = offsets.get(block.dim, 0)
+                blocks.append(ElementBlock(
+                    block.dim, block.entity + offset, block.type,
+                    block.tags + element_offset,
+                    new_index[block.connectivity + node_offset],
+                ))
+                entity_offsets[block.dim] = max(
+                    entity_offsets.get(block.dim, 0), block.entity + offset
+                )
+            for group in mesh.physical_groups:
+                offset = offsets.get(group.dim, 0)
+                entities = group.entities + offset
+                if len(entities):
+                    entity_offsets[group.dim] = max(
+                        entity_offsets.get(group.dim, 0), int(entities.max())
+                    )
+                key = (group.dim, group.tag)
+                if key in groups:
+                    previous = groups[key]
+                    entities = np.concatenate([previous.entities, entities])
+                groups[key] = PhysicalGroup(group.dim, group.tag, group.name, entities)  # noqa
+            element_offset += max(
+                (int(block.tags.max()) for block in mesh.blocks if len(block.tags)),
+                default=0,
+            )
+        node_tags = np.arange(1, len(nodes) + 1, dtype=np.int64)
+        return cls(nodes, node_tags, blocks, list(groups.values()))
+
+    def to_gmsh(self):
+        """
+        Load the mesh into the current gmsh model, as discrete entities with
+        the element blocks and physical groups of the mesh, e.g. to write it
+        with gmsh or mesh it further. The nodes are attached to the first
+        entity of the highest dimension.
+        """
+        import gmsh
+
+        entities = sorted(
+            {(block.dim, block.entity) for block in self.blocks}
+            | {(g.dim, int(e)) for g in self.physical_groups for e in g.entities}
+        )
+        for dim, entity in entities:
+            gmsh.model.addDiscreteEntity(dim, entity)
+        if entities and len(self.nodes):
+            dim, entity = max(entities, key=lambda e: (e[0], -e[1]))
+            gmsh.model.mesh.addNodes(dim, entity, self.node_tags, self.nodes.ravel())  # noqa
+        for block in self.blocks:
+            gmsh.model.mesh.addElementsByType(
+                block.entity, block.type, block.tags,
+                self.node_tags[block.connectivity].ravel(),
+            )
+        for group in self.physical_groups:
+            gmsh.model.addPhysicalGroup(
+                group.dim, [int(e) for e in group.entities], group.tag, name=group.name
+            )
+
+    def save(self, file, compress=False):
+        """
+        Save the arrays of the mesh to a NumPy .npz file (path or binary file object).
+        """
+        arrays = {"nodes": self.nodes, "node_tags": self.node_tags}
+        arrays["blocks"] = np.array(
+            [(b.dim, b.entity, b.type) for b in self.blocks], dtype=np.int64
+        ).reshape(-1, 3)
+        for i, block in enumerate(self.blocks):
+            arrays[f"tags_{i}"] = block.tags
+            arrays[f"connectivity_{i}"] = block.connectivity
+        arrays["physical_groups"] = np.array(json.dumps([
+            [g.dim, g.tag, g.name, [int(e) for e in g.entities]]
+            for g in self.physical_groups
+        ]))
+        (np.savez_compressed if compress else np.savez)(file, **arrays)
+
+    @classmethod
+    def load(cls, file):
+        """
+        Load a mesh saved with `save`.
+        """
+        with np.load(file, allow_pickle=False) as arrays:
+            blocks = [
+                ElementBlock(
+                    int(dim), int(entity), int(elem_type),
+                    arrays[f"tags_{i}"], arrays[f"connectivity_{i}"],
+                )
+                for i, (dim, entity, elem_type) in enumerate(arrays["blocks"])
+            ]
+            physical_groups = [
+                PhysicalGroup(dim, tag, name, np.asarray(entities, dtype=np.int64))
+                for dim, tag, name, entities in json.loads(str(arrays["physical_groups"]))  # noqa
+            ]
+            return cls(arrays["nodes"], arrays["node_tags"], blocks, physical_groups)  # noqa
+
+    def __repr__(self):
+        counts = ", ".join(
+            f"{name}: {len(conn)}" for name, conn in self.elements.items()
+        )
+        return f"MeshData({len(self.nodes)} nodes, {counts})"
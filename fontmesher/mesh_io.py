@@ -0,0 +1,368 @@
+import base64
+import gzip
+import logging
+import os
+import shutil
+import tempfile
+import zlib
+
+import numpy as np
+
+from fontmesher.mesh_data import MeshData
+
+logger = logging.getLogger(__name__)
+
+# format name -> (file extension, writer); "gmsh" writers go through gmsh.write
+file_formats = {
+    "msh": (".msh", "gmsh"),
+    "msh2": (".msh", "gmsh"),
+    "vtk": (".vtk", "gmsh"),
+    "med": (".med", "gmsh"),
+    "vtu": (".vtu", "vtu"),
+    "xdmf": (".xdmf", "xdmf"),
+}
+
+# gmsh element type -> VTK cell type, linear node orderings agree
+vtk_cell_types = {15: 1, 1: 3, 2: 5, 3: 9, 4: 10, 5: 12, 6: 13, 7: 14}
+
+# gmsh element type -> XDMF topology type
+xdmf_topology_types = {
+    15: "Polyvertex", 1: "Polyline", 2: "Triangle", 3: "Quadrilateral",
+    4: "Tetrahedron", 5: "Hexahedron", 6: "Wedge", 7: "Pyramid",
+}
+
+_unsafe_chars = {os.sep, "/", "\\", "\0"}
+
+
+def default_filename(string, suffix="", file_format="msh", compress=False):
+    """
+    Build the default mesh file name of a string, e.g. "Hello_3d.msh".
+    Path separators in the string are replaced so that the file always
+    lands in the save directory.
+    """
+    name = "".join("_" if c in _unsafe_chars else c for c in string)
+    ext = file_formats[file_format][0]
+    if compress and file_formats[file_format][1] == "gmsh":
+        ext += ".gz"
+    return f"{name}{suffix}{ext}"
+
+
+def guess_file_format(path):
+    """
+    Guess the mesh format from a file name, defaults to "msh".
+    """
+    name = os.fspath(path).lower()
+    if name.endswith(".gz"):
+        name = name[:-len(".gz")]
+    for file_format, (ext, _) in file_formats.items():
+        if name.endswith(ext):
+            return file_format
+    return "msh"
+
+
+def _gmsh_write(path, file_format, binary, split=False):
+    import gmsh
+
+    option_names = ["Mesh.Binary", "Mesh.MshFileVersion", "Mesh.PartitionSplitMeshFiles"]  # noqa
+    previous = [gmsh.option.getNumber(name) for name in option_names]
+    try:
+        gmsh.option.setNumber("Mesh.Binary", int(binary))
+        gmsh.option.setNumber(
+            "Mesh.MshFileVersion", 2.2 if file_format == "msh2" else 4.1
+        )
+        gmsh.option.setNumber("Mesh.PartitionSplitMeshFiles", int(split))
+        gmsh.write(path)
+    finally:
+        for name, value in zip(option_names, previous):
+            gmsh.option.setNumber(name, value)
+
+
+def _vtu_data_array(array, compress, block_size=1 << 15):
+    """
+    Encode an array for an inline binary VTU DataArray, optionally zlib compressed.
+    """
+    raw = np.ascontiguousarray(array).tobytes()
+    if not compress:
+        header = np.array([len(raw)], dtype=np.uint64).tobytes()
+        return base64.b64encode(header + raw).decode()
+    blocks = [raw[i:i + block_size] for i in range(0, len(raw), block_size)] or [b""]  # noqa
+    compressed = [zlib.compress(block) for block in blocks]
+    header = np.array(
+        [len(blocks), block_size, len(blocks[-1])] + [len(c) for c in compressed],
+        dtype=np.uint64,
+    )
+    return base64.b64encode(header.tobytes()).decode() + base64.b64encode(b"".join(compressed)).decode()  # noqa
+
+
+def _entity_physical_tags(data):
+    """
+    Map (dim, entity) to the smallest physical tag containing it.
+    """
+    tags = {}
+    for group in sorted(data.physical_groups, key=lambda g: g.tag):
+        for entity in group.entities:
+            tags.setdefault((group.dim, int(entity)), group.tag)
+    return tags
+
+
+def write_vtu(fh, data, compress=False):
+    """
+    Write a MeshData as a VTK unstructured grid (.vtu) to a binary file object.
+
+    The cells of every dimension are written, with the gmsh physical and
+    geometrical tags of each cell as cell data.
+    """
+    blocks = [block for block in data.blocks if block.type in vtk_cell_types]
+    physical_tags = _entity_physical_tags(data)
+
+    connectivity = np.concatenate(
+        [block.connectivity.ravel() for block in blocks] or [np.empty(0)]
+    ).astype(np.int64)
+    offsets = np.cumsum(np.concatenate(
+        [np.full(len(b.connectivity), b.connectivity.shape[1]) for b in blocks]
+        or [np.empty(0)]
+    )).astype(np.int64)
+    types = np.concatenate(
+        [np.full(len(b.connectivity), vtk_cell_types[b.type]) for b in blocks]
+        or [np.empty(0)]
+    ).astype(np.uint8)
+    physical = np.concatenate(
+        [np.full(len(b.connectivity), physical_tags.get((b.dim, b.entity), 0)) for b in blocks]  # noqa
+        or [np.empty(0)]
+    ).astype(np.int64)
+    geometrical = np.concatenate(
+        [np.full(len(b.connectivity), b.entity) for b in blocks] or [np.empty(0)]  # noqa
+    ).astype(np.int64)
+
+    def data_array(array, vtk_type, name, components=1):
+        return (
+            f'<DataArray type="{vtk_type}" Name="{name}" NumberOfComponents="{components}" format="binary">\n'  # noqa
+            f"{_vtu_data_array(array, compress)}\n</DataArray>\n"
+        )
+
+    compressor = ' compressor="vtkZLibDataCompressor"' if compress else ""
+    fh.write((
+        '<?xml version="1.0"?>\n'
+        f'<VTKFile type="UnstructuredGrid" version="1.0" byte_order="LittleEndian" header_type="UInt64"{compressor}>\n'  # noqa
+        "<UnstructuredGrid>\n"
+        f'<Piece NumberOfPoints="{len(data.nodes)}" NumberOfCells="{len(types)}">\n'  # noqa
+        "<Points>\n"
+        + data_array(data.nodes.astype("<f8"), "Float64", "Points", 3)
+        + "</Points>\n<Cells>\n"
+        + data_array(connectivity.astype("<i8"), "Int64", "connectivity")
+        + data_array(offsets.astype("<i8"), "Int64", "offsets")
+        + data_array(types, "UInt8", "types")
+        + "</Cells>\n<CellData>\n"
+        + data_array(physical.astype("<i8"), "Int64", "gmsh:physical")
+        + data_array(geometrical.astype("<i8"), "Int64", "gmsh:geometrical")
+        + "</CellData>\n</Piece>\n</UnstructuredGrid>\n</VTKFile>\n"
+    ).encode())
+
+
+def write_xdmf(path, data, compress=False):
+    """
+    Write a MeshData as XDMF, with the heavy data in an HDF5 file next to it.
+
+    Every element type becomes a grid of a spatial collection, all sharing
+    the node coordinates. Needs the optional h5py dependency.
+    """
+    try:
+        import h5py
+    except ImportError as e:
+        raise ImportError("Writing XDMF needs h5py, install it with `pip install h5py`") from e  # noqa
+
+    h5_path = os.path.splitext(path)[0] + ".h5"
+    h5_name = os.path.basename(h5_path)
+    physical_tags = _entity_physical_tags(data)
+    options = {"compression": "gzip"} if compress else {}
+
+    grids = []
+    with h5py.File(h5_path, "w") as h5:
+        h5.create_dataset("nodes", data=data.nodes, **options)
+        for elem_type, topology in xdmf_topology_types.items():
+            blocks = [block for block in data.blocks if block.type == elem_type]
+            if not blocks:
+                continue
+            conn = np.concatenate([block.connectivity for block in blocks])
+            physical = np.concatenate([
+                np.full(len(b.connectivity), physical_tags.get((b.dim, b.entity), 0))  # noqa
+                for b in blocks
+            ])
+            h5.create_dataset(f"{topology}/connectivity", data=conn, **options)  # noqa
+            h5.create_dataset(f"{topology}/physical", data=physical, **options)  # noqa
+            nodes_per_element = (
+                f' NodesPerElement="{conn.shape[1]}"'
+                if topology in ("Polyvertex", "Polyline") else ""
+            )
+            grids.append(
+                f'<Grid Name="{topology}" GridType="Uniform">\n'
+                f'<Topology TopologyType="{topology}" NumberOfElements="{len(conn)}"{nodes_per_element}>\n'  # noqa
+                f'<DataItem Dimensions="{conn.shape[0]} {conn.shape[1]}" NumberType="Int" Precision="8" Format="HDF">{h5_name}:/{topology}/connectivity</DataItem>\n'  # noqa
+                "</Topology>\n"
+                '<Geometry GeometryType="XYZ">\n'
+                f'<DataItem Dimensions="{len(data.nodes)} 3" NumberType="Float" Precision="8" Format="HDF">{h5_name}:/nodes</DataItem>\n'  # noqa
+                "</Geometry>\n"
+                '<Attribute Name="gmsh:physical" AttributeType="Scalar" Center="Cell">\n'  # noqa
+                f'<DataItem Dimensions="{len(conn)}" NumberType="Int" Precision="8" Format="HDF">{h5_name}:/{topology}/physical</DataItem>\n'  # noqa
+                "</Attribute>\n</Grid>\n"
+            )
+
+    with open(path, "w") as f:
+        f.write(
+            '<?xml version="1.0"?>\n<Xdmf Version="3.0">\n<Domain>\n'
+            '<Grid Name="mesh" GridType="Collection" CollectionType="Spatial">\n'  # noqa
+            + "".join(grids)
+            + "</Grid>\n</Domain>\n</Xdmf>\n"
+        )
+    return path
+
+
+def partition_paths(path, partitions, compress=False):
+    """
+    Return the paths of the files of a mesh written in `partitions` parts,
+    "mesh_1.msh" to "mesh_<N>.msh" for "mesh.msh", as gmsh names them.
+    """
+    path = os.fspath(path)
+    if path.endswith(".gz"):
+        path = path[:-len(".gz")]
+    base, ext = os.path.splitext(path)
+    gz = ".gz" if compress else ""
+    return [f"{base}_{part}{ext}{gz}" for part in range(1, partitions + 1)]
+
+
+def write_partitions(path, partitions, file_format=None, binary=False, compress=False):  # noqa
+    """
+    Write the partitioned mesh of the current gmsh model as one MSH file per
+    partition, see `fontmesher.options.partition_mesh`. Every file holds the
+    elements of its partition, its ghost cells and the partition interfaces.
+
+    Returns:
+    list: The paths of the partition files, see `partition_paths`.
+    """
+    file_format = file_format or guess_file_format(path)
+    if file_format not in ("msh", "msh2"):
+        raise ValueError(f"Partitioned meshes are written as MSH, not {file_format!r}")  # noqa
+    path = os.fspath(path)
+    if path.endswith(".gz"):
+        path = path[:-len(".gz")]
+    # gmsh picks its writer from the extension, see `write_mesh`
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = os.path.join(tmp_dir, "mesh.msh")
+        _gmsh_write(tmp_path, file_format, binary, split=True)
+        paths = partition_paths(path, partitions, compress)
+        for part_path, target in zip(partition_paths(tmp_path, partitions), paths):  # noqa
+            if not compress:
+                shutil.move(part_path, target)
+                continue
+            with open(part_path, "rb") as src, gzip.open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+    return paths
+
+
+def write_mesh(target, file_format=None, binary=False, compress=False, data=None):  # noqa
+    """
+    Write the mesh of the current gmsh model (or a MeshData) to a file.
+
+    Parameters:
+    target (str or file object): The output path, or a binary file object / buffer.
+    file_format (str): One of "msh" (MSH 4.1), "msh2", "vtk", "med" (written by gmsh),
+        "vtu" or "xdmf" (written by fontmesher). Defaults to a guess from the file name.
+    binary (bool): Write MSH / VTK in binary instead of ASCII. Defaults to False.
+    compress (bool): Compress the output: gzip for gmsh formats, zlib blocks for VTU
+        and gzip datasets for XDMF. Defaults to False.
+    data (MeshData): The mesh to write for the fontmesher writers. Defaults to the
+        mesh of the current gmsh model.
+
+    Returns:
+    str: The path of the written file, or None when writing to a file object.
+    """
+    is_path = isinstance(target, (str, os.PathLike))
+    if file_format is None:
+        file_format = guess_file_format(target) if is_path else "msh"
+    if file_format not in file_formats:
+        raise ValueError(
+            f"Unknown file format {file_format!r}, expected one of {list(file_formats)}"  # noqa
+        )
+    writer = file_formats[file_format][1]
+
+    if writer == "xdmf":
+        if not is_path:
+            raise ValueError("XDMF output needs a path, it is written as two files")  # noqa
+        return write_xdmf(os.fspath(target), data or MeshData.from_gmsh(), compress)  # noqa
+
+    if writer == "vtu":
+        data = data or MeshData.from_gmsh()
+        if not is_path:
+            write_vtu(target, data, compress)
+            return None
+        with open(target, "wb") as f:
+            write_vtu(f, data, compress)
+        return os.fspath(target)
+
+    # gmsh only writes to paths, and picks its writer from the extension:
+    # write to a temporary file named for the format, then move or stream it
+    # (optionally gzipped) to the target
+    ext = file_formats[file_format][0]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = os.path.join(tmp_dir, f"mesh{ext}")
+        _gmsh_write(tmp_path, file_format, binary)
+        if is_path and not compress:
+            shutil.move(tmp_path, target)
+            return os.fspath(target)
+        with open(tmp_path, "rb") as src:
+            if is_path:
+                with gzip.open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                return os.fspath(target)
+            if compress:
+                with gzip.GzipFile(fileobj=target, mode="wb") as dst:
+                    shutil.copyfileobj(src, dst)
+            else:
+                shutil.copyfileobj(src, target)
+    return None
+
+
+def output_mesh(
+    string,
+    suffix="",
+    save_dir=".",
+    write=True,
+    return_data=False,
+    filename=None,
+    file_format=None,
+    binary=False,
+    compress=False,
+    file=None,
+    partitions=None,
+):
+    """
+    Write and/or extract the mesh of the current gmsh model, the way the
+    builders return it: the path of the written file (None if nothing was
+    written), or a MeshData if `return_data` is set. A mesh partitioned in
+    `partitions` parts is written as one file per part, and the path is the
+    list of their paths.
+    """
+    data = MeshData.from_gmsh() if return_data else None
+    save_path = None
+    partitioned = partitions is not None and partitions > 1
+    if file is not None:
+        if partitioned:
+            raise ValueError("Partitioned meshes are written as one file per part, they need a path")  # noqa
+        write_mesh(file, file_format, binary, compress, data)
+    elif write:
+        if filename is None:
+            filename = default_filename(string, suffix, file_format or "msh", compress)  # noqa
+        if partitioned:
+            save_path = write_partitions(
+                os.path.join(save_dir, filename), partitions, file_format, binary, compress  # noqa
+            )
+            logger.info("Mesh saved to %d partitions %s", partitions, save_path[0])  # noqa
+        else:
+            save_path = write_mesh(
+                os.path.join(save_dir, filename), file_format, binary, compress, data  # noqa
+            )
+            logger.info("Mesh saved to %s", save_path)
+    if return_data:
+        data.path = save_path
+        return data
+    return save_path
@@ -0,0 +1,183 @@
+# gmsh Mesh.Algorithm values
+algorithms_2d = {
+    "meshadapt": 1,
+    "automatic": 2,
+    "initial": 3,
+    "delaunay": 5,
+    "frontal-delaunay": 6,
+    "bamg": 7,
+    "frontal-delaunay-quads": 8,
+    "packing-parallelograms": 9,
+    "quasi-structured-quad": 11,
+}
+
+# gmsh Mesh.Algorithm3D values
+algorithms_3d = {
+    "delaunay": 1,
+    "initial": 3,
+    "frontal": 4,
+    "mmg3d": 7,
+    "rtree": 9,
+    "hxt": 10,
+}
+
+# gmsh Mesh.RecombinationAlgorithm values
+recombination_algorithms = {
+    "simple": 0,
+    "blossom": 1,
+    "simple-full-quad": 2,
+    "blossom-full-quad": 3,
+}
+
+# the 2D algorithm of recombined surfaces, its triangles pair up into good quads
+default_recombine_algorithm_2d = "frontal-delaunay-quads"
+
+
+def _algorithm_id(algorithm, algorithms, kind):
+    if isinstance(algorithm, int):
+        return algorithm
+    key = algorithm.lower().replace("_", "-").replace(" ", "-")
+    if key not in algorithms:
+        raise ValueError(
+            f"Unknown {kind} algorithm {algorithm!r}, expected one of {list(algorithms)}"  # noqa
+        )
+    return algorithms[key]
+
+
+def apply_mesh_options(num_threads=None, algorithm_2d=None, algorithm_3d=None):
+    """
+    Set the gmsh meshing options of the current session.
+
+    Only the options that are given are set, the others keep their current
+    value: gmsh's defaults (one thread, Frontal-Delaunay in 2D, Delaunay in
+    3D) or what the caller set before, e.g. the options of a `Mesher`.
+    HXT meshes volumes in parallel, the 2D algorithms parallelise over
+    surfaces.
+
+    Parameters:
+    num_threads (int): The number of threads gmsh may use (General.NumThreads), 0 for all CPUs.
+    algorithm_2d (str or int): The 2D algorithm, a name of `algorithms_2d` (e.g. "delaunay",
+        "frontal-delaunay", "packing-parallelograms") or a gmsh Mesh.Algorithm value.
+    algorithm_3d (str or int): The 3D algorithm, a name of `algorithms_3d` (e.g. "hxt", "delaunay")
+        or a gmsh Mesh.Algorithm3D value.
+    """
+    import gmsh
+
+    if num_threads is not None:
+        gmsh.option.setNumber("General.NumThreads", num_threads)
+    if algorithm_2d is not None:
+        gmsh.option.setNumber("Mesh.Algorithm", _algorithm_id(algorithm_2d, algorithms_2d, "2D"))  # noqa
+    if algorithm_3d is not None:
+        gmsh.option.setNumber("Mesh.Algorithm3D", _algorithm_id(algorithm_3d, algorithms_3d, "3D"))  # noqa
+
+
+def apply_recombination(surfaces, algorithm=None, algorithm_2d=None):
+    """
+    Recombine the triangles of surfaces of the current gmsh model into quadrangles.
+
+    The 2D algorithm is set on the surfaces themselves, so the session
+    option Mesh.Algorithm is left alone. The recombination algorithm is a
+    session option: it is set when given, and the previous values of the
+    options that were changed are returned so that the caller restores them
+    after meshing.
+
+    gmsh's own full-quad algorithms need an even number of edges around
+    every surface and still leave triangles at small outline features, so
+    the full-quad names recombine with the matching partial algorithm and
+    subdivide every element into quadrangles instead (Mesh.SubdivisionAlgorithm).
+    Subdividing halves the element size, Mesh.MeshSizeFactor is doubled to
+    make up for it; transfinite curves keep twice their number of elements.
+
+    Parameters:
+    surfaces (list): The surface tags.
+    algorithm (str or int): The recombination algorithm, a name of `recombination_algorithms`
+        ("blossom-full-quad" and "simple-full-quad" leave no triangles) or a gmsh
+        Mesh.RecombinationAlgorithm value. Defaults to None, gmsh's current setting (Blossom unless set before).
+    algorithm_2d (str or int): The 2D algorithm of the surfaces, see `apply_mesh_options`.
+        Defaults to `default_recombine_algorithm_2d`.
+
+    Returns:
+    dict: The previous values of the session options that were changed, by option name.
+    """
+    import gmsh
+
+    previous = {}
+
+    def set_option(name, value):
+        previous.setdefault(name, gmsh.option.getNumber(name))
+        gmsh.option.setNumber(name, value)
+
+    if algorithm is not None:
+        set_option("Mesh.RecombinationAlgorithm", _algorithm_id(
+            algorithm, recombination_algorithms, "recombination"
+        ))
+    algorithm_2d = _algorithm_id(
+        algorithm_2d if algorithm_2d is not None else default_recombine_algorithm_2d,
+        algorithms_2d, "2D",
+    )
+    for surface in surfaces:
+        gmsh.model.mesh.setAlgorithm(2, surface, algorithm_2d)
+        gmsh.model.mesh.setRecombine(2, surface)
+    full_quad = {
+        recombination_algorithms["simple-full-quad"]: recombination_algorithms["simple"],
+        recombination_algorithms["blossom-full-quad"]: recombination_algorithms["blossom"],
+    }
+    current = int(gmsh.option.getNumber("Mesh.RecombinationAlgorithm"))
+    if current in full_quad:
+        set_option("Mesh.RecombinationAlgorithm", full_quad[current])
+        set_option("Mesh.SubdivisionAlgorithm", 1)
+        set_option("Mesh.MeshSizeFactor", 2 * gmsh.option.getNumber("Mesh.MeshSizeFactor"))
+    return previous
+
+
+def start_model(name):
+    """
+    Make a new empty gmsh model the current one, initializing gmsh if
+    needed. A previous model of the same name is removed first, so that
+    repeated builds in one process do not accumulate models.
+    """
+    import gmsh
+
+    if not gmsh.isInitialized():
+        gmsh.initialize()
+    if name in gmsh.model.list():
+        gmsh.model.setCurrent(name)
+        gmsh.model.remove()
+    gmsh.model.add(name)
+
+
+def restart_gmsh():
+    """
+    Finalize and initialize gmsh again, dropping every model and option.
+
+    A build that fails inside gmsh can leave the session in a state where
+    later meshes come out empty, which `gmsh.clear()` does not undo. Call
+    this after a failed build before meshing again in the same process.
+    """
+    import gmsh
+
+    if gmsh.isInitialized():
+        gmsh.finalize()
+    gmsh.initialize()
+
+
+def partition_mesh(partitions):
+    """
+    Partition the mesh of the current gmsh model with gmsh's partitioner (METIS).
+
+    Every partition gets its own entities, with the physical groups of the
+    entities they come from, the partition interfaces as entities of lower
+    dimension, and a layer of ghost cells from its neighbours. Write the
+    parts with `fontmesher.mesh_io.write_partitions`.
+
+    Parameters:
+    partitions (int): The number of partitions.
+    """
+    import gmsh
+
+    if partitions < 2:
+        return
+    gmsh.option.setNumber("Mesh.PartitionCreateTopology", 1)
+    gmsh.option.setNumber("Mesh.PartitionCreatePhysicals", 1)
+    gmsh.option.setNumber("Mesh.PartitionCreateGhostCells", 1)
+    gmsh.model.mesh.partition(partitions)
@@ -0,0 +1,200 @@
+import json
+import os
+
+import numpy as np
+from fontTools.pens.recordingPen import DecomposingRecordingPen
+
+from fontmesher.utils import font_hash, get_font_boundaries
+
+pack_version = 1
+pack_suffix = ".fmpack"
+
+# drawing command -> code in the `commands` array; "qCurveToClosed" is a
+# qCurveTo ending in None, a TrueType contour without on-curve points
+command_codes = {
+    "moveTo": 0,
+    "lineTo": 1,
+    "qCurveTo": 2,
+    "curveTo": 3,
+    "closePath": 4,
+    "endPath": 5,
+    "qCurveToClosed": 6,
+}
+_command_names = {code: name for name, code in command_codes.items()}
+
+pack_arrays = (
+    "points", "commands", "command_offsets", "glyph_offsets",
+    "codepoints", "code_glyphs", "advances", "extents",
+)
+
+
+def is_outline_pack(path):
+    return os.path.isfile(os.path.join(os.fspath(path), "meta.json"))
+
+
+def compile_pack(font, path=None):
+    """
+    Compile the outlines of every character of a font into an outline pack.
+
+    A pack is a directory of flat .npy arrays that `OutlinePack` maps into
+    memory, so building geometry from it needs neither fontTools nor a copy
+    of the data, and forked workers share the pages:
+
+        points (P, 2)           outline points, normalized to [0, 1] with the font boundaries
+        commands (S,)           drawing command codes, see `command_codes`
+        command_offsets (S+1,)  the points of command i are points[command_offsets[i]:command_offsets[i+1]]
+        glyph_offsets (G+1,)    the commands of glyph j are commands[glyph_offsets[j]:glyph_offsets[j+1]]
+        codepoints (C,)         the sorted unicode code points of the cmap
+        code_glyphs (C,)        the glyph of every code point
+        advances (G,)           the normalized advance widths
+        extents (G, 4)          the normalized outline bounds, NaN for blank glyphs
+
+    plus a meta.json with the font hash and boundaries. Composite glyphs are
+    decomposed.
+
+    Parameters:
+    font (TTFont): The font, see `fontmesher.fonts.get_font`.
+    path (str): The pack directory. Defaults to the font file name with a ".fmpack" extension, in the
+        "packs" cache directory.
+
+    Returns:
+    str: The path of the pack.
+    """
+    from fontTools.pens.boundsPen import BoundsPen
+
+    from fontmesher.fonts import font_path_of
+    from fontmesher.utils import get_cache_dir
+
+    if path is None:
+        source = font_path_of(font) or font_hash(font)
+        name = os.path.splitext(os.path.basename(source))[0]
+        path = os.path.join(get_cache_dir("packs"), name + pack_suffix)
+
+    min_val, max_val = get_font_boundaries(font)
+    scale = 1.0 / (max_val - min_val)
+    glyph_set = font.getGlyphSet()
+    cmap = font.getBestCmap()
+    hmtx = font["hmtx"]
+
+    glyph_names = sorted(set(cmap.values()), key=font.getGlyphID)
+    glyph_index = {name: i for i, name in enumerate(glyph_names)}
+    points, commands, command_offsets, glyph_offsets = [], [], [0], [0]
+    advances = np.empty(len(glyph_names))
+    extents = np.full((len(glyph_names), 4), np.nan)
+    for i, name in enumerate(glyph_names):
+        pen = DecomposingRecordingPen(glyph_set)
+        glyph_set[name].draw(pen)
+        for command, args in pen.value:
+            if command == "qCurveTo" and args[-1] is None:
+                command, args = "qCurveToClosed", args[:-1]
+            commands.append(command_codes[command])
+            points.extend(args)
+            command_offsets.append(len(points))
+        glyph_offsets.append(len(commands))
+        advances[i] = hmtx[name][0] * scale
+        bounds_pen = BoundsPen(glyph_set)
+        glyph_set[name].draw(bounds_pen)
+        if bounds_pen.bounds is not None:
+            extents[i] = (np.asarray(bounds_pen.bounds) - min_val) * scale
+
+    codepoints = np.array(sorted(cmap), dtype=np.int64)
+    arrays = {
+        "points": (np.asarray(points, dtype=np.float64).reshape(-1, 2) - min_val) * scale,  # noqa
+        "commands": np.asarray(commands, dtype=np.int8),
+        "command_offsets": np.asarray(command_offsets, dtype=np.int64),
+        "glyph_offsets": np.asarray(glyph_offsets, dtype=np.int64),
+        "codepoints": codepoints,
+        "code_glyphs": np.array([glyph_index[cmap[c]] for c in codepoints], dtype=np.int64),  # noqa
+        "advances": advances,
+        "extents": extents,
+    }
+
+    os.makedirs(path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(array))
+    meta = {
+        "version": pack_version,
+        "font_hash": font_hash(font),
+        "boundaries": [min_val, max_val],
+        "units_per_em": font["head"].unitsPerEm,
+        "num_glyphs": len(glyph_names),
+    }
+    # meta.json marks a complete pack, write it last
+    tmp_path = os.path.join(path, f"meta.json.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f, indent=1)
+    os.replace(tmp_path, os.path.join(path, "meta.json"))
+    return path
+
+
+class OutlinePack:
+    """
+    The glyph outlines of a font, read from a pack compiled by `compile_pack`.
+
+    The arrays are memory-mapped read-only, so opening a pack costs no
+    parsing and processes forked after opening share it. An OutlinePack can
+    be passed as the font of the builders in place of a TTFont: it draws
+    glyphs on pens like GlyphCache, with points normalized to [0, 1].
+
+    Attributes:
+        path (str): The pack directory.
+        meta (dict): The font hash, the original font boundaries and the pack version.
+        boundaries (tuple): The (min_val, max_val) of the normalized points, (0.0, 1.0).
+        pack_hash (str): The content hash of the pack, used by the mesh cache.
+    Methods:
+        glyph(char):
+            Return the pack index of the glyph of a character.
+        draw(char, pen):
+            Draw a character on a pen.
+        advance(char):
+            Return the normalized advance width of a character.
+        bounds(char):
+            Return the normalized outline bounds of a character, or None for a blank glyph.
+    """
+    boundaries = (0.0, 1.0)
+
+    def __init__(self, path):
+        self.path = os.path.abspath(os.fspath(path))
+        with open(os.path.join(self.path, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta["version"] != pack_version:
+            raise ValueError(
+                f"Outline pack {self.path!r} has version {self.meta['version']}, expected {pack_version}, recompile it"  # noqa
+            )
+        for name in pack_arrays:
+            setattr(self, name, np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r"))  # noqa
+        self.pack_hash = f"{self.meta['font_hash']}-pack{pack_version}"
+
+    def glyph(self, char):
+        code = ord(char)
+        i = int(np.searchsorted(self.codepoints, code))
+        if i == len(self.codepoints) or self.codepoints[i] != code:
+            raise KeyError(code)
+        return int(self.code_glyphs[i])
+
+    def draw(self, char, pen):
+        glyph = self.glyph(char)
+        start, end = self.glyph_offsets[glyph], self.glyph_offsets[glyph + 1]
+        offsets = self.command_offsets[start:end + 1].tolist()
+        # one conversion per glyph instead of one per point
+        points = [tuple(pt) for pt in self.points[offsets[0]:offsets[-1]].tolist()]
+        base = offsets[0]
+        for code, a, b in zip(self.commands[start:end].tolist(), offsets[:-1], offsets[1:]):  # noqa
+            name = _command_names[code]
+            args = points[a - base:b - base]
+            if name == "qCurveToClosed":
+                pen.qCurveTo(*args, None)
+            else:
+                getattr(pen, name)(*args)
+
+    def advance(self, char):
+        return float(self.advances[self.glyph(char)])
+
+    def bounds(self, char):
+        extents = self.extents[self.glyph(char)]
+        if np.isnan(extents[0]):
+            return None
+        return tuple(float(v) for v in extents)
+
+    def __repr__(self):
+        return f"OutlinePack({self.path!r}, {self.meta['num_glyphs']} glyphs)"
@@ -0,0 +1,148 @@
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class MeshResult:
+    """
+    The result of a mesh build, with its metrics.
+
+    Attributes:
+        path (str): The path of the written mesh file, or None.
+        data (MeshData): The mesh arrays, if they were requested.
+        timings (dict): The wall time in seconds of every phase, in order
+            ("font_load", "boundaries", "geometry", "synchronize", "generate", "write").
+        counts (dict): The number of geometric entities and mesh elements per
+            dimension and the number of nodes, e.g. {"entities_2": 7, "elements_2": 1312, "nodes": 702}.
+        peak_memory (int): The peak resident memory in bytes, or None if unknown. See `memory_scope`.
+        memory_scope (str): "build" if `peak_memory` is the peak during this build (Linux, where the
+            high-water mark can be reset), "process" if it is the peak of the process since it started.
+    """
+    def __init__(self, path, data, timings, counts, peak_memory, memory_scope="process"):  # noqa
+        self.path = path
+        self.data = data
+        self.timings = timings
+        self.counts = counts
+        self.peak_memory = peak_memory
+        self.memory_scope = memory_scope
+
+    @property
+    def total_time(self):
+        return sum(self.timings.values())
+
+    def __repr__(self):
+        timings = ", ".join(f"{k}={v * 1e3:.1f}ms" for k, v in self.timings.items())  # noqa
+        return f"MeshResult(path={self.path!r}, {timings}, counts={self.counts})"  # noqa
+
+
+class PhaseTimer:
+    """
+    Times the phases of a build. With `track_memory`, for builds that report
+    their metrics (`return_result`), it also resets the memory high-water
+    mark of the process; that touches process state, so it is off otherwise.
+
+    Attributes:
+        timings (dict): The accumulated seconds per phase.
+        hook (callable): Called as hook(phase, seconds) after every phase, e.g. to feed a profiler.
+        memory_scope (str): "build" if the memory high-water mark was reset when the timer was
+            created (`track_memory`), so `peak_memory` covers this build only, else "process".
+    Methods:
+        phase(name):
+            Context manager timing one phase.
+    """
+    def __init__(self, hook=None, track_memory=False):
+        self.timings = {}
+        self.hook = hook
+        self.memory_scope = "build" if track_memory and reset_peak_memory() else "process"
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        yield
+        seconds = time.perf_counter() - start
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        logger.debug("phase %s took %.1f ms", name, seconds * 1e3)
+        if self.hook is not None:
+            self.hook(name, seconds)
+
+
+def reset_peak_memory():
+    """
+    Reset the peak resident memory of the process to its current value, so
+    that `peak_memory` measures from now on. Returns whether it was reset,
+    which needs Linux (/proc/self/clear_refs).
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def peak_memory():
+    """
+    Return the peak resident memory of the current process in bytes, since
+    it started or since the last `reset_peak_memory`, or None where neither
+    /proc nor the resource module is available (Windows).
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    import sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current_memory():
+    """
+    Return the current resident memory of the process in bytes, or None
+    where /proc is unavailable (non-Linux).
+    """
+    import os
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def mesh_counts():
+    """
+    Count the geometric entities and mesh elements of the current gmsh model.
+    """
+    import gmsh
+
+    counts = {}
+    for dim in range(4):
+        counts[f"entities_{dim}"] = len(gmsh.model.getEntities(dim))
+        counts[f"elements_{dim}"] = int(sum(
+            len(tags) for tags in gmsh.model.mesh.getElements(dim)[1]
+        ))
+    counts["nodes"] = len(gmsh.model.mesh.getNodes()[0])
+    return counts
+
+
+def make_result(output, timer):
+    """
+    Bundle the return value of `output_mesh` with the metrics of a build.
+    """
+    from fontmesher.mesh_data import MeshData
+
+    data = output if isinstance(output, MeshData) else None
+    path = data.path if data is not None else output
+    return MeshResult(
+        path, data, dict(timer.timings), mesh_counts(), peak_memory(), timer.memory_scope,
+    )
@@ -0,0 +1,410 @@
+import http.client
+import io
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fontmesher.batch import _get_builder, _init_worker
+from fontmesher.fonts import default_font_name
+from fontmesher.mesh_io import file_formats
+
+logger = logging.getLogger(__name__)
+
+# builder arguments a request may not set, the server decides where the mesh goes
+reserved_args = {
+    "string", "font", "save_dir", "write", "return_data", "filename", "file",
+    "file_format", "binary", "compress", "profile", "return_result", "cache",
+    "partitions",
+}
+
+default_port = 8765
+
+
+def _init_server_worker(fonts):
+    for font in fonts:
+        _init_worker(font)
+
+
+def _mesh_job(kind, string, font, params, file_format, binary, compress, arrays):
+    """
+    Build one mesh inside a worker process and return its bytes: the mesh
+    file, or the npz of its MeshData when `arrays` is set. gmsh is
+    restarted when the build fails, so the next job of the worker gets a
+    working session.
+    """
+    import gmsh
+
+    from fontmesher.options import restart_gmsh
+
+    builder = _get_builder(kind)
+    buffer = io.BytesIO()
+    try:
+        if arrays:
+            data = builder(string, font=font, write=False, return_data=True, **params)  # noqa
+            data.save(buffer)
+        else:
+            builder(
+                string, font=font, file=buffer, file_format=file_format,
+                binary=binary, compress=compress, **params
+            )
+    except BaseException:
+        restart_gmsh()
+        raise
+    finally:
+        # drop the model so the worker does not accumulate them
+        gmsh.clear()
+    return buffer.getvalue()
+
+
+class RequestError(Exception):
+    """
+    An invalid mesh request, answered with the given HTTP status.
+    """
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class MeshService:
+    """
+    A pool of warm worker processes that builds meshes for the server.
+
+    Every worker initializes gmsh and loads the fonts once. At most `workers`
+    meshes are built at a time and up to `max_queue` more wait for a worker;
+    further requests are rejected right away (backpressure) instead of
+    piling up.
+
+    Attributes:
+        workers (int): The number of worker processes.
+        max_queue (int): The number of requests that may wait for a worker.
+        timeout (float): The seconds a request may take, queueing included, or None.
+        fonts (list): The fonts loaded by every worker at start-up.
+        served (int): The number of meshes built so far.
+        failed (int): The number of accepted requests that failed so far.
+        rejected (int): The number of requests rejected because the queue was full.
+    Methods:
+        submit(request):
+            Build the mesh of a request (a dict) and return (bytes, content type).
+        stats():
+            Return the state of the service as a dict.
+        close():
+            Shut the worker pool down.
+    """
+    def __init__(self, workers=None, max_queue=None, timeout=None, fonts=None, mp_context=None):  # noqa
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = self.workers * 4 if max_queue is None else max_queue
+        self.timeout = timeout
+        self.fonts = list(fonts or [default_font_name])
+        self.mp_context = mp_context
+        self.served = 0
+        self.failed = 0
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._pool = self._start_pool()
+
+    def _start_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self.mp_context,
+            initializer=_init_server_worker,
+            initargs=(self.fonts,),
+        )
+
+    def _restart_pool(self, broken):
+        with self._lock:
+            if self._pool is broken:
+                logger.warning("worker pool broke, restarting it")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._start_pool()
+
+    def _parse(self, request):
+        string = request.get("string")
+        if not isinstance(string, str) or not string:
+            raise RequestError(400, "'string' must be a non-empty string")
+        dim = request.get("dim", 2)
+        # 2.0 and True compare equal to 2
+        if type(dim) is not int or dim not in (2, 3):
+            raise RequestError(400, f"'dim' must be 2 or 3, got {dim!r}")
+        params = request.get("params", {})
+        if not isinstance(params, dict):
+            raise RequestError(400, "'params' must be an object")
+        reserved = sorted(reserved_args & set(params))
+        if reserved:
+            raise RequestError(400, f"'params' may not set {reserved}")
+        # the pool already uses every core
+        params = dict(params)
+        params.setdefault("num_threads", 1)
+        file_format = request.get("format", "msh")
+        arrays = file_format == "npz"
+        if not arrays and (file_format not in file_formats or file_format == "xdmf"):
+            raise RequestError(400, f"Unknown format {file_format!r}, expected 'npz' or one of {[f for f in file_formats if f != 'xdmf']}")  # noqa
+        return (
+            f"{dim}d", string, request.get("font") or self.fonts[0], params,
+            None if arrays else file_format, bool(request.get("binary", False)),
+            bool(request.get("compress", False)), arrays,
+        )
+
+    def submit(self, request):
+        """
+        Build the mesh of a request and return (bytes, content type).
+
+        Raises RequestError for invalid requests (400), a full queue (503),
+        a timeout (504) or a failed build (500).
+        """
+        job = self._parse(request)
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise RequestError(503, "The mesh queue is full, retry later")
+        start = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            try:
+                pool = self._pool
+                future = pool.submit(_mesh_job, *job)
+            except BaseException:
+                self._release()
+                raise
+            # the slot is freed when the work really ends: a job that timed
+            # out keeps its worker busy until it finishes
+            future.add_done_callback(self._release)
+            try:
+                payload = future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                future.cancel()  # only stops a job still waiting for a worker
+                raise RequestError(504, f"The mesh took longer than {self.timeout} s")  # noqa
+            except BrokenProcessPool:
+                self._restart_pool(pool)
+                raise RequestError(500, "A worker died while meshing, retry later")  # noqa
+            except Exception as e:  # noqa: BLE001 - reported back to the client
+                raise RequestError(500, f"{type(e).__name__}: {e}")
+        except BrokenProcessPool:
+            # the pool broke before the job was submitted
+            self._restart_pool(pool)
+            with self._lock:
+                self.failed += 1
+            raise RequestError(500, "A worker died while meshing, retry later")  # noqa
+        except RequestError:
+            with self._lock:
+                self.failed += 1
+            raise
+        with self._lock:
+            self.served += 1
+        logger.debug("meshed %r in %.1f ms", job[1], (time.perf_counter() - start) * 1e3)  # noqa
+        content_type = "application/x-npz" if job[-1] else "application/octet-stream"  # noqa
+        return payload, content_type
+
+    def _release(self, future=None):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "served": self.served,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "fonts": self.fonts,
+            }
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+class MeshRequestHandler(BaseHTTPRequestHandler):
+    """
+    The HTTP interface of a MeshService:
+
+        POST /mesh    a JSON request, answered with the mesh bytes
+        GET /health   the state of the service as JSON
+
+    A mesh request is a JSON object with "string", and optionally "font",
+    "dim" (2 or 3), "format" ("msh", "msh2", "vtk", "med", "vtu" or "npz"
+    for the MeshData arrays), "binary", "compress" and "params" (further
+    arguments of `make_string_mesh` / `make_string_mesh3d`, e.g. "lc").
+    """
+    server_version = "fontmesher"
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"  # noqa
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+    def _reply(self, status, body, content_type="application/json", headers=()):  # noqa
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _reply_json(self, status, obj, headers=()):
+        self._reply(status, json.dumps(obj).encode(), headers=headers)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply_json(200, self.server.service.stats())
+        else:
+            self._reply_json(404, {"error": f"Unknown path {self.path!r}"})
+
+    def do_POST(self):
+        if self.path != "/mesh":
+            self._reply_json(404, {"error": f"Unknown path {self.path!r}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise RequestError(400, "The request must be a JSON object")
+            payload, content_type = self.server.service.submit(request)
+        except ValueError as e:
+            self._reply_json(400, {"error": f"Invalid JSON: {e}"})
+        except RequestError as e:
+            headers = [("Retry-After", "1")] if e.status == 503 else []
+            self._reply_json(e.status, {"error": str(e)}, headers)
+        else:
+            self._reply(200, payload, content_type)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, host="127.0.0.1", port=default_port, socket_path=None):
+    """
+    Create the HTTP server of a MeshService, on a TCP port or a Unix socket.
+    """
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, MeshRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), MeshRequestHandler)
+        server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def serve(
+    host="127.0.0.1",
+    port=default_port,
+    socket_path=None,
+    workers=None,
+    max_queue=None,
+    timeout=None,
+    fonts=None,
+):
+    """
+    Run a mesh server until interrupted.
+
+    Parameters:
+    host (str): The address to listen on. Defaults to "127.0.0.1".
+    port (int): The TCP port. Defaults to 8765.
+    socket_path (str): Listen on this Unix socket instead of TCP. Defaults to None.
+    workers (int): The number of worker processes, i.e. meshes built at a time. Defaults to the number of CPUs.
+    max_queue (int): The number of requests that may wait for a worker, more are answered with
+        503 Service Unavailable. Defaults to 4 per worker.
+    timeout (float): The seconds a request may take before it is answered with 504 Gateway Timeout.
+        Defaults to None (no limit).
+    fonts (list): The fonts every worker loads at start-up, the first one is the default font of requests.
+        Defaults to the bundled default font.
+    """
+    service = MeshService(workers, max_queue, timeout, fonts)
+    server = make_server(service, host, port, socket_path)
+    where = socket_path or f"http://{host}:{port}"
+    logger.info("serving meshes on %s with %d workers", where, service.workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def request_mesh(
+    string,
+    font=None,
+    dim=2,
+    file_format="msh",
+    binary=False,
+    compress=False,
+    host="127.0.0.1",
+    port=default_port,
+    socket_path=None,
+    timeout=None,
+    **params,
+):
+    """
+    Request a mesh from a running server.
+
+    Parameters:
+    string (str): The string to be meshed.
+    font (str): A font name or path known to the server. Defaults to the default font of the server.
+    dim (int): 2 or 3. Defaults to 2.
+    file_format (str): The file format, or "npz" for the MeshData arrays. Defaults to "msh".
+    binary (bool): Write MSH / VTK files in binary. Defaults to False.
+    compress (bool): Compress the mesh file. Defaults to False.
+    host, port, socket_path: The address of the server.
+    timeout (float): The socket timeout in seconds. Defaults to None.
+    **params: Further arguments of `make_string_mesh` / `make_string_mesh3d`, e.g. `lc`.
+
+    Returns:
+    bytes: The mesh file, or
+    MeshData: the mesh arrays if `file_format` is "npz".
+    """
+    if socket_path is not None:
+        connection = _UnixHTTPConnection(socket_path, timeout)
+    else:
+        connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    body = json.dumps({
+        "string": string, "font": font, "dim": dim, "format": file_format,
+        "binary": binary, "compress": compress, "params": params,
+    })
+    try:
+        connection.request("POST", "/mesh", body, {"Content-Type": "application/json"})  # noqa
+        response = connection.getresponse()
+        payload = response.read()
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise RuntimeError(
+            f"Mesh request failed with {response.status}: {json.loads(payload)['error']}"  # noqa
+        )
+    if file_format == "npz":
+        from fontmesher.mesh_data import MeshData
+        return MeshData.load(io.BytesIO(payload))
+    return payload
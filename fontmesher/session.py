@@ -0,0 +1,138 @@
+import logging
+
+from fontmesher.fonts import get_font
+from fontmesher.options import apply_mesh_options, restart_gmsh
+
+logger = logging.getLogger(__name__)
+
+
+class Mesher:
+    """
+    A gmsh session for many meshes in one process.
+
+    gmsh is initialized once when the session opens (unless it already
+    was), the options are set once, and the gmsh models are cleared after
+    every job, so memory stays flat over thousands of meshes. A failed job
+    restarts gmsh and sets the options again. The session finalizes gmsh
+    when it closes, if it initialized it.
+
+        with Mesher(font="Rebelion", lc=0.05, num_threads=4) as mesher:
+            for word in words:
+                mesher.mesh(word, save_dir="meshes")
+
+    Attributes:
+        font: The default font of the jobs, a TTFont, OutlinePack, name or path. Defaults to `default_font`.
+        options (dict): Further gmsh options set once and kept by every job, e.g. {"Mesh.Smoothing": 5}.
+            The jobs only set the meshing options they are given, e.g. `algorithm_2d`.
+        defaults (dict): Default arguments of every job, e.g. lc, num_threads, algorithm_2d.
+        terminal (bool): Whether gmsh prints to the terminal. Defaults to False, fontmesher logs instead.
+        jobs (int): The number of jobs run so far.
+    Methods:
+        open():
+            Initialize gmsh and set the options, called by `with`.
+        close():
+            Clear the models, and finalize gmsh if the session initialized it.
+        run(builder, string, **kwargs):
+            Run a builder (e.g. `make_string_mesh`) and clear the models afterwards.
+        mesh(string, **kwargs):
+            Build a 2D mesh, see `make_string_mesh`.
+        mesh3d(string, **kwargs):
+            Build a 3D mesh, see `make_string_mesh3d`.
+        reset():
+            Drop every gmsh model, the options are kept.
+    """
+    def __init__(self, font=None, options=None, terminal=False, **defaults):
+        self.font = font
+        self.options = dict(options or {})
+        self.defaults = defaults
+        self.terminal = terminal
+        self.jobs = 0
+        self._owns_gmsh = False
+        self._open = False
+
+    def open(self):
+        import gmsh
+
+        if self._open:
+            return self
+        if not gmsh.isInitialized():
+            gmsh.initialize()
+            self._owns_gmsh = True
+        self._apply_options()
+        # parse the font (and its boundaries) once for all jobs
+        self.font = get_font(self.font)
+        self._open = True
+        return self
+
+    def _apply_options(self):
+        import gmsh
+
+        gmsh.option.setNumber("General.Terminal", int(self.terminal))
+        apply_mesh_options(
+            self.defaults.get("num_threads"),
+            self.defaults.get("algorithm_2d"),
+            self.defaults.get("algorithm_3d"),
+        )
+        for name, value in self.options.items():
+            if isinstance(value, str):
+                gmsh.option.setString(name, value)
+            else:
+                gmsh.option.setNumber(name, value)
+
+    def close(self):
+        import gmsh
+
+        if not self._open:
+            return
+        self._open = False
+        if self._owns_gmsh:
+            gmsh.finalize()
+            self._owns_gmsh = False
+        else:
+            self.reset()
+        logger.debug("mesher closed after %d jobs", self.jobs)
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def reset(self):
+        import gmsh
+
+        if gmsh.isInitialized():
+            gmsh.clear()
+
+    def run(self, builder, string, **kwargs):
+        """
+        Run a builder with the session font and defaults, then clear the
+        gmsh models. gmsh is restarted, with the session options, if the
+        builder raises. Returns the output of the builder.
+        """
+        if not self._open:
+            self.open()
+        kwargs = {"font": self.font, **self.defaults, **kwargs}
+        try:
+            return builder(string, **kwargs)
+        except BaseException:
+            # a failed build can break the gmsh session for later jobs
+            logger.debug("job %d failed, restarting gmsh", self.jobs)
+            restart_gmsh()
+            self._apply_options()
+            raise
+        finally:
+            self.reset()
+            self.jobs += 1
+
+    def mesh(self, string, **kwargs):
+        from fontmesher.font_tools import make_string_mesh
+        return self.run(make_string_mesh, string, **kwargs)
+
+    def mesh3d(self, string, **kwargs):
+        from fontmesher.font_tools_3d import make_string_mesh3d
+        return self.run(make_string_mesh3d, string, **kwargs)
+
+    def __repr__(self):
+        state = "open" if self._open else "closed"
+        return f"Mesher({state}, {self.jobs} jobs)"
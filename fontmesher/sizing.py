@@ -0,0 +1,48 @@
+def apply_distance_sizing(
+    dim,
+    tags,
+    lc_min,
+    lc_max,
+    growth_distance,
+    dist_min=0.0,
+    sampling=None,
+):
+    """
+    Grade the mesh size with the distance to the glyph outlines.
+
+    A gmsh Distance field is attached to the given entities and fed into a
+    Threshold field used as background mesh: the element size is `lc_min`
+    up to `dist_min` away from the entities, grows linearly to `lc_max`
+    over `growth_distance`, and stays `lc_max` in the far field. Point
+    sizes still apply, gmsh takes the minimum of both.
+
+    Parameters:
+    dim (int): The dimension of the entities, 1 for the object curves (2D) or 2 for the object surfaces (3D).
+    tags (list): The tags of the entities to measure the distance to.
+    lc_min (float): The element size on the glyph outlines.
+    lc_max (float): The element size far from the glyphs.
+    growth_distance (float): The distance over which the size grows from `lc_min` to `lc_max`.
+    dist_min (float): The distance up to which the size stays `lc_min`. Defaults to 0.
+    sampling (int): The number of samples per entity (and direction) of the Distance field.
+        Defaults to 20.
+
+    Returns:
+    int: The tag of the Threshold field.
+    """
+    import gmsh
+
+    field = gmsh.model.mesh.field
+
+    distance = field.add("Distance")
+    field.setNumbers(distance, "CurvesList" if dim == 1 else "SurfacesList", list(tags))  # noqa
+    field.setNumber(distance, "Sampling", sampling or 20)
+
+    threshold = field.add("Threshold")
+    field.setNumber(threshold, "InField", distance)
+    field.setNumber(threshold, "SizeMin", lc_min)
+    field.setNumber(threshold, "SizeMax", lc_max)
+    field.setNumber(threshold, "DistMin", dist_min)
+    field.setNumber(threshold, "DistMax", dist_min + growth_distance)
+
+    field.setAsBackgroundMesh(threshold)
+    return threshold
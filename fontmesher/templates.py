@@ -0,0 +1,269 @@
+import logging
+import os
+import time
+
+import numpy as np
+
+from fontmesher.cache import _get_cache, _remove
+from fontmesher.font_tools import add_glyphs, glyph_curves_tag
+from fontmesher.fonts import get_font
+from fontmesher.glyphs import glyph_source
+from fontmesher.layout import layout_text
+from fontmesher.mesh_data import MeshData
+from fontmesher.mesh_io import output_mesh
+from fontmesher.options import apply_mesh_options, start_model
+from fontmesher.profiling import PhaseTimer, make_result
+from fontmesher.sizing import apply_distance_sizing
+from fontmesher.tiled import _divisions
+
+logger = logging.getLogger(__name__)
+
+
+def cell_shift(placements, glyph_offset):
+    """
+    Return the left end of the glyph cells relative to the glyph positions.
+
+    All cells are `glyph_offset` wide and are shifted by the same amount, so
+    that the glyph outlines of the string are centred in their cells.
+    """
+    inked = [p for p in placements if p.x_min is not None]
+    if not inked:
+        return 0.0
+    left = min(p.x_min - p.x for p in inked)
+    right = max(p.x_max - p.x for p in inked)
+    if right - left >= glyph_offset:
+        raise ValueError(
+            f"The glyphs are {right - left:.3g} wide, more than glyph_offset={glyph_offset}: they do not fit in cells, use make_string_mesh"  # noqa
+        )
+    return (left + right - glyph_offset) / 2
+
+
+def _mesh_template(char, width, shift, params):
+    """
+    Mesh one cell of height `params["height"]` in the current gmsh session
+    and return its MeshData in cell coordinates, with the glyph of `char`
+    (None for a padding cell) at x = -`shift`. The vertical edges get the
+    same fixed number of elements in every cell, so translated cells match.
+    """
+    import gmsh
+
+    lc = params["lc"]
+    height = params["height"]
+    start_model("template")
+    try:
+        geo = gmsh.model.geo
+        points = [
+            geo.addPoint(x, y, 0, lc)
+            for x, y in ((0, 0), (width, 0), (width, height), (0, height))
+        ]
+        bottom, right, top, left = [
+            geo.addLine(points[i], points[(i + 1) % 4]) for i in range(4)
+        ]
+        divisions = _divisions(height, lc)
+        for line in (right, left):
+            geo.mesh.setTransfiniteCurve(line, divisions + 1)
+
+        object_curves, object_surface_loop = [], []
+        if char is not None:
+            object_curves, object_surface_loop = add_glyphs(
+                [(0, char, (-shift, params["pad_y_start"]))],
+                params["glyphs"], params["min_val"], params["max_val"], lc,
+                params["glyph_size"], params["curve_mode"], params["curve_tolerance"],  # noqa
+            )
+        surface = geo.addPlaneSurface(
+            [geo.addCurveLoop([bottom, right, top, left])] + object_surface_loop
+        )
+
+        geo.addPhysicalGroup(1, [bottom, top], 1, name="wall")
+        # only the end cells keep these, see `_place`
+        geo.addPhysicalGroup(1, [left], 2, name="inflow")
+        geo.addPhysicalGroup(1, [right], 3, name="outflow")
+        if object_curves:
+            geo.addPhysicalGroup(1, object_curves, 4, name="object")
+        geo.addPhysicalGroup(2, [surface], 9, name="whole_domain")
+        geo.synchronize()
+
+        if params["lc_min"] is not None and object_curves:
+            apply_distance_sizing(
+                1, object_curves, params["lc_min"], lc, params["growth_distance"]
+            )
+        apply_mesh_options(params["num_threads"], params["algorithm_2d"])
+        gmsh.model.mesh.generate(2)
+        return MeshData.from_gmsh().physical_only()
+    finally:
+        gmsh.model.remove()
+
+
+def _place(template, x, index=None, first=False, last=False):
+    """
+    A copy of a template translated by `x`, with the `curves_of_<char>` group
+    tagged for the glyph at `index` and the inflow / outflow groups kept
+    only at the ends of the domain.
+    """
+    groups = []
+    for group in template.physical_groups:
+        if group.tag == 2 and not first or group.tag == 3 and not last:
+            continue
+        if group.tag == glyph_curves_tag:
+            group = group._replace(tag=glyph_curves_tag + index)
+        groups.append(group)
+    entities = {(g.dim, int(entity)) for g in groups for entity in g.entities}
+    blocks = [
+        block for block in template.blocks if (block.dim, block.entity) in entities
+    ]
+    nodes = template.nodes + np.array([x, 0.0, 0.0])
+    return MeshData(nodes, template.node_tags, blocks, groups)
+
+
+def _cached_template(cache, font, char, width, shift, params):
+    if cache is None:
+        return _mesh_template(char, width, shift, params)
+    key = cache.key("template", font, dict(
+        {k: v for k, v in params.items() if k not in ("glyphs", "min_val", "max_val", "num_threads")},  # noqa
+        char=char, width=width, shift=shift,
+    ))
+    path = cache.get(key, "npz")
+    if path is not None:
+        try:
+            return MeshData.load(path)
+        except FileNotFoundError:
+            pass  # evicted in between
+    template = _mesh_template(char, width, shift, params)
+    tmp_path = os.path.join(cache.directory, f"{key}.{os.getpid()}.{time.monotonic_ns()}.tmp.npz")  # noqa
+    try:
+        template.save(tmp_path)
+        cache.put(key, "npz", tmp_path)
+    except BaseException:
+        _remove(tmp_path)
+        raise
+    return template
+
+
+def make_template_mesh(
+    string,
+    font=None,
+    save_dir=".",
+    lc=0.1,
+    glyph_size=0.5,
+    pad_y_start=0.25,
+    pad_y_end=0.25,
+    pad_x_start=0.8,
+    pad_x_end=0.8,
+    glyph_offset=0.5,
+    write=True,
+    return_data=False,
+    filename=None,
+    file_format=None,
+    binary=False,
+    compress=False,
+    file=None,
+    lc_min=None,
+    lc_max=None,
+    growth_distance=None,
+    num_threads=None,
+    algorithm_2d=None,
+    profile=None,
+    return_result=False,
+    curve_mode="bezier",
+    curve_tolerance=None,
+    cache=None,
+):
+    """
+    Generates the 2D mesh of `make_string_mesh` by meshing every unique character once and assembling copies.
+
+    The domain is split into one cell per character, `glyph_offset` wide and as tall as the domain, plus the
+    padding before and after. The cell of every unique character and the two padding cells are meshed once as
+    templates, with the same fixed discretization of all vertical cell edges. Translated copies of the templates
+    are merged into one conforming mesh, joining the nodes of shared edges, so the meshing time depends on the
+    alphabet of the string rather than its length. The physical groups are the ones of `make_string_mesh`.
+
+    Parameters:
+    string (str): The string to be meshed, on one line.
+    font (Font): The font to be used, either a TTFont or a bundled font name / font path. Defaults to `default_font`.
+    lc_min (float): If given, grade the element size with the distance to the glyph of each cell, see
+        `make_string_mesh`. The cell edges keep elements of size `lc_max`.
+    cache (bool, str or MeshCache): Store the templates in a mesh cache and reuse them across calls: True for the
+        default cache, a cache directory, or a `fontmesher.cache.MeshCache`. Defaults to None.
+    The other parameters are the ones of `make_string_mesh`.
+
+    Returns:
+    str: The path to the saved mesh file (None if `write` is False), or
+    MeshData: the nodes, element connectivity and physical groups of the mesh if `return_data` is True, or
+    MeshResult: the output and metrics of the build if `return_result` is True.
+    """
+    if not string or "\n" in string:
+        raise ValueError("make_template_mesh meshes one non-empty line, use make_text_mesh for text")  # noqa
+
+    timer = PhaseTimer(profile, return_result)
+    with timer.phase("font_load"):
+        font = get_font(font)
+    if lc_min is not None:
+        lc = lc_max if lc_max is not None else lc
+        if growth_distance is None:
+            growth_distance = glyph_size / 2
+    with timer.phase("boundaries"):
+        glyphs, min_val, max_val = glyph_source(font)
+
+    with timer.phase("layout"):
+        placements, _ = layout_text(
+            string, glyphs, min_val, max_val,
+            glyph_size=glyph_size,
+            glyph_offset=glyph_offset,
+            origin=(pad_x_start, pad_y_start),
+        )
+        shift = cell_shift(placements, glyph_offset)
+        start_width = pad_x_start + shift
+        end_width = pad_x_end - shift
+        if start_width <= 0 or end_width <= 0:
+            raise ValueError("The padding is too small for the glyph cells, increase pad_x_start / pad_x_end")  # noqa
+
+    params = {
+        "lc": lc,
+        "height": pad_y_start + glyph_size + pad_y_end,
+        "pad_y_start": pad_y_start,
+        "glyph_size": glyph_size,
+        "glyphs": glyphs,
+        "min_val": min_val,
+        "max_val": max_val,
+        "lc_min": lc_min,
+        "growth_distance": growth_distance,
+        "num_threads": num_threads,
+        "algorithm_2d": algorithm_2d,
+        "curve_mode": curve_mode,
+        "curve_tolerance": curve_tolerance,
+    }
+    cache = _get_cache(cache) if cache else None
+    with timer.phase("generate"):
+        templates = {
+            char: _cached_template(cache, font, char, glyph_offset, shift, params)
+            for char in dict.fromkeys(string)
+        }
+        start_template = _cached_template(cache, font, None, start_width, 0.0, params)  # noqa
+        end_template = _cached_template(cache, font, None, end_width, 0.0, params)
+    if cache is not None:
+        cache.evict()
+    logger.debug(
+        "meshed %d templates for %d glyphs", len(templates) + 2, len(placements)
+    )
+
+    with timer.phase("merge"):
+        cells = [_place(start_template, 0.0, first=True)]
+        cells.extend(
+            _place(templates[p.char], p.x + shift, index=p.index)
+            for p in placements
+        )
+        cells.append(_place(end_template, pad_x_start + len(string) * glyph_offset + shift, last=True))  # noqa
+        data = MeshData.merge(cells, tol=1e-7)
+        start_model("template_mesh")
+        data.to_gmsh()
+    with timer.phase("write"):
+        output = output_mesh(
+            string, "", save_dir, write, return_data,
+            filename, file_format, binary, compress, file,
+        )
+    logger.debug(
+        "meshed %r in %.1f ms", string, sum(timer.timings.values()) * 1e3
+    )
+    if return_result:
+        return make_result(output, timer)
+    return output
@@ -0,0 +1,352 @@
+import logging
+import math
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from fontmesher.batch import _init_worker
+from fontmesher.font_tools import add_glyphs
+from fontmesher.fonts import font_path_of, get_font
+from fontmesher.glyphs import glyph_source
+from fontmesher.layout import layout_text
+from fontmesher.mesh_data import MeshData
+from fontmesher.mesh_io import output_mesh
+from fontmesher.options import apply_mesh_options, start_model
+from fontmesher.profiling import PhaseTimer, make_result
+from fontmesher.sizing import apply_distance_sizing
+
+logger = logging.getLogger(__name__)
+
+Tile = namedtuple("Tile", ["index", "vertices", "edges", "placements"])
+Tile.__doc__ = """
+One rectangular tile of a text domain.
+
+Attributes:
+    index (int): The position of the tile, tiles are merged in this order.
+    vertices (list): The (x, y) corners of the tile boundary, counter-clockwise. Besides the four corners this
+        includes the corners of the neighbouring tiles that lie on its top and bottom edges.
+    edges (list): The (kind, divisions) of the edge from every vertex to the next. The kind is "wall", "inflow",
+        "outflow" or "cut" (shared with a neighbouring tile), divisions is the fixed number of elements of a cut
+        edge and None otherwise.
+    placements (list): The Placement of the glyphs inside the tile.
+"""
+
+# per worker process: id(font) -> (font, (glyphs, min_val, max_val)), kept between tiles
+_glyph_sources = {}
+
+
+def _divisions(length, size):
+    return max(1, math.ceil(length / size - 1e-9))
+
+
+def _line_cuts(placements, x_start, x_end, glyphs_per_tile, min_gap):
+    """
+    Return the x positions splitting one line into tiles, including the
+    domain ends. A cut is placed in the middle of the first gap of at least
+    `min_gap` between glyph outlines after every `glyphs_per_tile` glyphs.
+    """
+    cuts = [x_start]
+    count = 0
+    reach = -math.inf
+    inked = sorted(
+        (p for p in placements if p.x_min is not None), key=lambda p: p.x_min
+    )
+    for p in inked:
+        if count >= glyphs_per_tile and p.x_min - reach >= min_gap:
+            cuts.append((reach + p.x_min) / 2)
+            count = 0
+        reach = max(reach, p.x_max)
+        count += 1
+    cuts.append(x_end)
+    return cuts
+
+
+def plan_tiles(
+    placements,
+    line_bottoms,
+    domain,
+    glyph_size,
+    glyphs_per_tile,
+    lc,
+    cut_lc,
+):
+    """
+    Split a text domain into tiles that can be meshed independently.
+
+    The domain is cut horizontally half-way between lines, and every line
+    vertically in gaps between glyphs. Cut edges get a fixed number of
+    elements, so the two tiles sharing an edge discretize it identically
+    and the tile meshes can be merged into one conforming mesh.
+
+    Parameters:
+    placements (list): The Placement of every glyph, see `layout_text`.
+    line_bottoms (list): The y of the bottom of every line band, from the top line down.
+    domain (tuple): The (width, height) of the domain, with its bottom left corner at the origin.
+    glyph_size (float): The size of each glyph, the height of a line band.
+    glyphs_per_tile (int): The minimum number of glyphs of a tile, except for the last tile of a line.
+    lc (float): The element size on horizontal cuts.
+    cut_lc (float): The element size on vertical cuts, which run between glyphs.
+
+    Returns:
+    list: The Tile of the domain.
+    """
+    width, height = domain
+    num_lines = len(line_bottoms)
+    lines = [[] for _ in range(num_lines)]
+    for p in placements:
+        lines[p.line].append(p)
+
+    # horizontal cuts half-way through the gaps between line bands
+    tops = [height] + [
+        (line_bottoms[k] + glyph_size + line_bottoms[k - 1]) / 2
+        for k in range(1, num_lines)
+    ]
+    bottoms = tops[1:] + [0.0]
+    x_cuts = [
+        _line_cuts(lines[k], 0.0, width, glyphs_per_tile, cut_lc / 2)
+        for k in range(num_lines)
+    ]
+
+    tiles = []
+    for k in range(num_lines):
+        y0, y1 = bottoms[k], tops[k]
+        below = x_cuts[k + 1][1:-1] if k + 1 < num_lines else []
+        above = x_cuts[k - 1][1:-1] if k > 0 else []
+        bottom_kind = "wall" if k == num_lines - 1 else "cut"
+        top_kind = "wall" if k == 0 else "cut"
+        for x0, x1 in zip(x_cuts[k][:-1], x_cuts[k][1:]):
+            # the corners of the tiles below and above split the bottom and top edges
+            bottom = [x0] + [x for x in below if x0 < x < x1] + [x1]
+            top = [x1] + [x for x in reversed(above) if x0 < x < x1] + [x0]
+            right_kind = "outflow" if x1 == width else "cut"
+            left_kind = "inflow" if x0 == 0.0 else "cut"
+
+            vertices = [(x, y0) for x in bottom] + [(x, y1) for x in top]
+            edges = [
+                (bottom_kind, _divisions(b - a, lc) if bottom_kind == "cut" else None)  # noqa
+                for a, b in zip(bottom[:-1], bottom[1:])
+            ]
+            edges.append((right_kind, _divisions(y1 - y0, cut_lc) if right_kind == "cut" else None))  # noqa
+            edges.extend(
+                (top_kind, _divisions(a - b, lc) if top_kind == "cut" else None)
+                for a, b in zip(top[:-1], top[1:])
+            )
+            edges.append((left_kind, _divisions(y1 - y0, cut_lc) if left_kind == "cut" else None))  # noqa
+            inside = [
+                p for p in lines[k]
+                if p.x_min is not None and x0 < p.x_min and p.x_max < x1
+            ]
+            tiles.append(Tile(len(tiles), vertices, edges, inside))
+    return tiles
+
+
+def _mesh_tile(tile, font, params):
+    """
+    Mesh one tile in the current gmsh session and return its MeshData,
+    restricted to the physical groups. The tile model is removed again.
+    """
+    import gmsh
+
+    font = get_font(font)
+    cached = _glyph_sources.get(id(font))
+    if cached is None or cached[0] is not font:
+        cached = _glyph_sources[id(font)] = (font, glyph_source(font))
+    glyphs, min_val, max_val = cached[1]
+    lc = params["lc"]
+
+    gmsh.model.add(f"tile_{tile.index}")
+    try:
+        geo = gmsh.model.geo
+        points = [geo.addPoint(x, y, 0, lc) for x, y in tile.vertices]
+        lines = [
+            geo.addLine(points[i], points[(i + 1) % len(points)])
+            for i in range(len(points))
+        ]
+        boundary = {"wall": [], "inflow": [], "outflow": []}
+        for line, (kind, divisions) in zip(lines, tile.edges):
+            if divisions is not None:
+                geo.mesh.setTransfiniteCurve(line, divisions + 1)
+            if kind in boundary:
+                boundary[kind].append(line)
+
+        object_curves, object_surface_loop = add_glyphs(
+            [(p.index, p.char, (p.x, p.y)) for p in tile.placements],
+            glyphs, min_val, max_val, lc, params["glyph_size"],
+            params["curve_mode"], params["curve_tolerance"],
+        )
+        surface = geo.addPlaneSurface([geo.addCurveLoop(lines)] + object_surface_loop)  # noqa
+
+        for tag, name in ((1, "wall"), (2, "inflow"), (3, "outflow")):
+            if boundary[name]:
+                geo.addPhysicalGroup(1, boundary[name], tag, name=name)
+        if object_curves:
+            geo.addPhysicalGroup(1, object_curves, 4, name="object")
+        geo.addPhysicalGroup(2, [surface], 9, name="whole_domain")
+        geo.synchronize()
+
+        if params["lc_min"] is not None and object_curves:
+            apply_distance_sizing(
+                1, object_curves, params["lc_min"], lc, params["growth_distance"]
+            )
+        apply_mesh_options(params["num_threads"], params["algorithm_2d"])
+        gmsh.model.mesh.generate(2)
+        return MeshData.from_gmsh().physical_only()
+    finally:
+        gmsh.model.remove()
+
+
+def _mesh_tiles(tiles, font, params, workers, mp_context):
+    if workers == 1 or len(tiles) == 1:
+        import gmsh
+
+        if not gmsh.isInitialized():
+            gmsh.initialize()
+        return [_mesh_tile(tile, font, params) for tile in tiles]
+
+    font_spec = font_path_of(font)
+    if font_spec is None:
+        raise ValueError(
+            "Tiled meshing needs a font loaded from a file, pass its path or name instead"  # noqa
+        )
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(font_spec,),
+    ) as pool:
+        # largest tiles first, the results come back in tile order
+        order = sorted(tiles, key=lambda t: -len(t.placements))
+        futures = {
+            tile.index: pool.submit(_mesh_tile, tile, font_spec, params)
+            for tile in order
+        }
+        return [futures[tile.index].result() for tile in tiles]
+
+
+def make_text_mesh(
+    text,
+    font=None,
+    save_dir=".",
+    lc=0.1,
+    glyph_size=0.5,
+    pad_y_start=0.25,
+    pad_y_end=0.25,
+    pad_x_start=0.8,
+    pad_x_end=0.8,
+    glyph_offset=None,
+    line_spacing=1.5,
+    glyphs_per_tile=None,
+    workers=None,
+    mp_context=None,
+    write=True,
+    return_data=False,
+    filename=None,
+    file_format=None,
+    binary=False,
+    compress=False,
+    file=None,
+    lc_min=None,
+    lc_max=None,
+    growth_distance=None,
+    num_threads=None,
+    algorithm_2d=None,
+    profile=None,
+    return_result=False,
+    curve_mode="bezier",
+    curve_tolerance=None,
+):
+    """
+    Generates a 2D mesh of a (multi-line) text by meshing tiles of the domain in parallel.
+
+    The text is laid out with the advance widths of the font, line by line. The domain is split into tiles
+    along the gaps between lines and glyphs, every tile is meshed in a worker process, and the tile meshes are
+    merged into one conforming mesh: the edges between tiles get a fixed number of elements on both sides, and
+    their nodes are joined. The physical groups are the ones of `make_string_mesh`.
+
+    Parameters:
+    text (str): The text to be meshed, lines are separated by "\\n".
+    font (Font): The font to be used, a bundled font name, a font path or a TTFont loaded from a file.
+        Defaults to `default_font`.
+    glyph_offset (float): A fixed offset between consecutive glyphs like `make_string_mesh`.
+        Defaults to None (the advance widths of the font).
+    line_spacing (float): The distance between consecutive lines in glyph sizes, more than 1. Defaults to 1.5.
+    glyphs_per_tile (int): The minimum number of glyphs of a tile. Defaults to about four tiles per worker.
+    workers (int): The number of worker processes, 1 meshes the tiles in this process. Defaults to the number
+        of CPUs.
+    mp_context: The multiprocessing context of the pool. Defaults to the platform default.
+    num_threads (int): The number of threads gmsh may use per tile. Defaults to None, gmsh's current setting
+        (one thread unless set before, always in the worker processes).
+    lc_min (float): If given, grade the element size with the distance to the glyphs of each tile, see
+        `make_string_mesh`. The edges between glyphs of a line get elements of size `lc_min`.
+    The other parameters are the ones of `make_string_mesh`.
+
+    Returns:
+    str: The path to the saved mesh file (None if `write` is False), or
+    MeshData: the nodes, element connectivity and physical groups of the mesh if `return_data` is True, or
+    MeshResult: the output and metrics of the build if `return_result` is True.
+    """
+    if line_spacing <= 1:
+        raise ValueError(f"line_spacing must be more than 1, got {line_spacing}")  # noqa
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    timer = PhaseTimer(profile, return_result)
+    with timer.phase("font_load"):
+        font = get_font(font)
+    if lc_min is not None:
+        lc = lc_max if lc_max is not None else lc
+        if growth_distance is None:
+            growth_distance = glyph_size / 2
+    with timer.phase("boundaries"):
+        glyphs, min_val, max_val = glyph_source(font)
+
+    with timer.phase("layout"):
+        placements, (width, height) = layout_text(
+            text, glyphs, min_val, max_val,
+            glyph_size=glyph_size,
+            glyph_offset=glyph_offset,
+            line_spacing=line_spacing,
+            origin=(pad_x_start, pad_y_start),
+        )
+        domain = (pad_x_start + width + pad_x_end, pad_y_start + height + pad_y_end)  # noqa
+        if glyphs_per_tile is None:
+            inked = sum(p.x_min is not None for p in placements)
+            glyphs_per_tile = max(1, math.ceil(inked / (4 * workers)))
+        num_lines = text.count("\n") + 1
+        line_bottoms = [
+            pad_y_start + (num_lines - 1 - k) * glyph_size * line_spacing
+            for k in range(num_lines)
+        ]
+        tiles = plan_tiles(
+            placements, line_bottoms, domain, glyph_size, glyphs_per_tile,
+            lc, lc_min if lc_min is not None else lc,
+        )
+    logger.debug("meshing %d glyphs in %d tiles", len(placements), len(tiles))
+
+    params = {
+        "lc": lc,
+        "glyph_size": glyph_size,
+        "lc_min": lc_min,
+        "growth_distance": growth_distance,
+        "num_threads": num_threads,
+        "algorithm_2d": algorithm_2d,
+        "curve_mode": curve_mode,
+        "curve_tolerance": curve_tolerance,
+    }
+    with timer.phase("generate"):
+        meshes = _mesh_tiles(tiles, font, params, min(workers, len(tiles)), mp_context)  # noqa
+    with timer.phase("merge"):
+        data = MeshData.merge(meshes, tol=1e-7)
+        start_model("text_mesh")
+        data.to_gmsh()
+    with timer.phase("write"):
+        output = output_mesh(
+            text.split("\n", 1)[0][:32], "", save_dir, write, return_data,
+            filename, file_format, binary, compress, file,
+        )
+    logger.debug(
+        "meshed %d glyphs in %.1f ms", len(placements), sum(timer.timings.values()) * 1e3  # noqa
+    )
+    if return_result:
+        return make_result(output, timer)
+    return output
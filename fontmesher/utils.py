@@ -1,22 +1,111 @@
+import hashlib
+import io
+import json
+import os
+import weakref
+
+import numpy as np
 from fontTools.pens.recordingPen import RecordingPen
 
+# in-process memo of font content hashes and boundaries
+_font_hashes = weakref.WeakKeyDictionary()
+_font_boundaries = {}
+
 
-def get_font_boundaries(font):
+def get_cache_dir(*parts):
     """
-    Calculate the overall boundaries of the glyphs in a font.
-    This function iterates through all the glyphs in the provided font and 
-    calculates the minimum and maximum x and y coordinates that encompass 
-    all the glyphs. It then returns the boundaries based on the larger 
-    dimension (either width or height).
+    Return the fontmesher cache directory, creating it if needed.
+
+    The location defaults to ``~/.cache/fontmesher`` and can be overridden
+    with the ``FONTMESHER_CACHE_DIR`` environment variable.
+
     Args:
-        font: A font object that provides access to its glyph set.
+        *parts: Optional sub-directory names appended to the cache root.
     Returns:
-        A tuple containing two values:
-        - If the width (x dimension) is larger than the height (y dimension), 
-          it returns (overall_x_min, overall_x_max).
-        - Otherwise, it returns (overall_y_min, overall_y_max).
+        str: The path to the (existing) cache directory.
+    """
+    root = os.environ.get("FONTMESHER_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "fontmesher"
+    )
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _font_number(reader):
+    """
+    Return the index of the face a reader reads in a font collection (TTC),
+    or None for a single font. fontTools does not keep it, so the face is
+    found by its table offsets.
+    """
+    from fontTools.ttLib.sfnt import SFNTReader
+
+    num_fonts = getattr(reader, "numFonts", None)
+    if num_fonts is None:
+        return None
+    offsets = {tag: entry.offset for tag, entry in reader.tables.items()}
+    pos = reader.file.tell()
+    try:
+        for number in range(num_fonts):
+            face = SFNTReader(reader.file, fontNumber=number)
+            if {tag: entry.offset for tag, entry in face.tables.items()} == offsets:  # noqa
+                return number
+    finally:
+        reader.file.seek(pos)
+    return None
+
+
+def font_hash(font):
+    """
+    Compute a content hash (sha256 hex digest) of a font.
+
+    The raw bytes the font was loaded from are hashed when available,
+    otherwise the font is serialised first. The faces of a font collection
+    share their bytes, so the face number is hashed along. The result is
+    memoized per font object.
+
+    Args:
+        font: A fontTools TTFont object, or an OutlinePack.
+    Returns:
+        str: The hex digest identifying the font content.
+    """
+    pack_hash = getattr(font, "pack_hash", None)
+    if pack_hash is not None:
+        return pack_hash  # an OutlinePack
+    digest = _font_hashes.get(font)
+    if digest is not None:
+        return digest
+
+    reader = getattr(font, "reader", None)
+    reader_file = getattr(reader, "file", None)
+    font_number = None
+    if reader_file is not None:
+        if hasattr(reader_file, "getvalue"):
+            data = reader_file.getvalue()
+        else:
+            pos = reader_file.tell()
+            reader_file.seek(0)
+            data = reader_file.read()
+            reader_file.seek(pos)
+        font_number = _font_number(reader)
+    else:
+        buf = io.BytesIO()
+        font.save(buf)
+        data = buf.getvalue()
+
+    hasher = hashlib.sha256(data)
+    if font_number is not None:
+        hasher.update(f"fontNumber={font_number}".encode())
+    digest = hasher.hexdigest()
+    _font_hashes[font] = digest
+    return digest
+
+
+def _pen_extents(font):
+    """
+    Scan every glyph outline with a RecordingPen.
+    Returns (x_min, y_min, x_max, y_max).
     """
-    
     glyph_set = font.getGlyphSet()
 
     overall_x_min = float('inf')
@@ -41,10 +130,122 @@ def get_font_boundaries(font):
                             overall_x_max = max(overall_x_max, x)
                             overall_y_max = max(overall_y_max, y)
 
+    return overall_x_min, overall_y_min, overall_x_max, overall_y_max
+
+
+def _table_extents(font):
+    """
+    Read the outline extents straight from the `glyf` table with NumPy.
+
+    Only simple glyphs are considered: composites are recorded by the pen
+    scan as component references and never contribute points, so skipping
+    them here keeps both paths in agreement.
+    Returns (x_min, y_min, x_max, y_max), or None if the font has no
+    `glyf` table (e.g. CFF flavoured fonts).
+    """
+    if "glyf" not in font:
+        return None
+    glyf = font["glyf"]
+
+    coords = []
+    for glyph_name in font.getGlyphOrder():
+        glyph = glyf[glyph_name]
+        if glyph.numberOfContours > 0:
+            coords.append(np.frombuffer(glyph.coordinates.array, dtype=np.float64))  # noqa
+    if not coords:
+        return None
+
+    coords = np.concatenate(coords).reshape(-1, 2)
+    x_min, y_min = coords.min(axis=0)
+    x_max, y_max = coords.max(axis=0)
+    return float(x_min), float(y_min), float(x_max), float(y_max)
+
+
+def _bounds_cache_path(digest):
+    return os.path.join(get_cache_dir("font_bounds"), f"{digest}.json")
+
+
+def get_font_boundaries(font, cache=True):
+    """
+    Calculate the overall boundaries of the glyphs in a font.
+    The minimum and maximum x and y coordinates that encompass all the
+    glyphs are read from the `glyf` table when the font has one, and
+    otherwise collected by drawing every glyph with a recording pen.
+    The boundaries are then returned based on the larger dimension
+    (either width or height).
+    Results are memoized in-process and on disk, keyed by the content
+    hash of the font, so each font is only scanned once.
+    Args:
+        font: A font object that provides access to its glyph set.
+        cache (bool): Whether to read and write the boundary cache.
+    Returns:
+        A tuple containing two values:
+        - If the width (x dimension) is larger than the height (y dimension),
+          it returns (overall_x_min, overall_x_max).
+        - Otherwise, it returns (overall_y_min, overall_y_max).
+    """
+    if cache:
+        digest = font_hash(font)
+        if digest in _font_boundaries:
+            return _font_boundaries[digest]
+        cache_path = _bounds_cache_path(digest)
+        try:
+            with open(cache_path) as f:
+                bounds = tuple(json.load(f)["boundaries"])
+            _font_boundaries[digest] = bounds
+            return bounds
+        except (OSError, ValueError, KeyError):
+            pass
+
+    extents = _table_extents(font)
+    if extents is None:
+        extents = _pen_extents(font)
+    overall_x_min, overall_y_min, overall_x_max, overall_y_max = extents
+
     x_scale = overall_x_max - overall_x_min
     y_scale = overall_y_max - overall_y_min
 
     if x_scale > y_scale:
-        return overall_x_min, overall_x_max
+        bounds = overall_x_min, overall_x_max
     else:
-        return overall_y_min, overall_y_max
+        bounds = overall_y_min, overall_y_max
+
+    if cache:
+        _font_boundaries[digest] = bounds
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"boundaries": bounds, "extents": extents}, f)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+    return bounds
+
+
+def clear_font_boundaries_cache(font=None, disk=True):
+    """
+    Invalidate cached font boundaries.
+
+    Args:
+        font: Only drop the entry of this font. Defaults to all fonts.
+        disk (bool): Also remove the on-disk cache entries.
+    """
+    if font is None:
+        digests = list(_font_boundaries)
+        _font_boundaries.clear()
+        if disk:
+            bounds_dir = get_cache_dir("font_bounds")
+            digests = [
+                name[:-len(".json")] for name in os.listdir(bounds_dir)
+                if name.endswith(".json")
+            ]
+    else:
+        digests = [font_hash(font)]
+        _font_boundaries.pop(digests[0], None)
+
+    if disk:
+        for digest in digests:
+            try:
+                os.remove(_bounds_cache_path(digest))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.fixture
+def gmsh():
+    try:
+        import gmsh
+    except (ImportError, OSError):  # the gmsh wheel needs system libraries
+        pytest.skip("gmsh is not available")
+    yield gmsh
+    # options a test sets must not leak into the next one, or its forked workers
+    if gmsh.isInitialized():
+        gmsh.finalize()
@@ -0,0 +1,67 @@
+import numpy as np
+
+
+def open_edges(data):
+    """
+    The edges of the triangles and quadrangles of a 2D mesh that only one
+    element uses, as sorted node pairs. Raises AssertionError if an edge has
+    more than two elements.
+    """
+    cells = [data.elements[kind] for kind in ("triangle", "quad") if kind in data.elements]
+    edges = np.sort(np.concatenate([
+        c[:, [i, (i + 1) % c.shape[1]]] for c in cells for i in range(c.shape[1])
+    ]), axis=1)
+    edges, counts = np.unique(edges, axis=0, return_counts=True)
+    assert counts.max() <= 2
+    return {tuple(edge) for edge in edges[counts == 1]}
+
+
+def group_edges(data, dim=1):
+    """
+    The line elements of the physical groups of dimension `dim`, as sorted node pairs.
+    """
+    return {
+        tuple(sorted(line))
+        for group in data.physical_groups if group.dim == dim
+        for line in data.group_elements(group).get("line", [])
+    }
+
+
+def failing_build(string, **kwargs):
+    """
+    A builder whose generate() fails inside gmsh, with the arguments of a
+    fontmesher builder.
+    """
+    import gmsh
+
+    from fontmesher.options import start_model
+
+    start_model("failing")
+    geo = gmsh.model.geo
+    points = [geo.addPoint(x, y, 0, 0.1) for x, y in ((0, 0), (1, 0), (1, 1))]
+    lines = [geo.addLine(points[i], points[(i + 1) % 3]) for i in range(3)]
+    surface = geo.addPlaneSurface([geo.addCurveLoop(lines)])
+    geo.synchronize()
+    # opposite sides with different numbers of nodes
+    gmsh.model.mesh.setTransfiniteCurve(lines[0], 4)
+    gmsh.model.mesh.setTransfiniteCurve(lines[1], 7)
+    gmsh.model.mesh.setTransfiniteSurface(surface, cornerTags=points + points[:1])
+    gmsh.model.mesh.generate(2)
+
+
+def flaky_build(string, **kwargs):
+    """`make_string_mesh`, failing inside gmsh for the string "bad"."""
+    from fontmesher import make_string_mesh
+
+    if string == "bad":
+        failing_build(string, **kwargs)
+    return make_string_mesh(string, **kwargs)
+
+
+def msh_node_count(path):
+    """The number of nodes of an MSH 4 file."""
+    with open(path) as f:
+        for line in f:
+            if line.strip() == "$Nodes":
+                return int(next(f).split()[1])
+    return 0
@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+import sys
+
+import pytest
+from mesh_checks import msh_node_count
+
+import fontmesher.batch as batch
+from fontmesher.batch import BatchResult, make_string_meshes
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="the fake workers are inherited through fork"
+)
+
+
+def _init_worker(font):
+    pass
+
+
+def _mesh_chunk(kind, chunk, font, retries, kwargs):
+    results = []
+    for index, string in chunk:
+        if string == "crash":
+            os._exit(1)  # like a segfault in gmsh
+        results.append(BatchResult(index, string, f"{string}.msh", None, 1))
+    return results
+
+
+@pytest.fixture
+def fake_workers(monkeypatch):
+    monkeypatch.setattr(batch, "_init_worker", _init_worker)
+    monkeypatch.setattr(batch, "_mesh_chunk", _mesh_chunk)
+
+
+def test_crashed_worker_only_fails_its_string(fake_workers):
+    strings = ["a", "b", "crash", "c", "d", "e", "f", "g"]
+    results = sorted(make_string_meshes(
+        strings, font="Clip", workers=2, chunksize=2, retries=1,
+        mp_context=multiprocessing.get_context("fork"),
+    ))
+    assert [r.string for r in results] == strings
+    for result in results:
+        if result.string == "crash":
+            assert result.path is None
+            assert "crashed" in result.error
+            assert result.attempts == 2
+        else:
+            assert result.path == f"{result.string}.msh"
+            assert result.error is None
+
+
+def test_font_is_checked_on_call():
+    with pytest.raises(ValueError):
+        make_string_meshes(["a"], font=object())
+
+
+def test_failed_string_does_not_break_the_worker(gmsh, monkeypatch, tmp_path):
+    monkeypatch.setitem(batch._builders, "2d", ("mesh_checks", "flaky_build"))
+    strings = ["ab", "bad", "cd", "ef"]
+    results = sorted(make_string_meshes(
+        strings, font="Clip", workers=1, chunksize=len(strings), retries=1,
+        mp_context=multiprocessing.get_context("fork"),
+        lc=0.2, save_dir=str(tmp_path),
+    ))
+    bad = results[1]
+    assert bad.path is None and "transfinite" in bad.error and bad.attempts == 2
+    for result in results[:1] + results[2:]:
+        assert result.error is None
+        assert msh_node_count(result.path) > 0
@@ -0,0 +1,106 @@
+import importlib
+import os
+import time
+
+import pytest
+
+from fontmesher.cache import MeshCache, _artefact_name, stale_seconds
+from fontmesher.fonts import get_font
+
+
+def _entry(cache, name, size, age):
+    path = os.path.join(cache.directory, name)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_get_refreshes_and_put_moves(tmp_path):
+    cache = MeshCache(str(tmp_path / "cache"))
+    assert cache.get("abc", "npz") is None
+    source = tmp_path / "mesh.npz"
+    source.write_bytes(b"mesh")
+    path = cache.put("abc", "npz", str(source))
+    assert not source.exists()
+    os.utime(path, (0, 0))
+    assert cache.get("abc", "npz") == path
+    assert os.path.getmtime(path) > 0
+
+
+def test_evict_removes_least_recently_used(tmp_path):
+    cache = MeshCache(str(tmp_path), max_bytes=250)
+    for name, age in (("old.npz", 30), ("middle.npz", 20), ("new.npz", 10)):
+        _entry(cache, name, 100, age)
+    cache.get("old", "npz")  # a hit makes it the most recent entry
+    cache.evict()
+    assert sorted(os.listdir(tmp_path)) == [".lock", "new.npz", "old.npz"]
+    assert cache.size() == 200
+
+
+def test_evict_removes_stale_temporary_files(tmp_path):
+    cache = MeshCache(str(tmp_path))
+    _entry(cache, "key.1.2.tmp.msh", 10, stale_seconds + 60)
+    _entry(cache, "key.1.3.tmp.msh", 10, 0)  # still being written
+    cache.evict()
+    assert sorted(os.listdir(tmp_path)) == [".lock", "key.1.3.tmp.msh"]
+
+
+def test_clear(tmp_path):
+    cache = MeshCache(str(tmp_path))
+    _entry(cache, "a.npz", 10, 0)
+    _entry(cache, "b.msh", 10, 0)
+    cache.clear()
+    assert cache.size() == 0
+
+
+def test_artefact_names():
+    assert _artefact_name("msh", False, False) == "msh.msh"
+    assert _artefact_name("msh", True, True) == "msh-binary-compress.msh.gz"
+    assert _artefact_name("vtu", False, True) == "vtu-compress.vtu"
+
+
+def test_key_depends_on_font_and_parameters(tmp_path):
+    try:
+        importlib.import_module("gmsh")  # the key includes its version
+    except (ImportError, OSError):
+        pytest.skip("gmsh is not available")
+    cache = MeshCache(str(tmp_path))
+    clip, rebelion = get_font("Clip"), get_font("Rebelion")
+    key = cache.key("2d", clip, {"string": "a", "lc": 0.1})
+    assert key == cache.key("2d", clip, {"lc": 0.1, "string": "a"})
+    assert key != cache.key("2d", clip, {"string": "a", "lc": 0.2})
+    assert key != cache.key("2d", rebelion, {"string": "a", "lc": 0.1})
+    assert key != cache.key("3d", clip, {"string": "a", "lc": 0.1})
+
+
+def test_cached_build_returns_the_same_mesh(gmsh, tmp_path):
+    from fontmesher import make_string_mesh
+
+    cache = MeshCache(str(tmp_path / "cache"))
+    kwargs = dict(font="Clip", lc=0.1, save_dir=str(tmp_path), cache=cache)
+    built = make_string_mesh("ab", return_data=True, **kwargs)
+    entries = sorted(os.listdir(cache.directory))
+    cached = make_string_mesh("ab", return_data=True, **kwargs)
+    assert sorted(os.listdir(cache.directory)) == entries  # a hit stores nothing
+    assert (cached.nodes == built.nodes).all()
+    assert cached.elements.keys() == built.elements.keys()
+    path = make_string_mesh("ab", filename="copy.msh", **kwargs)
+    assert (tmp_path / "copy.msh").read_bytes() == (tmp_path / "ab.msh").read_bytes()
+    assert path == str(tmp_path / "copy.msh")
+
+
+def test_key_depends_on_the_session_options(gmsh, tmp_path):
+    from fontmesher import make_string_mesh
+    from fontmesher.options import algorithms_2d
+
+    cache = MeshCache(str(tmp_path / "cache"))
+    kwargs = dict(font="Clip", lc=0.1, write=False, return_data=True, cache=cache)
+    built = make_string_mesh("ab", **kwargs)
+    gmsh.option.setNumber("Mesh.Algorithm", algorithms_2d["delaunay"])
+    delaunay = make_string_mesh("ab", **kwargs)
+    entries = [name for name in os.listdir(cache.directory) if name.endswith(".npz")]
+    assert len(entries) == 2  # a miss, not the first mesh
+    assert delaunay.elements["triangle"].shape != built.elements["triangle"].shape
+    assert make_string_mesh("ab", algorithm_2d="delaunay", **kwargs).nodes.shape == delaunay.nodes.shape  # noqa
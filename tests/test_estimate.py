@@ -0,0 +1,50 @@
+import pytest
+
+import fontmesher.estimate as estimate
+from fontmesher.estimate import estimate_mesh, lc_for_budget, outline_measures
+from fontmesher.fonts import get_font
+from fontmesher.glyphs import glyph_source
+from fontmesher.utils import font_hash
+
+
+@pytest.mark.parametrize("dim, mode", [(2, "tet"), (3, "tet"), (3, "layered")])
+def test_elements_decrease_with_lc(dim, mode):
+    counts = [
+        estimate_mesh("Hello", "Clip", dim, lc=lc, mode=mode).elements
+        for lc in (0.02, 0.05, 0.1, 0.2)
+    ]
+    assert counts == sorted(counts, reverse=True)
+    assert counts[-1] < counts[0]
+
+
+def test_grading_adds_elements():
+    uniform = estimate_mesh("Hello", "Clip", lc=0.1)
+    graded = estimate_mesh("Hello", "Clip", lc=0.1, lc_min=0.02)
+    assert graded.elements > uniform.elements
+
+
+def test_lc_for_budget_meets_the_budget():
+    result = lc_for_budget("Hello", 5000, font="Clip")
+    assert result.elements <= 5000
+    assert estimate_mesh("Hello", "Clip", lc=result.lc * 0.9).elements > 5000
+
+
+def test_outline_measures_are_per_font():
+    measures = {}
+    for name in ["Clip", "Rebelion", "Clip", "Rebelion"]:
+        font = get_font(name)
+        # a new glyph source every time, ids may be reused
+        glyphs, _, _ = glyph_source(font)
+        area, perimeter = outline_measures("a", glyphs, font_hash(font))
+        assert measures.setdefault(name, (area, perimeter)) == (area, perimeter)
+    assert measures["Clip"] != measures["Rebelion"]
+
+
+def test_outline_measures_are_bounded(monkeypatch):
+    monkeypatch.setattr(estimate, "outline_measures_size", 3)
+    monkeypatch.setattr(estimate, "_outline_measures", estimate.OrderedDict())
+    font = get_font("Clip")
+    glyphs, _, _ = glyph_source(font)
+    for char in "abcde":
+        outline_measures(char, glyphs, font_hash(font))
+    assert [char for _, char in estimate._outline_measures] == ["c", "d", "e"]
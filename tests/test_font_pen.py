@@ -0,0 +1,150 @@
+import numpy as np
+import pytest
+from fontTools.pens.recordingPen import RecordingPen
+
+from fontmesher.font_pen import FontPen, curve_modes, flatten_bezier
+from fontmesher.fonts import get_font
+from fontmesher.glyphs import glyph_source
+
+
+class RecordingGeo:
+    """Records the entities FontPen adds, in place of gmsh.model.geo."""
+
+    def __init__(self):
+        self.points = {}
+        self.curves = {}
+        self.loops = []
+
+    def addPoint(self, x, y, z, lc):
+        self.points[len(self.points) + 1] = (x, y)
+        return len(self.points)
+
+    def _curve(self, kind, points):
+        self.curves[len(self.curves) + 1] = (kind, list(points))
+        return len(self.curves)
+
+    def addLine(self, start, end):
+        return self._curve("line", [start, end])
+
+    def addBezier(self, points):
+        return self._curve("bezier", points)
+
+    def addPolyline(self, points):
+        return self._curve("polyline", points)
+
+    def addSpline(self, points):
+        return self._curve("spline", points)
+
+    def addCurveLoop(self, curves):
+        self.loops.append(list(curves))
+        return len(self.loops)
+
+
+def _draw(curve_mode, draw, tolerance=None):
+    geo = RecordingGeo()
+    pen = FontPen(geo, 0, 100, glyph_size=1, lc=0.1, curve_mode=curve_mode, tolerance=tolerance)  # noqa
+    draw(pen)
+    return geo, pen
+
+
+def _quadratic_run(pen):
+    pen.moveTo((0, 0))
+    pen.qCurveTo((0, 50), (50, 100), (100, 50), (100, 0))
+    pen.closePath()
+
+
+def test_unknown_curve_mode():
+    with pytest.raises(ValueError):
+        FontPen(RecordingGeo(), curve_mode="arcs")
+
+
+def test_bezier_mode_keeps_the_run_as_one_curve():
+    geo, pen = _draw("bezier", _quadratic_run)
+    kinds = [kind for kind, _ in geo.curves.values()]
+    assert kinds == ["bezier", "line"]
+    assert len(geo.curves[1][1]) == 5
+    assert geo.loops == [[1, 2]]
+
+
+def test_segments_mode_splits_the_run():
+    geo, pen = _draw("segments", _quadratic_run)
+    curves = list(geo.curves.values())
+    # two implied on-curve points split the run into three quadratic segments
+    assert [kind for kind, _ in curves] == ["bezier"] * 3 + ["line"]
+    assert all(len(points) == 3 for _, points in curves[:3])
+    # consecutive segments share their end points
+    assert curves[0][1][-1] == curves[1][1][0]
+
+
+def test_cubic_segment():
+    def draw(pen):
+        pen.moveTo((0, 0))
+        pen.curveTo((0, 100), (100, 100), (100, 0))
+        pen.closePath()
+
+    geo, _ = _draw("segments", draw)
+    assert [len(points) for kind, points in geo.curves.values() if kind == "bezier"] == [4]  # noqa
+
+
+@pytest.mark.parametrize("curve_mode, kind", [("polyline", "polyline"), ("spline", "spline")])
+def test_flattened_modes_stay_within_tolerance(curve_mode, kind):
+    tolerance = 1e-3
+    geo, _ = _draw(curve_mode, _quadratic_run, tolerance)
+    curves = [points for k, points in geo.curves.values() if k == kind]
+    assert len(curves) == 3
+    for points in curves:
+        assert len(points) > 2
+        xy = np.array([geo.points[p] for p in points])
+        # samples lie on the arch, between the end points
+        assert np.all(xy[:, 1] >= -1e-12) and np.all(xy[:, 1] <= 1)
+
+
+def test_points_are_shared_within_a_glyph():
+    def draw(pen):
+        pen.moveTo((0, 0))
+        pen.lineTo((100, 0))
+        pen.lineTo((100, 0))  # zero length, skipped
+        pen.lineTo((100, 100))
+        pen.lineTo((0, 0))
+        pen.closePath()
+
+    geo, _ = _draw("bezier", draw)
+    assert len(geo.points) == 3
+    assert len(geo.curves) == 3
+    assert geo.loops == [[1, 2, 3]]
+
+
+@pytest.mark.parametrize("degree", [2, 3])
+def test_flatten_bezier_error_bound(degree):
+    rng = np.random.default_rng(degree)
+    ctrl = rng.uniform(-1, 1, (degree + 1, 2))
+    tolerance = 1e-3
+    samples = np.vstack([ctrl[:1], flatten_bezier(ctrl, tolerance), ctrl[-1:]])
+
+    t = np.linspace(0, 1, 2001)[:, None]
+    i = np.arange(degree + 1)
+    binomials = np.array([1, 2, 1] if degree == 2 else [1, 3, 3, 1])
+    curve = (binomials * t ** i * (1 - t) ** (degree - i)) @ ctrl
+
+    def distance_to_polyline(point):
+        a, b = samples[:-1], samples[1:]
+        ab = b - a
+        s = np.clip(((point - a) * ab).sum(1) / np.maximum((ab * ab).sum(1), 1e-300), 0, 1)  # noqa
+        return np.linalg.norm(a + s[:, None] * ab - point, axis=1).min()
+
+    assert max(distance_to_polyline(p) for p in curve) <= tolerance
+
+
+@pytest.mark.parametrize("curve_mode", curve_modes)
+def test_glyph_outlines_close_in_every_mode(curve_mode):
+    glyphs, min_val, max_val = glyph_source(get_font("Clip"))
+    geo = RecordingGeo()
+    pen = FontPen(geo, min_val, max_val, glyph_size=0.5, lc=0.05, curve_mode=curve_mode)  # noqa
+    glyphs.draw("o", pen)
+    contours = RecordingPen()
+    glyphs.draw("o", contours)
+    assert len(geo.loops) == [op for op, _ in contours.value].count("closePath")
+    for loop in geo.loops:
+        ends = [(geo.curves[c][1][0], geo.curves[c][1][-1]) for c in loop]
+        # each curve starts where the previous one ends
+        assert all(prev[1] == cur[0] for prev, cur in zip(ends, ends[1:] + ends[:1]))
@@ -0,0 +1,41 @@
+from mesh_checks import group_edges, open_edges
+
+from fontmesher.options import algorithms_2d
+
+
+def test_recombined_mesh_is_quad_dominant(gmsh):
+    from fontmesher import make_string_mesh
+
+    kwargs = dict(font="Clip", lc=0.1, write=False, return_data=True)
+    triangles = make_string_mesh("ab", **kwargs)
+    quads = make_string_mesh("ab", recombine=True, **kwargs)
+    assert len(quads.elements["quad"]) > len(quads.elements.get("triangle", []))
+    assert len(quads.elements["quad"]) < len(triangles.elements["triangle"])
+    for algorithm in ["blossom-full-quad", "simple-full-quad"]:
+        full = make_string_mesh("Hello world", recombine=True, recombination_algorithm=algorithm, **kwargs)  # noqa
+        assert "triangle" not in full.elements
+        assert open_edges(full) == group_edges(full)
+
+
+def test_recombining_keeps_the_session_options(gmsh):
+    from fontmesher import make_string_mesh
+
+    if not gmsh.isInitialized():
+        gmsh.initialize()
+    gmsh.option.setNumber("Mesh.Algorithm", algorithms_2d["delaunay"])
+    names = ["Mesh.RecombinationAlgorithm", "Mesh.SubdivisionAlgorithm", "Mesh.MeshSizeFactor"]
+    before = [gmsh.option.getNumber(name) for name in names]
+    make_string_mesh("ab", font="Clip", lc=0.1, write=False, recombine=True)
+    make_string_mesh("ab", font="Clip", lc=0.1, write=False, recombine=True, recombination_algorithm="blossom-full-quad")  # noqa
+    assert gmsh.option.getNumber("Mesh.Algorithm") == algorithms_2d["delaunay"]
+    assert [gmsh.option.getNumber(name) for name in names] == before
+
+
+def test_transfinite_far_field_is_conforming(gmsh):
+    from fontmesher import make_string_mesh
+
+    kwargs = dict(font="Clip", lc=0.1, write=False, return_data=True)
+    data = make_string_mesh("ab", transfinite_far_field=True, **kwargs)
+    direct = make_string_mesh("ab", **kwargs)
+    assert {g.name for g in data.physical_groups} == {g.name for g in direct.physical_groups}  # noqa
+    assert open_edges(data) == group_edges(data)
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+
+def _layered(**kwargs):
+    from fontmesher import make_string_mesh3d
+
+    return make_string_mesh3d(
+        "ab", font="Clip", lc=0.1, mode="layered", write=False, return_data=True, **kwargs
+    )
+
+
+def test_layered_mode_extrudes_prisms(gmsh):
+    data = _layered(num_layers=[1, 2, 1])
+    assert set(data.elements) >= {"wedge"}
+    assert "tetra" not in data.elements
+    # one node layer per layer boundary
+    assert len(np.unique(np.round(data.nodes[:, 2], 9))) == 5
+    assert {g.name for g in data.physical_groups} >= {"wall", "inflow", "outflow", "obj"}
+
+
+def test_layered_mode_recombines_into_hexahedra(gmsh):
+    data = _layered(num_layers=2, recombine=True)
+    assert "hexahedron" in data.elements
+
+
+def test_through_holes_sum_the_layers(gmsh):
+    data = _layered(num_layers=[1, 2, 1], through_holes=True)
+    assert len(np.unique(np.round(data.nodes[:, 2], 9))) == 5
+
+
+def test_num_layers_must_match_the_segments(gmsh):
+    with pytest.raises(ValueError, match="num_layers"):
+        _layered(num_layers=[1, 2])
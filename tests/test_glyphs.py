@@ -0,0 +1,26 @@
+from fontTools.pens.recordingPen import DecomposingRecordingPen, RecordingPen
+
+from fontmesher.fonts import get_font
+from fontmesher.glyphs import GlyphCache
+
+
+def test_replayed_outline_matches_the_font():
+    font = get_font("Rebelion")
+    glyphs = GlyphCache(font)
+    glyph_set = font.getGlyphSet()
+    cmap = font.getBestCmap()
+    for char in "Hello":
+        pen = RecordingPen()
+        glyphs.draw(char, pen)
+        direct = DecomposingRecordingPen(glyph_set)
+        glyph_set[cmap[ord(char)]].draw(direct)
+        assert pen.value == direct.value
+    # every unique character is decoded once
+    assert len(glyphs) == len(set("Hello"))
+
+
+def test_blank_glyph_has_no_bounds():
+    glyphs = GlyphCache(get_font("Clip"))
+    assert glyphs.bounds(" ") is None
+    x_min, y_min, x_max, y_max = glyphs.bounds("H")
+    assert x_min < x_max and y_min < y_max
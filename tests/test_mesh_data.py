@@ -0,0 +1,56 @@
+import numpy as np
+
+from fontmesher.mesh_data import ElementBlock, MeshData, PhysicalGroup
+
+
+def _square(x):
+    """Two triangles on [x, x + 1] x [0, 1], with a wall group on the bottom edge."""
+    nodes = np.array([[x, 0, 0], [x + 1, 0, 0], [x + 1, 1, 0], [x, 1, 0]], dtype=float)
+    blocks = [
+        ElementBlock(1, 1, 1, np.array([1]), np.array([[0, 1]])),
+        ElementBlock(2, 1, 2, np.array([2, 3]), np.array([[0, 1, 2], [0, 2, 3]])),
+    ]
+    groups = [
+        PhysicalGroup(1, 1, "wall", np.array([1])),
+        PhysicalGroup(2, 9, "whole_domain", np.array([1])),
+    ]
+    return MeshData(nodes, np.arange(1, 5), blocks, groups)
+
+
+def test_merge_joins_shared_nodes():
+    merged = MeshData.merge([_square(0.0), _square(1.0 + 1e-12)], tol=1e-7)
+    assert len(merged.nodes) == 6
+    assert list(merged.node_tags) == [1, 2, 3, 4, 5, 6]
+    assert len(merged.elements["triangle"]) == 4
+    # the triangles of the second square use the nodes of the first on x = 1
+    shared = {i for i, node in enumerate(merged.nodes) if np.isclose(node[0], 1)}
+    second = merged.blocks[3].connectivity
+    assert shared <= set(second.ravel())
+
+
+def test_merge_keeps_tags_unique_and_unites_groups():
+    merged = MeshData.merge([_square(0.0), _square(1.0), _square(2.0)])
+    entities = [(b.dim, b.entity) for b in merged.blocks]
+    assert len(set(entities)) == len(entities)
+    tags = np.concatenate([b.tags for b in merged.blocks])
+    assert len(set(tags)) == len(tags)
+    (wall,) = merged.get_groups("wall")
+    assert sorted(wall.entities) == [1, 2, 3]
+    assert len(merged.group_elements("wall")["line"]) == 3
+    assert len(merged.group_elements(9)["triangle"]) == 6
+
+
+def test_save_load_round_trip(tmp_path):
+    mesh = MeshData.merge([_square(0.0), _square(1.0)])
+    for compress in (False, True):
+        path = tmp_path / f"mesh_{compress}.npz"
+        mesh.save(str(path), compress=compress)
+        loaded = MeshData.load(str(path))
+        assert np.array_equal(loaded.nodes, mesh.nodes)
+        assert np.array_equal(loaded.node_tags, mesh.node_tags)
+        assert [b[:3] for b in loaded.blocks] == [b[:3] for b in mesh.blocks]
+        for a, b in zip(loaded.blocks, mesh.blocks):
+            assert np.array_equal(a.tags, b.tags)
+            assert np.array_equal(a.connectivity, b.connectivity)
+        assert [g[:3] for g in loaded.physical_groups] == [g[:3] for g in mesh.physical_groups]  # noqa
+        assert [list(g.entities) for g in loaded.physical_groups] == [list(g.entities) for g in mesh.physical_groups]  # noqa
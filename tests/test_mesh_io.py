@@ -0,0 +1,52 @@
+import gzip
+import os
+
+import pytest
+
+from fontmesher.mesh_io import partition_paths
+
+
+def test_partition_paths():
+    assert partition_paths("out/Hello.msh", 3) == [
+        "out/Hello_1.msh", "out/Hello_2.msh", "out/Hello_3.msh",
+    ]
+    assert partition_paths("Hello.msh.gz", 2, compress=True) == [
+        "Hello_1.msh.gz", "Hello_2.msh.gz",
+    ]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_partitioned_mesh_files(gmsh, tmp_path, compress):
+    from fontmesher import make_string_mesh
+
+    paths = make_string_mesh(
+        "ab", font="Clip", lc=0.1, save_dir=str(tmp_path), partitions=3,
+        compress=compress,
+    )
+    assert paths == partition_paths(str(tmp_path / "ab.msh"), 3, compress)
+    for path in paths:
+        assert os.path.getsize(path) > 0
+        opener = gzip.open if compress else open
+        with opener(path, "rb") as f:
+            assert f.read(11) == b"$MeshFormat"
+    with pytest.raises(ValueError):
+        make_string_mesh("ab", font="Clip", lc=0.1, save_dir=str(tmp_path), partitions=2, file_format="vtu")  # noqa
+
+
+@pytest.mark.parametrize("filename, file_format, header", [
+    ("ab.dat", "msh", b"$MeshFormat"),
+    ("ab.msh", "vtk", b"# vtk DataFile"),
+    ("ab", "msh", b"$MeshFormat"),
+    ("ab", "vtu", b"<?xml"),
+])
+def test_file_format_wins_over_the_extension(gmsh, tmp_path, filename, file_format, header):  # noqa
+    from fontmesher import make_string_mesh
+
+    path = make_string_mesh(
+        "ab", font="Clip", lc=0.2, save_dir=str(tmp_path), filename=filename,
+        file_format=file_format,
+    )
+    assert path == str(tmp_path / filename)
+    assert os.listdir(tmp_path) == [filename]
+    with open(path, "rb") as f:
+        assert f.read(len(header)) == header
@@ -0,0 +1,82 @@
+import json
+import os
+
+import numpy as np
+import pytest
+from fontTools.pens.recordingPen import RecordingPen
+
+from fontmesher.fonts import get_font
+from fontmesher.glyphs import GlyphCache, glyph_source
+from fontmesher.outline_pack import OutlinePack, compile_pack, is_outline_pack
+from fontmesher.utils import font_hash, get_font_boundaries
+
+
+@pytest.fixture(scope="module")
+def packs(tmp_path_factory):
+    root = tmp_path_factory.mktemp("packs")
+    return {
+        name: OutlinePack(compile_pack(get_font(name), str(root / name)))
+        for name in ("Clip", "Rebelion")
+    }
+
+
+def _normalized(value, min_val, max_val):
+    scale = 1.0 / (max_val - min_val)
+    return [
+        (command, [None if pt is None else tuple((np.asarray(pt) - min_val) * scale) for pt in args])  # noqa
+        for command, args in value
+    ]
+
+
+@pytest.mark.parametrize("name", ["Clip", "Rebelion"])
+def test_pack_draws_the_normalized_font(packs, name):
+    font = get_font(name)
+    pack = packs[name]
+    glyphs = GlyphCache(font)
+    min_val, max_val = get_font_boundaries(font)
+    scale = 1.0 / (max_val - min_val)
+    for char in "Hello, world":
+        expected = RecordingPen()
+        glyphs.draw(char, expected)
+        pen = RecordingPen()
+        pack.draw(char, pen)
+        expected = _normalized(expected.value, min_val, max_val)
+        assert [c for c, _ in pen.value] == [c for c, _ in expected]
+        for (_, args), (_, expected_args) in zip(pen.value, expected):
+            assert len(args) == len(expected_args)
+            for pt, expected_pt in zip(args, expected_args):
+                assert (pt is None) == (expected_pt is None)
+                if pt is not None:
+                    assert pt == pytest.approx(expected_pt)
+        assert pack.advance(char) == pytest.approx(glyphs.advance(char) * scale)
+        bounds = glyphs.bounds(char)
+        if bounds is None:
+            assert pack.bounds(char) is None
+        else:
+            assert pack.bounds(char) == pytest.approx(tuple((np.asarray(bounds) - min_val) * scale))  # noqa
+
+
+def test_pack_is_its_own_glyph_source(packs):
+    pack = packs["Clip"]
+    assert is_outline_pack(pack.path)
+    assert glyph_source(pack) == (pack, 0.0, 1.0)
+    assert font_hash(pack) == pack.pack_hash
+    assert pack.pack_hash != packs["Rebelion"].pack_hash
+    assert pack.meta["font_hash"] == font_hash(get_font("Clip"))
+
+
+def test_missing_character(packs):
+    with pytest.raises(KeyError):
+        packs["Clip"].glyph("\U0010fffd")
+
+
+def test_version_mismatch(tmp_path):
+    path = compile_pack(get_font("Clip"), str(tmp_path / "old"))
+    meta_path = os.path.join(path, "meta.json")
+    with open(meta_path) as f:
+        meta = json.load(f)
+    meta["version"] = 0
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    with pytest.raises(ValueError, match="recompile"):
+        OutlinePack(path)
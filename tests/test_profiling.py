@@ -0,0 +1,28 @@
+import pytest
+
+from fontmesher.profiling import PhaseTimer, peak_memory, reset_peak_memory
+
+
+def test_phase_timer_accumulates():
+    seen = []
+    timer = PhaseTimer(lambda phase, seconds: seen.append(phase))
+    for _ in range(2):
+        with timer.phase("generate"):
+            pass
+    assert list(timer.timings) == ["generate"]
+    assert seen == ["generate", "generate"]
+
+
+def test_peak_memory_is_per_build():
+    if not reset_peak_memory():
+        pytest.skip("the memory high-water mark cannot be reset here")
+    block = bytearray(200 * 2 ** 20)
+    block[::4096] = b"x" * len(block[::4096])  # touch every page
+    del block
+    process_peak = peak_memory()
+
+    assert PhaseTimer().memory_scope == "process"
+    assert peak_memory() >= process_peak
+    timer = PhaseTimer(track_memory=True)
+    assert timer.memory_scope == "build"
+    assert peak_memory() < process_peak - 100 * 2 ** 20
@@ -0,0 +1,78 @@
+import io
+import multiprocessing
+import sys
+import time
+
+import pytest
+
+import fontmesher.batch as batch
+import fontmesher.server as server
+from fontmesher.mesh_data import MeshData
+from fontmesher.server import MeshService, RequestError
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="the fake workers are inherited through fork"
+)
+
+
+def _init_server_worker(fonts):
+    pass
+
+
+def _mesh_job(kind, string, font, params, file_format, binary, compress, arrays):
+    if string == "slow":
+        time.sleep(1.0)
+    return string.encode()
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(server, "_init_server_worker", _init_server_worker)
+    monkeypatch.setattr(server, "_mesh_job", _mesh_job)
+    service = MeshService(
+        workers=1, max_queue=0, timeout=0.2,
+        mp_context=multiprocessing.get_context("fork"),
+    )
+    yield service
+    service.close()
+
+
+@pytest.mark.parametrize("dim", [2.0, True, "2", 4])
+def test_dim_must_be_2_or_3(service, dim):
+    with pytest.raises(RequestError) as error:
+        service.submit({"string": "a", "dim": dim})
+    assert error.value.status == 400
+
+
+def test_timed_out_job_keeps_its_slot(service):
+    assert service.submit({"string": "a"}) == (b"a", "application/octet-stream")
+    with pytest.raises(RequestError) as error:
+        service.submit({"string": "slow"})
+    assert error.value.status == 504
+    # the worker is still busy with the timed out job
+    assert service.stats()["in_flight"] == 1
+    with pytest.raises(RequestError) as error:
+        service.submit({"string": "b"})
+    assert error.value.status == 503
+
+    deadline = time.monotonic() + 5
+    while service.stats()["in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert service.submit({"string": "b"})[0] == b"b"
+
+
+def test_failed_request_does_not_break_the_worker(gmsh, monkeypatch):
+    monkeypatch.setitem(batch._builders, "2d", ("mesh_checks", "flaky_build"))
+    service = MeshService(workers=1, mp_context=multiprocessing.get_context("fork"))
+    try:
+        request = {"string": "ab", "format": "npz", "params": {"lc": 0.2}}
+        before = MeshData.load(io.BytesIO(service.submit(request)[0]))
+        with pytest.raises(RequestError) as error:
+            service.submit(dict(request, string="bad"))
+        assert error.value.status == 500
+        after = MeshData.load(io.BytesIO(service.submit(request)[0]))
+        assert len(after.nodes) == len(before.nodes) > 0
+        stats = service.stats()
+        assert (stats["served"], stats["failed"]) == (2, 1)
+    finally:
+        service.close()
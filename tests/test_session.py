@@ -0,0 +1,48 @@
+import pytest
+
+try:
+    import gmsh
+except (ImportError, OSError):  # the gmsh wheel needs system libraries
+    pytest.skip("gmsh is not available", allow_module_level=True)
+
+from mesh_checks import failing_build
+
+from fontmesher.session import Mesher
+
+
+def test_jobs_reset_the_models_and_keep_the_options():
+    words = ["ab", "cd", "ab", "efg", "h", "ab"]
+    options = {"Mesh.Algorithm": 5, "General.NumThreads": 2}
+    node_counts = []
+    with Mesher(font="Clip", lc=0.2, options=options, write=False, return_data=True) as mesher:  # noqa
+        for word in words:
+            data = mesher.mesh(word)
+            node_counts.append(len(data.nodes))
+            assert len(gmsh.model.list()) <= 1
+            assert gmsh.model.getEntities() == []
+            for name, value in options.items():
+                assert gmsh.option.getNumber(name) == value
+        assert mesher.jobs == len(words)
+    # the same word meshes to the same mesh, nothing piles up between jobs
+    assert node_counts[0] == node_counts[2] == node_counts[5]
+
+
+def test_session_finalizes_the_gmsh_it_initialized():
+    if gmsh.isInitialized():
+        gmsh.finalize()
+    with Mesher(font="Clip", lc=0.2, write=False) as mesher:
+        mesher.mesh("a")
+        assert gmsh.isInitialized()
+    assert not gmsh.isInitialized()
+
+
+def test_failed_job_does_not_break_later_jobs():
+    options = {"Mesh.Algorithm": 5}
+    with Mesher(font="Clip", lc=0.2, options=options, write=False, return_data=True) as mesher:  # noqa
+        before = mesher.mesh("cd")
+        with pytest.raises(Exception, match="transfinite"):
+            mesher.run(failing_build, "x")
+        after = mesher.mesh("cd")
+        assert len(after.nodes) == len(before.nodes) > 0
+        assert gmsh.option.getNumber("Mesh.Algorithm") == 5
+        assert mesher.jobs == 3
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from mesh_checks import group_edges, open_edges
+
+from fontmesher.layout import Placement
+from fontmesher.mesh_data import ElementBlock, MeshData, PhysicalGroup
+from fontmesher.font_tools import glyph_curves_tag
+from fontmesher.templates import _place, cell_shift
+
+
+def test_cell_shift_centres_the_glyphs():
+    placements = [
+        Placement(0, "a", 0, 1.0, 0.0, 1.1, 1.3),
+        Placement(1, " ", 0, 1.5, 0.0, None, None),
+        Placement(2, "b", 0, 2.0, 0.0, 2.05, 2.35),
+    ]
+    shift = cell_shift(placements, 0.5)
+    # the inked extent relative to the glyph positions is [0.05, 0.35]
+    assert shift == pytest.approx((0.05 + 0.35 - 0.5) / 2)
+    assert cell_shift(placements[1:2], 0.5) == 0.0
+    with pytest.raises(ValueError):
+        cell_shift(placements, 0.25)
+
+
+def _template():
+    nodes = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]], dtype=float)
+    line = np.array([[0, 1]])
+    blocks = [
+        ElementBlock(1, tag, 1, np.array([tag]), line) for tag in (1, 2, 3, 4)
+    ] + [ElementBlock(2, 1, 2, np.array([5, 6]), np.array([[0, 1, 2], [0, 2, 3]]))]
+    groups = [
+        PhysicalGroup(1, 1, "wall", np.array([1])),
+        PhysicalGroup(1, 2, "inflow", np.array([2])),
+        PhysicalGroup(1, 3, "outflow", np.array([3])),
+        PhysicalGroup(1, glyph_curves_tag, "curves_of_a", np.array([4])),
+        PhysicalGroup(2, 9, "whole_domain", np.array([1])),
+    ]
+    return MeshData(nodes, np.arange(1, 5), blocks, groups)
+
+
+def test_place_keeps_inflow_and_outflow_at_the_ends():
+    template = _template()
+    middle = _place(template, 2.0, index=3)
+    assert [g.name for g in middle.physical_groups] == ["wall", "curves_of_a", "whole_domain"]  # noqa
+    assert middle.get_groups("curves_of_a")[0].tag == glyph_curves_tag + 3
+    assert {(b.dim, b.entity) for b in middle.blocks} == {(1, 1), (1, 4), (2, 1)}
+    assert np.array_equal(middle.nodes[:, 0], template.nodes[:, 0] + 2.0)
+
+    first = _place(template, 0.0, index=0, first=True)
+    assert [g.name for g in first.physical_groups].count("inflow") == 1
+    assert "outflow" not in [g.name for g in first.physical_groups]
+    last = _place(template, 0.0, index=0, last=True)
+    assert "outflow" in [g.name for g in last.physical_groups]
+
+
+def test_template_mesh_is_conforming(gmsh):
+    from fontmesher import make_string_mesh, make_template_mesh
+
+    kwargs = dict(font="Clip", lc=0.1, write=False, return_data=True)
+    data = make_template_mesh("abca", **kwargs)
+    direct = make_string_mesh("abca", **kwargs)
+    groups = sorted((g.dim, g.tag, g.name) for g in data.physical_groups)
+    assert groups == sorted((g.dim, g.tag, g.name) for g in direct.physical_groups)
+    # one curve group per glyph, tagged by its index in the string
+    assert [tag - glyph_curves_tag for _, tag, _ in groups if tag >= glyph_curves_tag] == [0, 1, 2, 3]  # noqa
+    # the cells are joined: the only open edges are the domain and glyph boundaries
+    assert open_edges(data) == group_edges(data)
+    assert len(data.get_groups("inflow")[0].entities) == 1
+    assert len(data.get_groups("outflow")[0].entities) == 1
@@ -0,0 +1,94 @@
+import pytest
+from mesh_checks import group_edges, open_edges
+
+from fontmesher.fonts import get_font
+from fontmesher.glyphs import glyph_source
+from fontmesher.layout import layout_text
+from fontmesher.tiled import plan_tiles
+
+text = "Hello world\nfrom a\ntiled mesh"
+glyph_size, line_spacing, pad = 0.5, 1.5, 0.3
+
+
+def _plan(glyphs_per_tile, lc=0.1, cut_lc=0.05):
+    glyphs, min_val, max_val = glyph_source(get_font("Clip"))
+    placements, (width, height) = layout_text(
+        text, glyphs, min_val, max_val,
+        glyph_size=glyph_size, glyph_offset=0.5, line_spacing=line_spacing,
+        origin=(pad, pad),
+    )
+    domain = (width + 2 * pad, height + 2 * pad)
+    num_lines = text.count("\n") + 1
+    line_bottoms = [
+        pad + (num_lines - 1 - k) * glyph_size * line_spacing for k in range(num_lines)
+    ]
+    tiles = plan_tiles(placements, line_bottoms, domain, glyph_size, glyphs_per_tile, lc, cut_lc)  # noqa
+    return placements, domain, tiles
+
+
+def _area(vertices):
+    return sum(
+        x0 * y1 - x1 * y0
+        for (x0, y0), (x1, y1) in zip(vertices, vertices[1:] + vertices[:1])
+    ) / 2
+
+
+def test_layout_lines_from_the_top():
+    placements, _, _ = _plan(2)
+    assert [p.char for p in placements] == [c for c in text if c != "\n"]
+    lines = [p.line for p in placements]
+    assert lines == sorted(lines)
+    top = [p.y for p in placements if p.line == 0]
+    bottom = [p.y for p in placements if p.line == 2]
+    assert top[0] > bottom[0]
+
+
+@pytest.mark.parametrize("glyphs_per_tile", [1, 2, 4, 100])
+def test_tiles_cover_the_domain(glyphs_per_tile):
+    placements, (width, height), tiles = _plan(glyphs_per_tile)
+    assert sum(_area(t.vertices) for t in tiles) == pytest.approx(width * height)
+    inked = sorted(p.index for p in placements if p.x_min is not None)
+    assert sorted(p.index for t in tiles for p in t.placements) == inked
+
+
+@pytest.mark.parametrize("glyphs_per_tile", [1, 2, 4])
+def test_cut_edges_match_their_neighbour(glyphs_per_tile):
+    _, _, tiles = _plan(glyphs_per_tile)
+    cuts = {}
+    for tile in tiles:
+        vertices = tile.vertices
+        for i, (kind, divisions) in enumerate(tile.edges):
+            a, b = vertices[i], vertices[(i + 1) % len(vertices)]
+            if kind == "cut":
+                assert divisions >= 1
+                cuts.setdefault(frozenset((a, b)), []).append((tile.index, divisions))
+            else:
+                assert divisions is None
+    assert cuts
+    for edge, sides in cuts.items():
+        # every cut edge is shared by exactly two tiles with the same divisions
+        assert len(sides) == 2
+        (first, divisions), (second, other) = sides
+        assert first != second and divisions == other
+
+
+@pytest.mark.parametrize("lc_min", [None, 0.03])
+def test_text_mesh_is_conforming(gmsh, lc_min):
+    from fontmesher import make_text_mesh
+
+    data = make_text_mesh(
+        text, font="Clip", lc=0.1, lc_min=lc_min, glyphs_per_tile=2, workers=2,
+        write=False, return_data=True,
+    )
+    # the tiles are joined: the only open edges are the domain and glyph boundaries
+    assert open_edges(data) == group_edges(data)
+    assert len(data.get_groups("inflow")[0].entities) == text.count("\n") + 1
+
+
+def test_text_mesh_keeps_the_thread_count(gmsh):
+    from fontmesher import make_text_mesh
+
+    gmsh.initialize()
+    gmsh.option.setNumber("General.NumThreads", 3)
+    make_text_mesh("ab", font="Clip", lc=0.2, workers=1, write=False)
+    assert gmsh.option.getNumber("General.NumThreads") == 3